@@ -0,0 +1,144 @@
+import asyncio
+import collections
+import math
+import time
+from typing import Any
+
+
+class AdmissionRejected(Exception):
+    """Raised by `AdmissionController.acquire` when a request is shed instead of admitted."""
+
+
+class AdmissionController:
+    """
+    Caps how many requests are processed at once.
+
+    Up to `max_concurrency` requests run; the next `max_queue` wait in FIFO
+    order for a slot, each for at most `max_wait_ms`. A request that finds the
+    queue full, or whose wait runs out, is shed right away with
+    AdmissionRejected, so under overload the requests that do get in see the
+    latency of a fully, but not over-, loaded service, and the rest fail fast
+    and retry instead of piling onto the model and the database.
+
+    A finished request hands its slot straight to the oldest waiter.
+    Only call it from the event loop's thread: the counters and the queue are
+    plain attributes, with no lock.
+    """
+
+    def __init__(self, max_concurrency: int = 256, max_queue: int = 512, max_wait_ms: float = 1000):
+        self.max_concurrency = max(1, max_concurrency)
+        self.max_queue = max(0, max_queue)
+        self.max_wait = max(0.0, max_wait_ms) / 1000
+        self.in_flight = 0
+        self.admitted = 0
+        self.shed_queue_full = 0
+        self.shed_timeout = 0
+        self._waiters: collections.deque[asyncio.Future] = collections.deque()
+
+    async def acquire(self, timeout: float | None = None) -> None:
+        """
+        Waits for a slot; pair every successful call with `release()`.
+
+        `timeout` (seconds, e.g. what is left of the request's deadline) shortens the wait below `max_wait_ms`.
+
+        Raises:
+            AdmissionRejected: If the wait queue is full or no slot frees up in time.
+        """
+        if self.in_flight < self.max_concurrency and not self._waiters:
+            self.in_flight += 1
+            self.admitted += 1
+            return
+        if len(self._waiters) >= self.max_queue:
+            self.shed_queue_full += 1
+            raise AdmissionRejected(f"{self.in_flight} requests in flight and {len(self._waiters)} waiting")
+
+        wait = self.max_wait if timeout is None else max(0.0, min(self.max_wait, timeout))
+        waiter = asyncio.get_running_loop().create_future()
+        self._waiters.append(waiter)
+        try:
+            # shield: a timeout must not cancel a slot that was handed over at the same moment
+            await asyncio.wait_for(asyncio.shield(waiter), wait)
+        except (asyncio.TimeoutError, asyncio.CancelledError) as e:
+            if waiter.done():
+                # The slot arrived as the wait ended; give it to the next waiter
+                self.release()
+            else:
+                waiter.cancel()
+                self._waiters.remove(waiter)
+            if isinstance(e, asyncio.CancelledError):
+                raise
+            self.shed_timeout += 1
+            raise AdmissionRejected("No slot freed up in time") from None
+        self.admitted += 1
+
+    def release(self) -> None:
+        """
+        Frees a slot, handing it to the oldest waiter if there is one.
+        """
+        if self._waiters:
+            self._waiters.popleft().set_result(None)
+        else:
+            self.in_flight -= 1
+
+    def stats(self) -> dict[str, Any]:
+        return {
+            "max_concurrency": self.max_concurrency,
+            "in_flight": self.in_flight,
+            "queued": len(self._waiters),
+            "max_queue": self.max_queue,
+            "admitted": self.admitted,
+            "shed_queue_full": self.shed_queue_full,
+            "shed_timeout": self.shed_timeout,
+        }
+
+
+class TokenBucketLimiter:
+    """
+    Per-client rate limit: each client key gets a bucket of `burst` tokens
+    that refills at `rate` tokens per second; a request takes one token.
+
+    Buckets are refilled lazily when their client next calls, so idle clients
+    cost nothing; at most `max_clients` buckets are kept, dropping the least
+    recently seen. Like AdmissionController, call it from the event loop's
+    thread only.
+    """
+
+    def __init__(self, rate: float, burst: int | None = None, max_clients: int = 10000):
+        self.rate = rate
+        self.burst = max(1, burst if burst is not None else math.ceil(rate))
+        self.max_clients = max(1, max_clients)
+        self.limited = 0
+        # client key -> [tokens, last refill (monotonic)]
+        self._buckets: collections.OrderedDict[str, list[float]] = collections.OrderedDict()
+
+    def take(self, key: str) -> float:
+        """
+        Takes a token for `key`.
+
+        Returns:
+            float: 0.0 if the request may proceed, otherwise the seconds until a token is available.
+        """
+        now = time.monotonic()
+        bucket = self._buckets.get(key)
+        if bucket is None:
+            bucket = self._buckets[key] = [float(self.burst), now]
+            if len(self._buckets) > self.max_clients:
+                self._buckets.popitem(last=False)
+        else:
+            self._buckets.move_to_end(key)
+            bucket[0] = min(self.burst, bucket[0] + (now - bucket[1]) * self.rate)
+            bucket[1] = now
+
+        if bucket[0] >= 1:
+            bucket[0] -= 1
+            return 0.0
+        self.limited += 1
+        return (1 - bucket[0]) / self.rate
+
+    def stats(self) -> dict[str, Any]:
+        return {
+            "rate": self.rate,
+            "burst": self.burst,
+            "clients": len(self._buckets),
+            "limited": self.limited,
+        }
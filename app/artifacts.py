@@ -0,0 +1,317 @@
+"""
+Compact model artifact: one directory holding everything `services` needs,
+in formats that load in milliseconds.
+
+    models/bundle/
+        manifest.json            format version, bundle version, features,
+                                 encoding config, file checksums
+        model-<sha>.ubj          XGBoost's native UBJSON model
+        tables-<sha>.npy         scaler center/scale as a raw float64 block,
+                                 memory-mapped on load so forked workers share it
+
+Data files are named after their checksum and the manifest is written last
+with an atomic rename, so re-exporting never changes files a running process
+has mapped, and readers see either the old bundle or the new one.
+
+Run from the repository root:
+    python -m app.artifacts export
+    python -m app.artifacts verify
+"""
+import argparse
+import hashlib
+import io
+import json
+import logging
+import os
+import time
+from datetime import datetime, timezone
+from typing import Any
+
+import numpy as np
+
+from .encoder import extract_affine
+
+FORMAT_VERSION = 1
+MANIFEST_FILE = "manifest.json"
+MAP_KEYS = ("gender_map", "default_map", "education_order")
+LIST_KEYS = ("home_ownership_options", "loan_intent_options")
+
+logger = logging.getLogger("loan_predictor")
+
+
+class ArtifactError(Exception):
+    """Raised when a model artifact is missing, corrupted or of an unsupported format."""
+
+
+class AffineScaler:
+    """
+    Stand-in for the fitted sklearn scaler: `transform(X) = (X - center_) / scale_`.
+
+    Exposes the RobustScaler attributes that `extract_affine` reads.
+    """
+
+    with_centering = True
+    with_scaling = True
+
+    def __init__(self, center: np.ndarray, scale: np.ndarray):
+        self.center_ = center
+        self.scale_ = scale
+        self.n_features_in_ = len(center)
+
+    def transform(self, X: np.ndarray) -> np.ndarray:
+        return (np.asarray(X, dtype=np.float64) - self.center_) / self.scale_
+
+
+class NativeClassifier:
+    """
+    Stand-in for XGBClassifier around a Booster loaded from the native format.
+
+    Implements what the services use: `get_booster`, `best_iteration` (raising
+    AttributeError when early stopping was not used, like the wrapper),
+    `missing` and `predict_proba`.
+    """
+
+    def __init__(self, booster, n_classes: int, best_iteration: int | None = None, missing: float = np.nan):
+        self._booster = booster
+        self.n_classes_ = n_classes
+        self.classes_ = np.arange(n_classes)
+        self.missing = missing
+        self._best_iteration = best_iteration
+
+    @property
+    def best_iteration(self) -> int:
+        if self._best_iteration is None:
+            raise AttributeError("best_iteration is only defined when early stopping is used")
+        return self._best_iteration
+
+    def get_booster(self):
+        return self._booster
+
+    def predict_proba(self, X: np.ndarray) -> np.ndarray:
+        iteration_range = (0, self._best_iteration + 1) if self._best_iteration is not None else (0, 0)
+        raw = self._booster.inplace_predict(
+            np.asarray(X), iteration_range=iteration_range, missing=self.missing, validate_features=False
+        )
+        if raw.ndim == 1:
+            return np.column_stack((1.0 - raw, raw))
+        return raw
+
+
+def _sha256(path: str) -> str:
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def _write_versioned(out_dir: str, stem: str, suffix: str, data: bytes) -> dict[str, Any]:
+    sha = hashlib.sha256(data).hexdigest()
+    name = f"{stem}-{sha[:16]}{suffix}"
+    path = os.path.join(out_dir, name)
+    if not os.path.exists(path):
+        tmp_path = f"{path}.tmp"
+        with open(tmp_path, "wb") as f:
+            f.write(data)
+        os.replace(tmp_path, path)
+    return {"file": name, "sha256": sha, "bytes": len(data)}
+
+
+def export_bundle(model, scaler, features: list[str], config: dict[str, Any], out_dir: str,
+                  source: dict[str, str] | None = None) -> dict[str, Any]:
+    """
+    Writes a loaded model, scaler, feature list and encoding config as an artifact in `out_dir`.
+
+    Args:
+        model: The fitted XGBClassifier.
+        scaler: The fitted affine sklearn scaler (StandardScaler or RobustScaler).
+        features (list): The feature names, in model column order.
+        config (dict): The config.yaml maps and option lists.
+        out_dir (str): The artifact directory; created if needed.
+        source (dict, optional): Checksums of the files the bundle was built from, recorded in the manifest.
+
+    Returns:
+        dict: The manifest that was written.
+    """
+    import xgboost
+
+    os.makedirs(out_dir, exist_ok=True)
+    center, scale = extract_affine(scaler, len(features))
+
+    tables = io.BytesIO()
+    np.save(tables, np.ascontiguousarray(np.stack([center, scale]), dtype=np.float64), allow_pickle=False)
+
+    try:
+        best_iteration = int(model.best_iteration)
+    except AttributeError:
+        best_iteration = None
+    missing = getattr(model, "missing", np.nan)
+
+    model_entry = _write_versioned(out_dir, "model", ".ubj", bytes(model.get_booster().save_raw("ubj")))
+    tables_entry = _write_versioned(out_dir, "tables", ".npy", tables.getvalue())
+
+    manifest = {
+        "format_version": FORMAT_VERSION,
+        "version": hashlib.sha256(f"{model_entry['sha256']}{tables_entry['sha256']}{features}{config}".encode())
+        .hexdigest()[:16],
+        "created_at": datetime.now(timezone.utc).isoformat(),
+        "xgboost_version": xgboost.__version__,
+        "source": source or {},
+        "model": {
+            **model_entry,
+            "n_classes": int(getattr(model, "n_classes_", 2)),
+            "best_iteration": best_iteration,
+            "missing": None if missing is None or np.isnan(missing) else float(missing),
+        },
+        "tables": {**tables_entry, "rows": ["center", "scale"], "shape": [2, len(features)], "dtype": "float64"},
+        "features": list(features),
+        # Maps are stored as [key, value] pairs to keep non-string YAML keys (e.g. booleans)
+        "maps": {key: [[k, v] for k, v in config[key].items()] for key in MAP_KEYS},
+        "lists": {key: list(config[key]) for key in LIST_KEYS},
+    }
+
+    manifest_path = os.path.join(out_dir, MANIFEST_FILE)
+    tmp_path = f"{manifest_path}.tmp"
+    with open(tmp_path, "w") as f:
+        json.dump(manifest, f, indent=2)
+    os.replace(tmp_path, manifest_path)
+
+    # Data files of older exports are no longer referenced; processes that
+    # still map them keep their pages until they reload
+    keep = {model_entry["file"], tables_entry["file"], MANIFEST_FILE}
+    for name in os.listdir(out_dir):
+        if name not in keep and name.startswith(("model-", "tables-")):
+            os.remove(os.path.join(out_dir, name))
+    return manifest
+
+
+def read_manifest(artifact_dir: str) -> dict[str, Any]:
+    """
+    Reads and sanity-checks the manifest of an artifact directory.
+
+    Raises:
+        ArtifactError: If it is missing, unreadable or of an unsupported format version.
+    """
+    path = os.path.join(artifact_dir, MANIFEST_FILE)
+    try:
+        with open(path) as f:
+            manifest = json.load(f)
+    except (OSError, ValueError) as e:
+        raise ArtifactError(f"Cannot read {path}: {e}") from e
+    if manifest.get("format_version") != FORMAT_VERSION:
+        raise ArtifactError(f"Unsupported artifact format {manifest.get('format_version')!r} in {path}")
+    return manifest
+
+
+def verify_bundle(artifact_dir: str, manifest: dict[str, Any] | None = None) -> dict[str, Any]:
+    """
+    Checks every data file against the size and SHA-256 recorded in the manifest.
+
+    Raises:
+        ArtifactError: On a missing file or a checksum mismatch.
+    """
+    manifest = manifest or read_manifest(artifact_dir)
+    for section in ("model", "tables"):
+        entry = manifest[section]
+        path = os.path.join(artifact_dir, entry["file"])
+        if not os.path.exists(path):
+            raise ArtifactError(f"Artifact file {path} is missing")
+        if os.path.getsize(path) != entry["bytes"] or _sha256(path) != entry["sha256"]:
+            raise ArtifactError(f"Checksum mismatch for {path}")
+    return manifest
+
+
+def check_sources(manifest: dict[str, Any], models_dir: str = "models") -> None:
+    """
+    Checks that the pickles and config.yaml in `models_dir` are still the ones
+    the artifact was exported from (the manifest's "source" checksums). Files
+    that are not there are skipped, for deployments that ship only the artifact.
+
+    Raises:
+        ArtifactError: If a source file was changed after the export.
+    """
+    for name, sha in (manifest.get("source") or {}).items():
+        path = os.path.join(models_dir, name)
+        if os.path.exists(path) and _sha256(path) != sha:
+            raise ArtifactError(f"{path} changed after the artifact was exported; re-export it")
+
+
+def load_bundle(artifact_dir: str, verify: bool = True) -> tuple[Any, AffineScaler, list[str], dict[str, Any], dict[str, Any]]:
+    """
+    Loads an artifact directory.
+
+    Returns:
+        Tuple:
+            - NativeClassifier: The model.
+            - AffineScaler: The scaler, backed by a read-only memory map of the tables.
+            - list: The feature names.
+            - dict: The encoding config, with the original key types.
+            - dict: The manifest.
+
+    Raises:
+        ArtifactError: If the artifact is missing, corrupted, of an unsupported
+        format or (with `verify`) older than the pickles it was exported from.
+    """
+    import xgboost
+
+    manifest = read_manifest(artifact_dir)
+    if verify:
+        verify_bundle(artifact_dir, manifest)
+        check_sources(manifest)
+
+    try:
+        booster = xgboost.Booster(model_file=os.path.join(artifact_dir, manifest["model"]["file"]))
+        tables = np.load(os.path.join(artifact_dir, manifest["tables"]["file"]), mmap_mode="r", allow_pickle=False)
+    except (OSError, ValueError, xgboost.core.XGBoostError) as e:
+        raise ArtifactError(f"Cannot load artifact in {artifact_dir}: {e}") from e
+    if tables.shape != tuple(manifest["tables"]["shape"]):
+        raise ArtifactError(f"Tables have shape {tables.shape}, manifest says {manifest['tables']['shape']}")
+
+    missing = manifest["model"]["missing"]
+    model = NativeClassifier(
+        booster,
+        n_classes=manifest["model"]["n_classes"],
+        best_iteration=manifest["model"]["best_iteration"],
+        missing=np.nan if missing is None else missing,
+    )
+    config = {key: {k: v for k, v in pairs} for key, pairs in manifest["maps"].items()}
+    config.update({key: list(values) for key, values in manifest["lists"].items()})
+    return model, AffineScaler(tables[0], tables[1]), list(manifest["features"]), config, manifest
+
+
+def main(argv: list[str] | None = None) -> None:
+    import joblib
+    import yaml
+
+    parser = argparse.ArgumentParser(prog="python -m app.artifacts", description="Export or verify the model artifact.")
+    parser.add_argument("command", choices=("export", "verify"))
+    parser.add_argument("--models-dir", default="models", help="Directory with the pickles and config.yaml")
+    parser.add_argument("--out", default=os.getenv("MODEL_ARTIFACT_DIR") or "models/bundle", help="Artifact directory")
+    args = parser.parse_args(argv)
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s - %(levelname)s - %(name)s - %(message)s")
+
+    if args.command == "export":
+        sources = {
+            name: os.path.join(args.models_dir, name)
+            for name in ("xgb_model.pkl", "scaler.pkl", "feature_names.pkl", "config.yaml")
+        }
+        model = joblib.load(sources["xgb_model.pkl"])
+        scaler = joblib.load(sources["scaler.pkl"])
+        features = joblib.load(sources["feature_names.pkl"])
+        with open(sources["config.yaml"]) as f:
+            config = yaml.safe_load(f)
+
+        manifest = export_bundle(
+            model, scaler, features, config, args.out,
+            source={name: _sha256(path) for name, path in sources.items()},
+        )
+        logger.info("Exported model bundle %s to %s.", manifest["version"], args.out)
+    else:
+        started = time.perf_counter()
+        manifest = verify_bundle(args.out)
+        logger.info("Bundle %s in %s is intact (%.1f ms).", manifest["version"], args.out,
+                    (time.perf_counter() - started) * 1000)
+
+
+if __name__ == "__main__":
+    main()
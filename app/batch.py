@@ -0,0 +1,376 @@
+"""
+Offline batch scoring: scores a CSV, Parquet or NDJSON file without going through HTTP.
+
+The input is read in chunks of --chunk-rows rows. Every chunk is validated and
+encoded column-wise and then scored by a worker process that loaded the model
+once. Each chunk becomes one part file in the output directory, and a
+checkpoint there records the finished chunks, so re-running the same command
+after an interruption only scores what is missing.
+
+Run from the repository root:
+    python -m app.batch loans.csv scored/ --workers 8
+"""
+import argparse
+import json
+import logging
+import multiprocessing
+import os
+import time
+import typing
+from concurrent.futures import ALL_COMPLETED, FIRST_COMPLETED, Future, ProcessPoolExecutor, wait
+from typing import Any, Iterator
+
+import numpy as np
+import pandas as pd
+from annotated_types import Ge, Gt
+from dotenv import load_dotenv
+
+from . import services
+from .schemas import LoanApplication
+
+CHECKPOINT_FILE = "_checkpoint.json"
+INPUT_FORMATS = {".csv": "csv", ".parquet": "parquet", ".pq": "parquet", ".ndjson": "ndjson", ".jsonl": "ndjson"}
+OUTPUT_FORMATS = ("parquet", "csv")
+
+logger = logging.getLogger("loan_predictor")
+
+
+def detect_format(path: str) -> str:
+    """
+    Infers the input format from the file extension.
+
+    Raises:
+        ValueError: If the extension is not one of the supported formats.
+    """
+    extension = os.path.splitext(path)[1].lower()
+    if extension not in INPUT_FORMATS:
+        raise ValueError(f"Cannot infer the input format of {path!r}, pass --input-format")
+    return INPUT_FORMATS[extension]
+
+
+def read_chunks(path: str, input_format: str, chunk_rows: int) -> Iterator[pd.DataFrame]:
+    """
+    Yields the input as DataFrames of at most `chunk_rows` rows, in file order.
+    """
+    if input_format == "csv":
+        yield from pd.read_csv(path, chunksize=chunk_rows)
+    elif input_format == "ndjson":
+        with pd.read_json(path, lines=True, chunksize=chunk_rows, dtype=False, convert_dates=False) as reader:
+            yield from reader
+    elif input_format == "parquet":
+        import pyarrow.parquet as pq
+
+        for batch in pq.ParquetFile(path).iter_batches(batch_size=chunk_rows):
+            yield batch.to_pandas()
+    else:
+        raise ValueError(f"Unknown input format: {input_format!r}")
+
+
+def validate_frame(frame: pd.DataFrame) -> tuple[dict[str, np.ndarray], np.ndarray]:
+    """
+    Validates a chunk column-wise against the LoanApplication field constraints.
+
+    Args:
+        frame (pd.DataFrame): One chunk of raw input rows.
+
+    Returns:
+        Tuple:
+            - dict: The field columns, numeric fields as float64, ready for `services.prepare_columns`.
+            - np.ndarray: An error message per row, None for valid rows.
+    """
+    n = len(frame)
+    columns: dict[str, np.ndarray] = {}
+    problems: list[tuple[str, np.ndarray]] = []
+
+    for name, field in LoanApplication.model_fields.items():
+        if name not in frame:
+            problems.append((f"{name}: Field required", np.ones(n, dtype=bool)))
+            continue
+
+        if typing.get_origin(field.annotation) is typing.Literal:
+            allowed = typing.get_args(field.annotation)
+            columns[name] = frame[name].to_numpy(dtype=object)
+            bad = ~frame[name].isin(allowed).to_numpy()
+            problems.append((f"{name}: Input should be one of {', '.join(map(repr, allowed))}", bad))
+            continue
+
+        numbers = pd.to_numeric(frame[name], errors="coerce").to_numpy(dtype=np.float64)
+        columns[name] = numbers
+        bad = np.isnan(numbers)
+        kind = "a valid integer" if field.annotation is int else "a valid number"
+        if field.annotation is int:
+            bad |= np.mod(numbers, 1) != 0
+        for constraint in field.metadata:
+            if isinstance(constraint, Gt):
+                bad |= ~(numbers > constraint.gt)
+                kind += f" greater than {constraint.gt}"
+            elif isinstance(constraint, Ge):
+                bad |= ~(numbers >= constraint.ge)
+                kind += f" greater than or equal to {constraint.ge}"
+        problems.append((f"{name}: Input should be {kind}", bad))
+
+    errors = np.full(n, None, dtype=object)
+    for message, bad in problems:
+        for i in np.flatnonzero(bad):
+            errors[i] = message if errors[i] is None else f"{errors[i]}; {message}"
+    return columns, errors
+
+
+def score_frame(frame: pd.DataFrame, logger: logging.Logger) -> pd.DataFrame:
+    """
+    Validates, encodes and scores one chunk with a single model call.
+
+    Returns:
+        pd.DataFrame: One row per input row with `prediction`, `confidence`,
+        `loan_status` and `error`; invalid rows have status "Error" and no prediction.
+    """
+    columns, errors = validate_frame(frame)
+    valid = np.array([error is None for error in errors], dtype=bool)
+
+    prediction = pd.array(np.zeros(len(frame), dtype=np.int8), dtype="Int8")
+    prediction[~valid] = pd.NA
+    confidence = np.full(len(frame), np.nan)
+    status = np.full(len(frame), "Error", dtype=object)
+
+    if valid.any():
+        bundle = services.current_bundle()
+        X = services.prepare_columns({name: values[valid] for name, values in columns.items()}, logger, bundle)
+        pred_class, pred_confidence = services.predict_batch(X, logger, bundle)
+        prediction[valid] = pred_class
+        confidence[valid] = pred_confidence
+        status[valid] = [services.loan_status(p) for p in pred_class.tolist()]
+
+    return pd.DataFrame({
+        "prediction": prediction,
+        "confidence": confidence,
+        "loan_status": status,
+        "error": errors,
+    })
+
+
+def part_path(output_dir: str, index: int, output_format: str) -> str:
+    return os.path.join(output_dir, f"part-{index:05d}.{output_format}")
+
+
+def score_part(
+    index: int,
+    start: int,
+    frame: pd.DataFrame,
+    output_dir: str,
+    output_format: str,
+    id_column: str | None = None,
+) -> tuple[int, int, int]:
+    """
+    Scores one chunk and writes it as a part file; runs inside a pool worker.
+
+    The part is written under a temporary name and renamed, so a part file
+    either holds the whole chunk or does not exist.
+
+    Returns:
+        Tuple:
+            - int: The chunk index.
+            - int: The number of rows in the chunk.
+            - int: The number of invalid rows.
+    """
+    result = score_frame(frame, logger)
+    result.insert(0, "row", np.arange(start, start + len(frame), dtype=np.int64))
+    if id_column is not None:
+        result.insert(1, id_column, frame[id_column].to_numpy())
+
+    path = part_path(output_dir, index, output_format)
+    tmp_path = f"{path}.tmp"
+    if output_format == "parquet":
+        result.to_parquet(tmp_path, engine="pyarrow", index=False)
+    else:
+        result.to_csv(tmp_path, index=False)
+    os.replace(tmp_path, path)
+    return index, len(result), int((result["loan_status"] == "Error").sum())
+
+
+def input_version(input_path: str) -> dict[str, int]:
+    """
+    Returns the size and mtime of the input, to tell whether it changed since a checkpoint was written.
+    """
+    stat = os.stat(input_path)
+    return {"input_size": stat.st_size, "input_mtime_ns": stat.st_mtime_ns}
+
+
+def load_checkpoint(path: str, input_path: str, chunk_rows: int) -> dict[str, Any]:
+    """
+    Reads the checkpoint of an earlier run, or starts a new one.
+
+    Raises:
+        ValueError: If the checkpoint belongs to another input or chunk size, or
+        the input was modified since the checkpoint was written.
+    """
+    version = input_version(input_path)
+    state = {"input": input_path, "chunk_rows": chunk_rows, **version, "completed": [], "rows": 0, "errors": 0}
+    if not os.path.exists(path):
+        return state
+
+    with open(path) as f:
+        saved = json.load(f)
+    if saved["input"] != input_path or saved["chunk_rows"] != chunk_rows:
+        raise ValueError(
+            f"Checkpoint {path} was written for {saved['input']} with {saved['chunk_rows']} rows per chunk; "
+            "use another output directory or --restart"
+        )
+    if any(saved.get(key) != value for key, value in version.items()):
+        raise ValueError(
+            f"Checkpoint {path} was written for another version of {input_path} (size or mtime differ); "
+            "use another output directory or --restart"
+        )
+    return {**state, **saved}
+
+
+def save_checkpoint(path: str, state: dict[str, Any]) -> None:
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "w") as f:
+        json.dump({**state, "completed": sorted(state["completed"])}, f)
+    os.replace(tmp_path, path)
+
+
+def run(
+    input_path: str,
+    output_dir: str,
+    input_format: str | None = None,
+    output_format: str = "parquet",
+    chunk_rows: int = 50000,
+    workers: int | None = None,
+    threads_per_worker: int = 1,
+    id_column: str | None = None,
+    restart: bool = False,
+    logger: logging.Logger = logger,
+) -> dict[str, Any]:
+    """
+    Scores `input_path` into part files under `output_dir`, resuming from its checkpoint.
+
+    With more than one worker, chunks are scored in a spawned process pool
+    whose workers each load the model once (`services.init_worker`) and use
+    `threads_per_worker` XGBoost threads; at most two chunks per worker are
+    read ahead. With one worker everything runs in this process.
+
+    Chunks listed in the checkpoint are still read (to keep row numbers) but
+    not scored again.
+
+    Returns:
+        dict: Rows and invalid rows scored in total, rows scored by this run, elapsed seconds and rows/sec.
+    """
+    if output_format not in OUTPUT_FORMATS:
+        raise ValueError(f"Unknown output format: {output_format!r}, expected one of {OUTPUT_FORMATS}")
+    input_format = input_format or detect_format(input_path)
+    workers = workers or os.cpu_count() or 1
+
+    os.makedirs(output_dir, exist_ok=True)
+    checkpoint = os.path.join(output_dir, CHECKPOINT_FILE)
+    if restart:
+        for name in os.listdir(output_dir):
+            if name == CHECKPOINT_FILE or name.startswith("part-"):
+                os.remove(os.path.join(output_dir, name))
+    state = load_checkpoint(checkpoint, os.path.abspath(input_path), chunk_rows)
+    completed = set(state["completed"])
+    if completed:
+        logger.info("Resuming from checkpoint: %d chunks (%d rows) already scored.", len(completed), state["rows"])
+
+    pool = None
+    if workers > 1:
+        # Few XGBoost threads per worker keep the pool from oversubscribing the CPU
+        pool = ProcessPoolExecutor(
+            max_workers=workers,
+            mp_context=multiprocessing.get_context("spawn"),
+            initializer=services.init_worker,
+            initargs=(threads_per_worker,),
+        )
+        logger.info("Started %d scoring workers.", workers)
+    elif services.model is None:
+        services.load_resources(logger)
+
+    started = time.monotonic()
+    scored = 0
+
+    def finish(index: int, rows: int, errors: int) -> None:
+        nonlocal scored
+        completed.add(index)
+        state["completed"] = completed
+        state["rows"] += rows
+        state["errors"] += errors
+        save_checkpoint(checkpoint, state)
+
+        scored += rows
+        elapsed = time.monotonic() - started
+        logger.info(
+            "Chunk %d done: %d rows (%d invalid). %d rows scored, %.0f rows/s.",
+            index, rows, errors, scored, scored / elapsed if elapsed else 0.0,
+        )
+
+    def collect(futures: set[Future], return_when: str) -> set[Future]:
+        done, pending = wait(futures, return_when=return_when)
+        for future in done:
+            finish(*future.result())
+        return pending
+
+    pending: set[Future] = set()
+    try:
+        start = 0
+        for index, frame in enumerate(read_chunks(input_path, input_format, chunk_rows)):
+            chunk_start, start = start, start + len(frame)
+            if index in completed:
+                continue
+            args = (index, chunk_start, frame, output_dir, output_format, id_column)
+            if pool is None:
+                finish(*score_part(*args))
+                continue
+            pending.add(pool.submit(score_part, *args))
+            if len(pending) >= workers * 2:
+                pending = collect(pending, FIRST_COMPLETED)
+        if pending:
+            collect(pending, ALL_COMPLETED)
+    finally:
+        if pool is not None:
+            pool.shutdown(wait=True, cancel_futures=True)
+
+    elapsed = time.monotonic() - started
+    summary = {
+        "rows": state["rows"],
+        "errors": state["errors"],
+        "chunks": len(completed),
+        "scored_this_run": scored,
+        "elapsed_s": round(elapsed, 3),
+        "rows_per_s": round(scored / elapsed, 1) if elapsed else 0.0,
+    }
+    logger.info("Batch scoring finished: %s", summary)
+    return summary
+
+
+def main(argv: list[str] | None = None) -> None:
+    parser = argparse.ArgumentParser(prog="python -m app.batch", description="Score a file of loan applications offline.")
+    parser.add_argument("input", help="CSV, Parquet or NDJSON file of loan applications")
+    parser.add_argument("output_dir", help="Directory for the part files and the checkpoint")
+    parser.add_argument("--input-format", choices=sorted(set(INPUT_FORMATS.values())), help="Default: from the file extension")
+    parser.add_argument("--output-format", choices=OUTPUT_FORMATS, default="parquet")
+    parser.add_argument("--chunk-rows", type=int, default=50000)
+    parser.add_argument("--workers", type=int, default=0, help="Scoring processes (default: one per CPU)")
+    parser.add_argument("--threads-per-worker", type=int, default=1, help="XGBoost threads in each worker")
+    parser.add_argument("--id-column", help="Input column copied to the output next to the row number")
+    parser.add_argument("--restart", action="store_true", help="Ignore an existing checkpoint")
+    args = parser.parse_args(argv)
+
+    load_dotenv()
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s - %(levelname)s - %(name)s - %(message)s")
+
+    summary = run(
+        args.input,
+        args.output_dir,
+        input_format=args.input_format,
+        output_format=args.output_format,
+        chunk_rows=args.chunk_rows,
+        workers=args.workers or None,
+        threads_per_worker=args.threads_per_worker,
+        id_column=args.id_column,
+        restart=args.restart,
+    )
+    print(json.dumps(summary))
+
+
+if __name__ == "__main__":
+    main()
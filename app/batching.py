@@ -0,0 +1,170 @@
+import asyncio
+import contextvars
+import logging
+import time
+from typing import Any, Awaitable, Callable
+
+from .deadlines import DeadlineExceeded
+
+
+class BatcherQueueFull(Exception):
+    """Raised by `MicroBatcher.submit` when the pending queue is at capacity."""
+
+
+class MicroBatcher:
+    """
+    Collects concurrent submissions into batches and processes each batch with a
+    single call.
+
+    A batch is dispatched as soon as it holds `max_batch_size` items or
+    `max_wait_us` microseconds after its first item arrived, whichever comes
+    first, so the extra latency a request can pick up from batching is bounded
+    by the wait window. At most `max_in_flight` batches are processed at once;
+    while they run, new submissions keep queueing and go out as larger batches.
+
+    `process_batch` receives the list of submitted items and must return one
+    result per item, in the same order. If it raises, every request in the
+    batch gets the exception.
+    """
+
+    def __init__(
+        self,
+        process_batch: Callable[[list], Awaitable[list]],
+        max_batch_size: int = 64,
+        max_wait_us: int = 500,
+        max_queue_size: int = 1024,
+        max_in_flight: int = 1,
+        logger: logging.Logger | None = None,
+    ):
+        self.process_batch = process_batch
+        self.max_batch_size = max(1, max_batch_size)
+        self.max_wait = max(0, max_wait_us) / 1e6
+        self.max_queue_size = max_queue_size
+        self.max_in_flight = max(1, max_in_flight)
+        self.logger = logger or logging.getLogger("loan_predictor")
+
+        # Histogram buckets: 1, 2, 4, ... up to max_batch_size
+        self.bucket_bounds = []
+        bound = 1
+        while bound < self.max_batch_size:
+            self.bucket_bounds.append(bound)
+            bound *= 2
+        self.bucket_bounds.append(self.max_batch_size)
+        self.bucket_counts = [0] * len(self.bucket_bounds)
+        self.batches = 0
+        self.items = 0
+        self.expired = 0
+
+        self._loop: asyncio.AbstractEventLoop | None = None
+        self._queue: asyncio.Queue | None = None
+        self._worker: asyncio.Task | None = None
+        self._in_flight: asyncio.Semaphore | None = None
+        self._flushes: set[asyncio.Task] = set()
+
+    def _ensure_worker(self) -> asyncio.Queue:
+        # The queue and worker belong to one event loop; start them on first use
+        # (and again if the loop changes, e.g. between TestClient requests).
+        loop = asyncio.get_running_loop()
+        if self._loop is not loop or self._worker is None or self._worker.done():
+            self._loop = loop
+            self._queue = asyncio.Queue(maxsize=self.max_queue_size)
+            self._in_flight = asyncio.Semaphore(self.max_in_flight)
+            # A fresh context: the worker outlives the request that happened to start
+            # it and must not log (or flush batches) under that request's ID
+            self._worker = loop.create_task(self._run(self._queue), context=contextvars.Context())
+        return self._queue
+
+    async def submit(self, item: Any, deadline: float | None = None) -> Any:
+        """
+        Queues one item and waits for its result.
+
+        An item whose `deadline` (a `time.monotonic()` value) passes while it is
+        queued is dropped from its batch and fails with DeadlineExceeded.
+
+        Raises:
+            BatcherQueueFull: If `max_queue_size` items are already waiting.
+            DeadlineExceeded: If `deadline` passed before the item's batch was dispatched.
+        """
+        queue = self._ensure_worker()
+        future = self._loop.create_future()
+        try:
+            queue.put_nowait((item, future, deadline))
+        except asyncio.QueueFull:
+            raise BatcherQueueFull(f"Batch queue is full ({self.max_queue_size} pending)")
+        return await future
+
+    async def _run(self, queue: asyncio.Queue) -> None:
+        loop = asyncio.get_running_loop()
+        while True:
+            batch = [await queue.get()]
+            deadline = loop.time() + self.max_wait
+
+            while len(batch) < self.max_batch_size:
+                if not queue.empty():
+                    batch.append(queue.get_nowait())
+                    continue
+                timeout = deadline - loop.time()
+                if timeout <= 0:
+                    break
+                try:
+                    batch.append(await asyncio.wait_for(queue.get(), timeout))
+                except asyncio.TimeoutError:
+                    break
+
+            await self._in_flight.acquire()
+            task = loop.create_task(self._flush(batch))
+            self._flushes.add(task)
+            task.add_done_callback(self._flushes.discard)
+
+    async def _flush(self, batch: list) -> None:
+        try:
+            # Requests that were cancelled or ran out of time while queued are not scored
+            now = time.monotonic()
+            for _, future, deadline in batch:
+                if deadline is not None and now >= deadline and not future.done():
+                    self.expired += 1
+                    future.set_exception(DeadlineExceeded("Deadline exceeded before inference"))
+            batch = [(item, future) for item, future, _ in batch if not future.done()]
+            if not batch:
+                return
+            self._record(len(batch))
+
+            try:
+                results = await self.process_batch([item for item, _ in batch])
+                if len(results) != len(batch):
+                    raise RuntimeError(f"Batch returned {len(results)} results for {len(batch)} items")
+            except Exception as e:
+                self.logger.error("Batch of %d failed: %s", len(batch), e)
+                for _, future in batch:
+                    if not future.done():
+                        future.set_exception(e)
+                return
+
+            for (_, future), result in zip(batch, results):
+                if not future.done():
+                    future.set_result(result)
+        finally:
+            self._in_flight.release()
+
+    def _record(self, size: int) -> None:
+        self.batches += 1
+        self.items += size
+        for i, bound in enumerate(self.bucket_bounds):
+            if size <= bound:
+                self.bucket_counts[i] += 1
+                break
+
+    def stats(self) -> dict[str, Any]:
+        """
+        Returns the current queue depth and the batch-size histogram.
+        """
+        return {
+            "queue_depth": self._queue.qsize() if self._queue is not None else 0,
+            "batches": self.batches,
+            "items": self.items,
+            "expired": self.expired,
+            "mean_batch_size": self.items / self.batches if self.batches else 0.0,
+            "batch_size_histogram": {
+                f"le_{bound}": count for bound, count in zip(self.bucket_bounds, self.bucket_counts)
+            },
+        }
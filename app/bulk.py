@@ -0,0 +1,188 @@
+import asyncio
+import collections
+import json
+import logging
+import tempfile
+from typing import Any, AsyncIterator
+
+from .schemas import prediction_record, validate_batch
+from .services import current_bundle, loan_status, score_applications
+
+
+def decode_ndjson(body: bytes) -> tuple[list[Any], dict[int, list[dict[str, Any]]]]:
+    """
+    Decodes newline-delimited JSON, one payload per non-blank line.
+
+    Returns:
+        Tuple:
+            - list: The decoded payloads; lines that are not valid JSON hold None.
+            - dict: A `json_invalid` error for each undecodable line, keyed by row index.
+    """
+    return decode_lines([line for line in body.splitlines() if line.strip()])
+
+
+def decode_lines(lines: list[bytes | None]) -> tuple[list[Any], dict[int, list[dict[str, Any]]]]:
+    """
+    Decodes one JSON payload per line, like `decode_ndjson`.
+
+    A None entry stands for a line that was too long to buffer and is reported as an error.
+    """
+    rows: list[Any] = []
+    errors: dict[int, list[dict[str, Any]]] = {}
+    for line in lines:
+        if line is None:
+            errors[len(rows)] = [{"type": "json_invalid", "loc": (), "msg": "Line exceeds the maximum length"}]
+            rows.append(None)
+            continue
+        try:
+            rows.append(json.loads(line))
+        except ValueError as e:
+            errors[len(rows)] = [{
+                "type": "json_invalid",
+                "loc": (),
+                "msg": f"Invalid JSON: {e}",
+                "input": line.decode(errors="replace"),
+            }]
+            rows.append(None)
+    return rows, errors
+
+
+async def iter_ndjson_lines(chunks: AsyncIterator[bytes], max_line_bytes: int) -> AsyncIterator[bytes | None]:
+    """
+    Splits a stream of body chunks into non-blank lines while holding at most one
+    partial line in memory.
+
+    A line longer than `max_line_bytes` is discarded up to its newline and
+    yielded as None so the caller can report it.
+    """
+    buffer = b""
+    oversized = False
+    async for chunk in chunks:
+        buffer += chunk
+        *lines, buffer = buffer.split(b"\n")
+        for line in lines:
+            if oversized:
+                oversized = False
+                yield None
+            elif line.strip():
+                yield line
+        if len(buffer) > max_line_bytes:
+            oversized, buffer = True, b""
+
+    if oversized:
+        yield None
+    elif buffer.strip():
+        yield buffer
+
+
+class ResultSpool:
+    """
+    FIFO of encoded result chunks between a producer (scoring) and a consumer
+    (the response), so the producer never waits for the consumer.
+
+    Chunks are kept in a SpooledTemporaryFile: in memory up to `max_memory`
+    bytes, on disk beyond that, so memory stays bounded however far the
+    consumer falls behind. File I/O runs in a thread. The file is rewound
+    whenever the consumer catches up. One producer and one consumer, both on
+    the event loop.
+    """
+
+    def __init__(self, max_memory: int):
+        self._file = tempfile.SpooledTemporaryFile(max_size=max_memory)
+        self.max_memory = max_memory
+        # Set once the unread results outgrew memory and moved to disk
+        self.spilled = False
+        self._sizes: collections.deque[int] = collections.deque()
+        self._read_at = 0
+        self._write_at = 0
+        self._lock = asyncio.Lock()
+        self._ready = asyncio.Event()
+        self._closed = False
+
+    async def put(self, data: bytes) -> None:
+        async with self._lock:
+            await asyncio.to_thread(self._write, data)
+            self._sizes.append(len(data))
+        self._ready.set()
+
+    def close(self) -> None:
+        """
+        Marks the end of the results; `get` returns None once the rest is read.
+        """
+        self._closed = True
+        self._ready.set()
+
+    async def get(self) -> bytes | None:
+        while not self._sizes:
+            if self._closed:
+                return None
+            self._ready.clear()
+            await self._ready.wait()
+        async with self._lock:
+            return await asyncio.to_thread(self._read, self._sizes.popleft())
+
+    def discard(self) -> None:
+        self._file.close()
+
+    def _write(self, data: bytes) -> None:
+        self._file.seek(self._write_at)
+        self._file.write(data)
+        self._write_at += len(data)
+        self.spilled = self.spilled or self._write_at > self.max_memory
+
+    def _read(self, size: int) -> bytes:
+        self._file.seek(self._read_at)
+        data = self._file.read(size)
+        self._read_at += size
+        if self._read_at == self._write_at:
+            self._file.seek(0)
+            self._file.truncate()
+            self._read_at = self._write_at = 0
+        return data
+
+
+def score_rows(
+    rows: list[Any],
+    logger: logging.Logger,
+    errors: dict[int, list[dict[str, Any]]] | None = None,
+    offset: int = 0,
+) -> tuple[list[dict[str, Any]], list[dict[str, Any]]]:
+    """
+    Validates, encodes and scores a list of decoded payloads with a single model call.
+
+    Rows already listed in `errors` (e.g. undecodable NDJSON lines) are skipped.
+    The whole list is scored with the model bundle active when the call starts.
+    Invalid rows get their own error entry instead of failing the whole batch.
+
+    Args:
+        rows (list): The decoded payloads.
+        logger (logging.Logger): Logger for the scoring pipeline.
+        errors (dict, optional): Errors found before validation, keyed by row index.
+        offset (int): Added to every reported index, for rows taken from a larger stream.
+
+    Returns:
+        Tuple:
+            - list: One result per row, in input order: `index`, `prediction`, `confidence`
+              and `status`, or `index`, `status` = "Error" and `error`.
+            - list: A persistence record for every successfully scored row.
+    """
+    errors = dict(errors or {})
+    candidates = [i for i in range(len(rows)) if i not in errors]
+    applications, valid, row_errors = validate_batch([rows[i] for i in candidates])
+    for i, row_error in row_errors.items():
+        errors[candidates[i]] = row_error
+    valid = [candidates[i] for i in valid]
+
+    bundle = current_bundle()
+    scores = score_applications(applications, logger, bundle) if applications else []
+
+    results: list[dict[str, Any] | None] = [None] * len(rows)
+    records = []
+    for index, application, score in zip(valid, applications, scores):
+        status = loan_status(score["prediction"])
+        results[index] = {"index": index + offset, **score, "status": status}
+        records.append(prediction_record(application, loan_status=status, confidence=score["confidence"]))
+    for index, row_error in errors.items():
+        results[index] = {"index": index + offset, "status": "Error", "error": row_error}
+
+    return results, records
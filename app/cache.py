@@ -0,0 +1,188 @@
+import abc
+import hashlib
+import json
+import logging
+import threading
+import time
+from collections import OrderedDict
+from typing import Any
+
+import numpy as np
+
+
+class CacheBackend(abc.ABC):
+    """
+    Interface of a cache shared between processes (e.g. several uvicorn workers).
+
+    Values are opaque bytes; `set` stores them for `ttl_s` seconds (0 = no expiry).
+    """
+
+    @abc.abstractmethod
+    async def get(self, key: str) -> bytes | None: ...
+
+    @abc.abstractmethod
+    async def set(self, key: str, value: bytes, ttl_s: float) -> None: ...
+
+
+class InMemoryBackend(CacheBackend):
+    """
+    Process-local stand-in for a shared backend, for tests and single-process setups.
+    """
+
+    def __init__(self):
+        self.entries: dict[str, tuple[float, bytes]] = {}
+
+    async def get(self, key: str) -> bytes | None:
+        entry = self.entries.get(key)
+        if entry is None:
+            return None
+        expires_at, value = entry
+        if expires_at and expires_at <= time.monotonic():
+            del self.entries[key]
+            return None
+        return value
+
+    async def set(self, key: str, value: bytes, ttl_s: float) -> None:
+        self.entries[key] = (time.monotonic() + ttl_s if ttl_s else 0.0, value)
+
+
+class RedisBackend(CacheBackend):
+    """
+    Shared backend on Redis. `redis` is imported here so local-only setups never load it.
+    """
+
+    def __init__(self, url: str):
+        import redis.asyncio as redis
+
+        self.client = redis.from_url(url)
+
+    async def get(self, key: str) -> bytes | None:
+        return await self.client.get(key)
+
+    async def set(self, key: str, value: bytes, ttl_s: float) -> None:
+        await self.client.set(key, value, px=int(ttl_s * 1000) if ttl_s else None)
+
+
+class PredictionCache:
+    """
+    LRU cache of prediction results with a per-entry TTL, keyed on the encoded
+    (model-ready) feature row.
+
+    Keys are a hash of the row bytes namespaced by the fingerprint of the loaded
+    model, scaler, features and config, so a result is only ever reused for the
+    exact resources that produced it. Entries of a replaced bundle are dropped by
+    `clear()`, which the model registry calls once per swap; `key()` itself never
+    clears, so requests still running on the old bundle during a hot reload
+    cannot wipe the entries of the new one (or vice versa).
+
+    Lookups go to the in-process LRU first and then, if configured, to a
+    shared `backend`, whose hits are copied into the LRU. Backend errors are
+    logged and treated as misses so the cache never fails a request.
+    """
+
+    def __init__(
+        self,
+        max_entries: int = 10000,
+        ttl_s: float = 300.0,
+        backend: CacheBackend | None = None,
+        namespace: str = "loan_predictor",
+        logger: logging.Logger | None = None,
+    ):
+        self.max_entries = max(1, max_entries)
+        self.ttl_s = max(0.0, ttl_s)
+        self.backend = backend
+        self.namespace = namespace
+        self.logger = logger or logging.getLogger("loan_predictor")
+
+        self._entries: OrderedDict[str, tuple[float, dict[str, Any]]] = OrderedDict()
+        self._lock = threading.Lock()
+
+        self.hits = 0
+        self.shared_hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+        self.backend_errors = 0
+
+    def key(self, row: np.ndarray, fingerprint: str) -> str:
+        """
+        Builds the cache key of an encoded row for the resources identified by `fingerprint`.
+        """
+        digest = hashlib.blake2b(row.dtype.str.encode(), digest_size=16)
+        digest.update(np.ascontiguousarray(row).tobytes())
+        return f"{self.namespace}:{fingerprint[:16]}:{digest.hexdigest()}"
+
+    async def get(self, key: str) -> dict[str, Any] | None:
+        """
+        Returns the cached result for `key`, or None on a miss.
+        """
+        value = self._get_local(key)
+        if value is not None:
+            self.hits += 1
+            return value
+
+        if self.backend is not None:
+            try:
+                raw = await self.backend.get(key)
+            except Exception as e:
+                self.backend_errors += 1
+                self.logger.warning("Shared cache lookup failed: %s", e)
+                raw = None
+            if raw is not None:
+                value = json.loads(raw)
+                self._set_local(key, value)
+                self.shared_hits += 1
+                return value
+
+        self.misses += 1
+        return None
+
+    async def set(self, key: str, value: dict[str, Any]) -> None:
+        self._set_local(key, value)
+        if self.backend is not None:
+            try:
+                await self.backend.set(key, json.dumps(value).encode(), self.ttl_s)
+            except Exception as e:
+                self.backend_errors += 1
+                self.logger.warning("Shared cache write failed: %s", e)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+    def _get_local(self, key: str) -> dict[str, Any] | None:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            expires_at, value = entry
+            if expires_at and expires_at <= time.monotonic():
+                del self._entries[key]
+                self.expirations += 1
+                return None
+            self._entries.move_to_end(key)
+            return value
+
+    def _set_local(self, key: str, value: dict[str, Any]) -> None:
+        expires_at = time.monotonic() + self.ttl_s if self.ttl_s else 0.0
+        with self._lock:
+            self._entries[key] = (expires_at, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def stats(self) -> dict[str, Any]:
+        lookups = self.hits + self.shared_hits + self.misses
+        return {
+            "size": len(self._entries),
+            "max_entries": self.max_entries,
+            "ttl_s": self.ttl_s,
+            "hits": self.hits,
+            "shared_hits": self.shared_hits,
+            "misses": self.misses,
+            "hit_ratio": (self.hits + self.shared_hits) / lookups if lookups else 0.0,
+            "evictions": self.evictions,
+            "expirations": self.expirations,
+            "backend_errors": self.backend_errors,
+        }
@@ -1,36 +1,36 @@
-import os
+import logging
+from typing import TYPE_CHECKING, AsyncIterator, Iterator
 from dotenv import load_dotenv
-from sqlalchemy import create_engine, text
-from sqlalchemy.orm import sessionmaker, Session
 from database.database_config import DatabaseConfig
 from database import base
-from database.models import User, Loan
+
+# SQLAlchemy and the models are imported where they are used, so that
+# importing the API does not load them (see benchmarks/bench_startup.py)
+if TYPE_CHECKING:
+    from sqlalchemy.orm import Session
+    from sqlalchemy.ext.asyncio import AsyncSession
 
 load_dotenv()
 
-def init_db():
+logger = logging.getLogger("loan_predictor")
+
+def init_db(config: DatabaseConfig | None = None):
+    """
+    Creates the engine and session factory and checks that the database answers.
+
+    Raises:
+        Exception: Whatever the driver raised if the database cannot be reached,
+        so that the start-up stage fails and the API stays unready.
+    """
+    from sqlalchemy import create_engine, text
+    from sqlalchemy.orm import sessionmaker
+
     try:
-        print("Initialize database ....")
-        
-        connection_string = DatabaseConfig(
-            host=os.getenv("DB_HOST", '@localhost'),
-            port=5432,
-            database="loan_postgres",
-            username="bdpit4",
-            password="Bcabca1"
-        ).connection_string
-        
-        # connection_string = DatabaseConfig(
-        #     host=os.getenv("DB_HOST", '@localhost'),
-        #     port=os.getenv("DB_PORT", 5432),
-        #     database=os.getenv("DB_NAME", 'loan_postgres'),
-        #     username=os.getenv("DB_USER", "bdpit4"),
-        #     password=os.getenv("DB_PASSWORD", "Bcabca1")
-        # ).conenction_string
-
-        print(f">>>> connection string: {connection_string}")
-        
-        base.engine = create_engine(connection_string, echo=True)
+        logger.info("Initializing database ...")
+
+        config = config or DatabaseConfig.from_env()
+        base.engine = create_engine(config.connection_string, **config.engine_options)
+        logger.info("Connection string: %s", base.engine.url.render_as_string(hide_password=True))
 
         base.SessionLocal = sessionmaker(
             autocommit=False,
@@ -40,89 +40,307 @@ def init_db():
 
         with base.engine.connect() as connection:
             connection.execute(text("SELECT 1"))
-            print("Database connection successful!")
+            logger.info("Database connection successful.")
 
-        print("Database initialization completed!")
+        logger.info("Database initialization completed.")
         
     except Exception as e:
-        print(f"Database initialization failed: {e}")
+        logger.error("Database initialization failed: %s", e)
+        raise
+
+def init_async_db(config: DatabaseConfig | None = None):
+    """
+    Sets up the optional asyncio engine (asyncpg for Postgres, aiosqlite for SQLite).
+
+    The engine connects lazily. Its pooled connections belong to the event loop
+    that opened them, so use it from a single loop.
+
+    Raises:
+        ValueError: If the database has no async driver configured.
+    """
+    from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+
+    try:
+        config = config or DatabaseConfig.from_env()
+        base.async_engine = create_async_engine(config.async_connection_string, **config.engine_options)
+        base.AsyncSessionLocal = async_sessionmaker(
+            autoflush=False,
+            expire_on_commit=False,
+            bind=base.async_engine
+        )
+        logger.info("Async connection string: %s", base.async_engine.url.render_as_string(hide_password=True))
+
+    except Exception as e:
+        logger.error("Async database initialization failed: %s", e)
+        raise
+
+def get_db() -> Iterator["Session"]:
+    """
+    FastAPI dependency that scopes one session to a request.
+
+    The session only checks out a connection when it is first used, and it is
+    always closed afterwards, which returns that connection to the pool even if
+    the handler raised.
+    """
+    db = base.SessionLocal()
+    try:
+        yield db
+    finally:
+        db.close()
+
+async def get_async_db() -> AsyncIterator["AsyncSession"]:
+    """
+    FastAPI dependency that scopes one AsyncSession to a request.
+    """
+    async with base.AsyncSessionLocal() as db:
+        yield db
+
+def pool_stats(engine=None) -> dict:
+    """
+    Returns the connection pool's current usage (of `base.engine` by default).
+    """
+    engine = engine if engine is not None else base.engine
+    pool = engine.pool if engine is not None else None
+    if pool is None or not hasattr(pool, "checkedout"):
+        return {}
+    return {
+        "size": pool.size(),
+        "checked_out": pool.checkedout(),
+        "checked_in": pool.checkedin(),
+        "overflow": pool.overflow(),
+    }
+    
+def warm_pool(connections: int, engine=None) -> int:
+    """
+    Opens up to `connections` pooled connections (of `base.engine` by default)
+    and returns them to the pool, so the first requests do not pay for the
+    connection handshakes.
+
+    Returns:
+        int: The number of connections opened.
+    """
+    from sqlalchemy import text
+
+    engine = engine if engine is not None else base.engine
+    opened = []
+    try:
+        for _ in range(max(0, connections)):
+            connection = engine.connect()
+            opened.append(connection)
+            connection.execute(text("SELECT 1"))
+    finally:
+        for connection in opened:
+            connection.close()
+    return len(opened)
     
 def create_db():
+    import database.models  # noqa: F401 -- registers the tables on Base.metadata
+
     try:
         if base.engine is None:
             init_db()
 
-        print("Creating database ...")
+        logger.info("Creating database ...")
         base.Base.metadata.create_all(base.engine)
-        print("Successfully created database ...")
+        upgrade_schema()
+        logger.info("Successfully created database.")
     except Exception as e:
-        print(f"Failed to create database: {e}")
+        logger.error("Failed to create database: %s", e)
+
+# Columns added to existing tables after their first release: (table, column, DDL type)
+_ADDED_COLUMNS = [
+    ("loans", "idempotency_key", "VARCHAR(255)"),
+]
+_ADDED_INDEXES = [
+    "CREATE UNIQUE INDEX IF NOT EXISTS ix_loans_idempotency_key ON loans (idempotency_key)",
+]
+
+def missing_columns(engine=None) -> list[str]:
+    """
+    Returns the model tables and columns (as "table" or "table.column") missing from the database.
+    """
+    from sqlalchemy import inspect
+    import database.models  # noqa: F401
+
+    engine = engine if engine is not None else base.engine
+    inspector = inspect(engine)
+    missing = []
+    for table in base.Base.metadata.sorted_tables:
+        if not inspector.has_table(table.name):
+            missing.append(table.name)
+            continue
+        existing = {column["name"] for column in inspector.get_columns(table.name)}
+        missing += [f"{table.name}.{column.name}" for column in table.columns if column.name not in existing]
+    return missing
+
+def upgrade_schema(engine=None) -> list[str]:
+    """
+    Adds the columns and indexes of `_ADDED_COLUMNS` / `_ADDED_INDEXES` to tables
+    created by an earlier release (`create_all` only creates missing tables).
+
+    Returns:
+        list: The "table.column" names that were added.
+    """
+    from sqlalchemy import text
+
+    engine = engine if engine is not None else base.engine
+    missing = set(missing_columns(engine))
+    added = []
+    with engine.begin() as connection:
+        for table, column, ddl_type in _ADDED_COLUMNS:
+            if f"{table}.{column}" in missing:
+                connection.execute(text(f"ALTER TABLE {table} ADD COLUMN {column} {ddl_type}"))
+                added.append(f"{table}.{column}")
+        for statement in _ADDED_INDEXES:
+            connection.execute(text(statement))
+    if added:
+        logger.info("Upgraded database schema, added: %s", ", ".join(added))
+    return added
+
+def check_schema(engine=None) -> None:
+    """
+    Raises:
+        RuntimeError: If a table or column of the models is missing from the database.
+    """
+    missing = missing_columns(engine)
+    if missing:
+        raise RuntimeError(
+            f"Database schema is out of date, missing {', '.join(missing)}; run `python -m app.server migrate`"
+        )
         
 def drop_db():
+    import database.models  # noqa: F401
+
     try:
         base.Base.metadata.drop_all(base.engine)
     except Exception as e:
-         print(f"Failed to drop database: {e}")
-
-
-def save_prediction(
-    db: Session,
-    person_age: float,
-    person_gender: str,
-    person_education: str,
-    person_income: float,
-    person_emp_exp: int,
-    person_home_ownership: str,
-    loan_amnt: float,
-    loan_intent: str,
-    loan_int_rate: float,
-    loan_percent_income: float,
-    cb_person_cred_hist_length: float,
-    credit_score: int,
-    previous_loan_defaults_on_file: str,
-    loan_status: int,
-    confidence: str
-) -> str:
-    err_msg = []
-    
-    if str.lower(person_gender) not in ['female', 'male']:
-        err_msg.append(f"Error: person_age -> {person_age} expected -> male/female")
-    
-    if str.lower(person_education.replace(" ", "")) not in ['highschool', 'associate', 'bachelor', 'master', 'doctorate']:
-        err_msg.append(f"Error: person_education -> {person_age} expected -> High School/Associate/Bachelor/Master/Doctorate")
-        
-    if str.lower(person_home_ownership.replace(" ", "")) not in ['rent', 'own', 'mortgage', 'other']:
-        err_msg.append(f"Error: person_home_ownership -> {person_age} expected -> RENT/OWN/MORTGAGE/OTHER")
-        
-    if str.lower(loan_intent.replace(" ", "")) not in ['personal', 'education', 'medical', 'venture', 'homeimprovement']:
-        err_msg.append(f"Error: person_home_ownership -> {person_age} expected -> PERSONAL/EDUCATION/MEDICAL/VENTURE/HOMEIMPROVEMENT")
-        
-    if len(err_msg) > 0:
-        return "\n".join(err_msg)
-    
-    user = User(
-        age=person_age,
-        gender=person_gender,
-        education=person_education,
-        income=person_income,
-        employ_expereience=person_emp_exp,
-        home_ownership=person_home_ownership,
-        loans = [
-            Loan(
-                amount=loan_amnt,
-                intent=loan_intent,
-                interest_rate=loan_int_rate,
-                percent_income=loan_percent_income,
-                cred_history_yearly=cb_person_cred_hist_length,
-                prev_loan_def=previous_loan_defaults_on_file,
-                credit_score=credit_score,
-                loan_status = loan_status,
-                confidence=confidence
-            )
-        ]
+         logger.error("Failed to drop database: %s", e)
+
+
+def _user_rows(records: list[dict]) -> list[dict]:
+    return [
+        {
+            "age": r["person_age"],
+            "gender": r["person_gender"],
+            "education": r["person_education"],
+            "income": r["person_income"],
+            "employ_expereience": r["person_emp_exp"],
+            "home_ownership": r["person_home_ownership"],
+        }
+        for r in records
+    ]
+
+
+def _loan_rows(user_ids: list[int], records: list[dict]) -> list[dict]:
+    return [
+        {
+            "user_id": user_id,
+            "amount": r["loan_amnt"],
+            "intent": r["loan_intent"],
+            "interest_rate": r["loan_int_rate"],
+            "percent_income": r["loan_percent_income"],
+            "cred_history_yearly": r["cb_person_cred_hist_length"],
+            "prev_loan_def": r["previous_loan_defaults_on_file"],
+            "credit_score": r["credit_score"],
+            "loan_status": r["loan_status"],
+            "confidence": r["confidence"],
+            "idempotency_key": r.get("idempotency_key"),
+        }
+        for user_id, r in zip(user_ids, records)
+    ]
+
+
+def _skip_repeated(records: list[dict]) -> list[dict]:
+    """
+    Drops records whose idempotency key repeats earlier in the batch.
+    """
+    seen = set()
+    fresh = []
+    for r in records:
+        key = r.get("idempotency_key")
+        if key:
+            if key in seen:
+                continue
+            seen.add(key)
+        fresh.append(r)
+    return fresh
+
+
+def _insert_loans(dialect: str):
+    """
+    Builds the loans INSERT for `dialect`. It skips rows whose idempotency key is
+    already stored and returns the `user_id` of each row it inserted.
+
+    Postgres and SQLite both support `ON CONFLICT DO NOTHING`. A concurrent
+    insert of the same key waits for the other transaction and is then skipped,
+    so it does not fail with an IntegrityError.
+    """
+    from database.models import Loan
+
+    if dialect == "postgresql":
+        from sqlalchemy.dialects.postgresql import insert
+    elif dialect == "sqlite":
+        from sqlalchemy.dialects.sqlite import insert
+    else:
+        raise ValueError(f"Unsupported database dialect: {dialect}")
+    return (
+        insert(Loan)
+        .on_conflict_do_nothing(index_elements=[Loan.idempotency_key])
+        .returning(Loan.user_id)
     )
-    
-    db.add(user)
+
+
+def bulk_save_predictions(db: "Session", records: list[dict]) -> int:
+    """
+    Inserts many predictions at once: one multi-row INSERT into users (returning
+    the new ids in input order) and one into loans, in a single transaction.
+
+    Each record is a `prediction_record` of an already-validated LoanApplication.
+    A record whose `idempotency_key` is already stored, even by a concurrent
+    transaction, is skipped by the loans insert, and the user row inserted for
+    it is removed.
+
+    Returns the number of predictions inserted.
+    """
+    from sqlalchemy import delete, insert
+    from database.models import User
+
+    records = _skip_repeated(records)
+    if not records:
+        return 0
+
+    user_ids = db.scalars(
+        insert(User).returning(User.id, sort_by_parameter_order=True), _user_rows(records)
+    ).all()
+    saved = set(db.scalars(_insert_loans(db.get_bind().dialect.name), _loan_rows(user_ids, records)))
+    skipped = [user_id for user_id in user_ids if user_id not in saved]
+    if skipped:
+        db.execute(delete(User).where(User.id.in_(skipped)))
     db.commit()
-    
-    return f"success: to create user {user}"
\ No newline at end of file
+
+    return len(saved)
+
+
+async def bulk_save_predictions_async(db: "AsyncSession", records: list[dict]) -> int:
+    """
+    Awaitable `bulk_save_predictions` for the async backend.
+    """
+    from sqlalchemy import delete, insert
+    from database.models import User
+
+    records = _skip_repeated(records)
+    if not records:
+        return 0
+
+    user_ids = (
+        await db.scalars(
+            insert(User).returning(User.id, sort_by_parameter_order=True), _user_rows(records)
+        )
+    ).all()
+    saved = set(await db.scalars(_insert_loans(db.get_bind().dialect.name), _loan_rows(user_ids, records)))
+    skipped = [user_id for user_id in user_ids if user_id not in saved]
+    if skipped:
+        await db.execute(delete(User).where(User.id.in_(skipped)))
+    await db.commit()
+
+    return len(saved)
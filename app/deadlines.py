@@ -0,0 +1,79 @@
+"""
+Per-request deadlines.
+
+A deadline is an absolute `time.monotonic()` value (or None for no deadline).
+It is computed once per request from the X-Request-Timeout-Ms header, or the
+server default, and handed explicitly to each stage that can queue work: the
+admission queue, the micro-batcher and the inference executor drop work whose
+deadline has passed instead of spending capacity on a response nobody reads.
+CLOCK_MONOTONIC is system-wide on Linux, so process workers can check it too.
+"""
+import asyncio
+import time
+from typing import Any, Awaitable, Callable
+
+from starlette.requests import ClientDisconnect, Request
+
+
+class DeadlineExceeded(Exception):
+    """Raised when a request's deadline passes before a stage could start."""
+
+
+def deadline_after(timeout_ms: float) -> float | None:
+    """
+    Returns the deadline `timeout_ms` from now, or None for a timeout of 0 (no deadline).
+    """
+    return time.monotonic() + timeout_ms / 1000 if timeout_ms > 0 else None
+
+
+def remaining(deadline: float | None) -> float | None:
+    """
+    Returns the seconds left until `deadline` (negative once it passed), or None without a deadline.
+    """
+    return deadline - time.monotonic() if deadline is not None else None
+
+
+def check_deadline(deadline: float | None, stage: str) -> None:
+    """
+    Raises:
+        DeadlineExceeded: If `deadline` has passed; `stage` names the step that was about to start.
+    """
+    if deadline is not None and time.monotonic() >= deadline:
+        raise DeadlineExceeded(f"Deadline exceeded before {stage}")
+
+
+def call_before(deadline: float | None, stage: str, fn: Callable, *args: Any) -> Any:
+    """
+    Calls `fn(*args)` unless `deadline` passed while the call was queued (e.g. in an executor).
+    Module-level so it can be sent to process workers.
+    """
+    check_deadline(deadline, stage)
+    return fn(*args)
+
+
+async def cancel_on_disconnect(request: Request, work: Awaitable[Any]) -> Any:
+    """
+    Awaits `work`, cancelling it if the client disconnects first.
+
+    Only for requests whose body has already been read: the disconnect is
+    detected by waiting on `request.receive()`.
+
+    Raises:
+        ClientDisconnect: If the client went away before `work` finished.
+    """
+    task = asyncio.ensure_future(work)
+
+    async def watch() -> None:
+        while (await request.receive())["type"] != "http.disconnect":
+            pass
+        task.cancel()
+
+    watcher = asyncio.ensure_future(watch())
+    try:
+        return await task
+    except asyncio.CancelledError:
+        if watcher.done() and not watcher.cancelled():
+            raise ClientDisconnect() from None
+        raise
+    finally:
+        watcher.cancel()
@@ -0,0 +1,181 @@
+import numpy as np
+
+
+NUMERIC_FIELDS: tuple[str, ...] = (
+    "person_age",
+    "person_income",
+    "person_emp_exp",
+    "loan_amnt",
+    "loan_int_rate",
+    "loan_percent_income",
+    "cb_person_cred_hist_length",
+    "credit_score",
+)
+
+
+class FeatureEncoder:
+    """
+    Compiled encoder that writes a validated LoanApplication straight into a
+    NumPy row laid out in `features` order.
+
+    It is built once from config.yaml and feature_names.pkl and reproduces
+    `services.preprocess_input` column for column:
+    - numeric fields are copied as-is
+    - gender, previous defaults and education go through their config maps;
+      a value missing from its map becomes NaN, as with `Series.map`
+    - home ownership and loan intent are one-hot encoded for every option
+      except the first one (the dropped baseline)
+    - feature columns that the steps above never produce stay at 0, the same
+      as `DataFrame.reindex(fill_value=0)`
+
+    When `center` and `scale` are given, the per-feature affine scaling
+    `(x - center) / scale` is folded in: numeric columns are scaled as they
+    are written, and the categorical and one-hot lookup tables (and the
+    zero template) hold already-scaled values, so the row comes out ready
+    for the model.
+    """
+
+    def __init__(
+        self,
+        features: list[str],
+        gender_map: dict[str, int],
+        default_map: dict[str, int],
+        education_order: dict[str, int],
+        home_ownership_options: list[str],
+        loan_intent_options: list[str],
+        dtype=np.float64,
+        center: np.ndarray | None = None,
+        scale: np.ndarray | None = None,
+    ):
+        self.features = list(features)
+        self.dtype = np.dtype(dtype)
+        self.scaled = center is not None and scale is not None
+        width = len(self.features)
+        index = {name: i for i, name in enumerate(self.features)}
+
+        self.center = np.ascontiguousarray(center if self.scaled else np.zeros(width), dtype=np.float64)
+        self.scale = np.ascontiguousarray(scale if self.scaled else np.ones(width), dtype=np.float64)
+        if self.center.shape != (width,) or self.scale.shape != (width,):
+            raise ValueError(
+                f"Scaling parameters have shape {self.center.shape}/{self.scale.shape}, expected ({width},)"
+            )
+
+        def scaled(col: int, value: float) -> float:
+            return (value - self.center[col]) / self.scale[col]
+
+        # (field, column, center, scale) for fields copied straight from the application
+        self.numeric = [
+            (name, index[name], float(self.center[index[name]]), float(self.scale[index[name]]))
+            for name in NUMERIC_FIELDS
+            if name in index
+        ]
+
+        # (field, column, {value: scaled code}) for the label / ordinal encodings
+        self.ordinal = [
+            (name, index[name], {key: scaled(index[name], code) for key, code in mapping.items()})
+            for name, mapping in (
+                ("person_gender", gender_map),
+                ("previous_loan_defaults_on_file", default_map),
+                ("person_education", education_order),
+            )
+            if name in index
+        ]
+
+        # (field, {value: (column, scaled 1)}) for the one-hot encodings
+        self.one_hot = []
+        for name, options in (
+            ("person_home_ownership", home_ownership_options),
+            ("loan_intent", loan_intent_options),
+        ):
+            columns = {}
+            for option in options[1:]:
+                col = index.get(f"{name}_{option}")
+                if col is not None:
+                    columns[option] = (col, scaled(col, 1.0))
+            self.one_hot.append((name, columns))
+
+        # Every column starts at its (scaled) zero
+        self.template = np.ascontiguousarray(-self.center / self.scale, dtype=self.dtype)
+
+    @property
+    def width(self) -> int:
+        return len(self.features)
+
+    def encode_into(self, application, out: np.ndarray) -> np.ndarray:
+        """
+        Writes one application into `out`, a preallocated row of length `width`.
+        """
+        out[:] = self.template
+        for name, col, center, scale in self.numeric:
+            out[col] = (getattr(application, name) - center) / scale
+        for name, col, mapping in self.ordinal:
+            out[col] = mapping.get(getattr(application, name), np.nan)
+        for name, columns in self.one_hot:
+            hit = columns.get(getattr(application, name))
+            if hit is not None:
+                out[hit[0]] = hit[1]
+        return out
+
+    def encode(self, application) -> np.ndarray:
+        """
+        Encodes one application into a new (1, width) matrix.
+        """
+        out = np.empty((1, self.width), dtype=self.dtype)
+        self.encode_into(application, out[0])
+        return out
+
+    def encode_batch(self, applications) -> np.ndarray:
+        """
+        Encodes a sequence of applications into one preallocated (n, width) matrix.
+        """
+        out = np.empty((len(applications), self.width), dtype=self.dtype)
+        for i, application in enumerate(applications):
+            self.encode_into(application, out[i])
+        return out
+
+    def encode_columns(self, columns) -> np.ndarray:
+        """
+        Encodes already-validated applications held column-wise (a DataFrame or
+        a dict of equal-length arrays) into one (n, width) matrix, one vectorised
+        step per field instead of one Python call per row.
+        """
+        n = len(columns[self.numeric[0][0]]) if self.numeric else len(next(iter(columns.values())))
+        out = np.empty((n, self.width), dtype=self.dtype)
+        out[:] = self.template
+        for name, col, center, scale in self.numeric:
+            out[:, col] = (np.asarray(columns[name], dtype=np.float64) - center) / scale
+        for name, col, mapping in self.ordinal:
+            values = np.asarray(columns[name], dtype=object)
+            out[:, col] = np.nan
+            for key, code in mapping.items():
+                out[values == key, col] = code
+        for name, options in self.one_hot:
+            values = np.asarray(columns[name], dtype=object)
+            for option, (col, value) in options.items():
+                out[values == option, col] = value
+        return out
+
+
+def extract_affine(scaler, width: int) -> tuple[np.ndarray, np.ndarray]:
+    """
+    Pulls the per-feature (center, scale) out of a fitted sklearn scaler so that
+    `scaler.transform(X) == (X - center) / scale`.
+
+    Supports StandardScaler (`mean_`) and RobustScaler (`center_`); a disabled
+    centering or scaling step becomes 0 / 1.
+
+    Raises:
+        TypeError: If the scaler is not one of the supported affine scalers.
+    """
+    if hasattr(scaler, "with_mean"):
+        center = scaler.mean_ if scaler.with_mean else None
+        scale = scaler.scale_ if scaler.with_std else None
+    elif hasattr(scaler, "with_centering"):
+        center = scaler.center_ if scaler.with_centering else None
+        scale = scaler.scale_ if scaler.with_scaling else None
+    else:
+        raise TypeError(f"Cannot fold {type(scaler).__name__} into an affine transform")
+
+    center = np.zeros(width) if center is None else np.asarray(center, dtype=np.float64)
+    scale = np.ones(width) if scale is None else np.asarray(scale, dtype=np.float64)
+    return np.ascontiguousarray(center), np.ascontiguousarray(scale)
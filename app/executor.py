@@ -0,0 +1,142 @@
+import asyncio
+import logging
+import multiprocessing
+import os
+import threading
+from concurrent.futures import Executor, Future, ProcessPoolExecutor, ThreadPoolExecutor
+from typing import Any, Callable
+
+from .deadlines import call_before, check_deadline
+
+
+class ExecutorSaturated(Exception):
+    """Raised by `InferenceExecutor.run` when `max_pending` jobs are already queued or running."""
+
+
+class InferenceExecutor:
+    """
+    Runs CPU-bound inference off the event loop in a bounded pool.
+
+    - "thread": a ThreadPoolExecutor; XGBoost releases the GIL while predicting,
+      so threads overlap well and share the already-loaded model.
+    - "process": a ProcessPoolExecutor whose workers run `initializer` once
+      (e.g. `services.init_worker` to load the model) before taking jobs.
+      Submitted functions and their arguments must be picklable.
+
+    At most `max_pending` jobs may be queued or running at once; beyond that
+    `run` raises ExecutorSaturated immediately instead of letting the backlog
+    (and latency) grow, so callers can shed load with a 503.
+
+    `run` is meant to be called from the event loop thread. `pending` counts
+    jobs until they finish in the pool, even if their caller stopped waiting.
+    """
+
+    def __init__(
+        self,
+        kind: str = "thread",
+        max_workers: int | None = None,
+        max_pending: int | None = None,
+        initializer: Callable | None = None,
+        initargs: tuple = (),
+        mp_start_method: str = "spawn",
+        logger: logging.Logger | None = None,
+    ):
+        if kind not in ("thread", "process"):
+            raise ValueError(f"Unknown executor kind: {kind!r}, expected 'thread' or 'process'")
+
+        self.kind = kind
+        self.max_workers = max_workers or os.cpu_count() or 1
+        self.max_pending = max_pending or self.max_workers * 4
+        self.initializer = initializer
+        self.initargs = initargs
+        self.mp_start_method = mp_start_method
+        self.logger = logger or logging.getLogger("loan_predictor")
+
+        self.pending = 0
+        self.completed = 0
+        self.rejected = 0
+        self._lock = threading.Lock()
+        self._pool: Executor | None = None
+
+    def _get_pool(self) -> Executor:
+        if self._pool is None:
+            if self.kind == "thread":
+                self._pool = ThreadPoolExecutor(
+                    max_workers=self.max_workers,
+                    thread_name_prefix="inference",
+                    initializer=self.initializer,
+                    initargs=self.initargs,
+                )
+            else:
+                self._pool = ProcessPoolExecutor(
+                    max_workers=self.max_workers,
+                    mp_context=multiprocessing.get_context(self.mp_start_method),
+                    initializer=self.initializer,
+                    initargs=self.initargs,
+                )
+            self.logger.info("Started %s inference pool with %d workers.", self.kind, self.max_workers)
+        return self._pool
+
+    async def run(self, fn: Callable, *args: Any, deadline: float | None = None) -> Any:
+        """
+        Runs `fn(*args)` in the pool and waits for the result.
+
+        With a `deadline` (a `time.monotonic()` value), a job that is still
+        queued when it passes is dropped without running.
+
+        Raises:
+            ExecutorSaturated: If `max_pending` jobs are already queued or running.
+            DeadlineExceeded: If `deadline` passed before the job started.
+        """
+        if deadline is not None:
+            check_deadline(deadline, "inference")
+            fn, args = call_before, (deadline, "inference", fn, *args)
+        with self._lock:
+            if self.pending >= self.max_pending:
+                self.rejected += 1
+                raise ExecutorSaturated(f"Inference executor is saturated ({self.pending} pending)")
+            self.pending += 1
+
+        try:
+            future = self._get_pool().submit(fn, *args)
+        except BaseException:
+            with self._lock:
+                self.pending -= 1
+            raise
+        # Counted when the job itself ends: a caller that stops waiting (deadline,
+        # disconnect) leaves a started job running, and it still occupies the pool
+        future.add_done_callback(self._job_done)
+        return await asyncio.wrap_future(future)
+
+    def _job_done(self, future: Future) -> None:
+        # Runs on a pool thread (or the caller's, for a cancelled job)
+        with self._lock:
+            self.pending -= 1
+            if not future.cancelled():
+                self.completed += 1
+
+    def stats(self) -> dict[str, Any]:
+        return {
+            "kind": self.kind,
+            "workers": self.max_workers,
+            "pending": self.pending,
+            "max_pending": self.max_pending,
+            "completed": self.completed,
+            "rejected": self.rejected,
+        }
+
+    def recycle(self) -> None:
+        """
+        Replaces the pool with a fresh one on next use. Jobs already submitted
+        finish on the old workers; process workers of the new pool run
+        `initializer` again (e.g. to load a reloaded model).
+        """
+        pool, self._pool = self._pool, None
+        if pool is not None:
+            pool.shutdown(wait=False)
+            self.logger.info("Recycled %s inference pool.", self.kind)
+
+    def shutdown(self, wait: bool = True) -> None:
+        if self._pool is not None:
+            self._pool.shutdown(wait=wait, cancel_futures=not wait)
+            self._pool = None
@@ -0,0 +1,123 @@
+import asyncio
+import logging
+import time
+from collections import OrderedDict
+from typing import Any
+
+
+class IdempotencyConflict(Exception):
+    """Raised by `IdempotencyStore.begin` when a key is reused with a different request."""
+
+
+class _Entry:
+    __slots__ = ("fingerprint", "future", "expires_at")
+
+    def __init__(self, fingerprint: str, future: asyncio.Future):
+        self.fingerprint = fingerprint
+        self.future = future
+        self.expires_at = 0.0
+
+
+class IdempotencyStore:
+    """
+    Bounded in-process store of responses by Idempotency-Key.
+
+    `begin` claims a key for a request. The owner then calls `complete` with
+    its response, or `abandon` if it failed so a retry can run again. A retry
+    that arrives while the first request is still running waits for it instead
+    of scoring a second time; one that arrives after `complete` gets the stored
+    response. Completed keys are kept for `ttl_s` seconds and at most
+    `max_entries` keys are held, least recently used first out.
+
+    Each key is tied to a fingerprint of its request body; reusing a key for
+    another body raises IdempotencyConflict.
+
+    Meant to be used from the event loop thread. The store is per process:
+    with several workers (app.server) a retry that lands on another worker is
+    scored again and gets a fresh response. The unique `loans.idempotency_key`
+    column still keeps the prediction from being stored twice.
+    """
+
+    def __init__(self, max_entries: int = 100000, ttl_s: float = 86400.0, logger: logging.Logger | None = None):
+        self.max_entries = max(1, max_entries)
+        self.ttl_s = max(0.0, ttl_s)
+        self.logger = logger or logging.getLogger("loan_predictor")
+        self._entries: OrderedDict[str, _Entry] = OrderedDict()
+
+        self.claims = 0
+        self.replays = 0
+        self.conflicts = 0
+        self.evictions = 0
+
+    async def begin(self, key: str, fingerprint: str) -> dict[str, Any] | None:
+        """
+        Claims `key`, or returns the response already stored for it.
+
+        Returns:
+            dict | None: The stored response for a replay, None if the caller now owns the key.
+
+        Raises:
+            IdempotencyConflict: If `key` was used for a request with another fingerprint.
+        """
+        while True:
+            entry = self._entries.get(key)
+            if entry is not None and entry.expires_at and entry.expires_at <= time.monotonic():
+                del self._entries[key]
+                entry = None
+
+            if entry is None:
+                self._claim(key, fingerprint)
+                return None
+
+            if entry.fingerprint != fingerprint:
+                self.conflicts += 1
+                raise IdempotencyConflict(f"Idempotency-Key {key!r} was already used for a different request")
+
+            self._entries.move_to_end(key)
+            # An in-flight first attempt either completes (its response is
+            # replayed) or is abandoned (None, and this request claims the key)
+            response = await asyncio.shield(entry.future)
+            if response is not None:
+                self.replays += 1
+                return response
+
+    def complete(self, key: str, response: dict[str, Any]) -> None:
+        """
+        Stores the response of the request that claimed `key`.
+        """
+        entry = self._entries.get(key)
+        if entry is None or entry.future.done():
+            return
+        entry.expires_at = time.monotonic() + self.ttl_s if self.ttl_s else 0.0
+        entry.future.set_result(response)
+
+    def abandon(self, key: str) -> None:
+        """
+        Releases `key` after a failed attempt; does nothing once it was completed.
+        """
+        entry = self._entries.get(key)
+        if entry is None or entry.future.done():
+            return
+        del self._entries[key]
+        entry.future.set_result(None)
+
+    def _claim(self, key: str, fingerprint: str) -> None:
+        self._entries[key] = _Entry(fingerprint, asyncio.get_running_loop().create_future())
+        self.claims += 1
+        while len(self._entries) > self.max_entries:
+            _, evicted = self._entries.popitem(last=False)
+            if not evicted.future.done():
+                # Waiters on an evicted in-flight key run their own attempt
+                evicted.future.set_result(None)
+            self.evictions += 1
+
+    def stats(self) -> dict[str, Any]:
+        return {
+            "size": len(self._entries),
+            "max_entries": self.max_entries,
+            "ttl_s": self.ttl_s,
+            "claims": self.claims,
+            "replays": self.replays,
+            "conflicts": self.conflicts,
+            "evictions": self.evictions,
+        }
@@ -0,0 +1,50 @@
+import numpy as np
+
+
+class BoosterPredictor:
+    """
+    Predicts class probabilities straight from the raw xgboost Booster behind an
+    XGBClassifier, using `inplace_predict` on NumPy arrays.
+
+    The sklearn wrapper's `predict_proba` validates its input and builds a DMatrix
+    on every call; this skips both. Two copies of the booster are kept:
+    - a small-batch booster pinned to `row_nthread` threads (1 by default), since
+      spinning up an OpenMP team costs more than scoring a handful of rows
+    - a batch booster using `nthread` threads (0 = all cores) for larger inputs
+    """
+
+    def __init__(self, model, nthread: int = 0, row_nthread: int = 1, small_batch_max: int = 16):
+        self.source = model
+        self.small_batch_max = small_batch_max
+
+        booster = model.get_booster()
+        self.batch_booster = booster.copy()
+        self.batch_booster.set_param({"nthread": nthread})
+        self.row_booster = booster.copy()
+        self.row_booster.set_param({"nthread": row_nthread})
+
+        # Mirror XGBClassifier.predict_proba: stop at the best iteration when early
+        # stopping was used, and treat the model's `missing` value as missing.
+        try:
+            self.iteration_range = (0, model.best_iteration + 1)
+        except AttributeError:
+            self.iteration_range = (0, 0)
+        missing = getattr(model, "missing", np.nan)
+        self.missing = np.nan if missing is None else missing
+
+    def predict_proba(self, X: np.ndarray) -> np.ndarray:
+        """
+        Returns an (n_rows, n_classes) probability matrix, like `XGBClassifier.predict_proba`.
+        """
+        booster = self.row_booster if X.shape[0] <= self.small_batch_max else self.batch_booster
+        raw = booster.inplace_predict(
+            X,
+            iteration_range=self.iteration_range,
+            missing=self.missing,
+            validate_features=False,
+        )
+
+        if raw.ndim == 1:
+            # binary:logistic returns P(class 1) only
+            return np.column_stack((1.0 - raw, raw))
+        return raw
@@ -0,0 +1,168 @@
+"""
+Logging for the API.
+
+With LOG_QUEUE=true (the default) the request path only puts the record on an
+in-memory queue; a QueueListener thread formats it and writes it out, so the
+request never waits on stdout or a slow log collector. Messages use %-style
+arguments, which are only interpolated when a record is actually emitted, on
+the listener thread: a disabled or sampled-out call costs one level check.
+
+Settings (see .env):
+    LOG_LEVEL        DEBUG, INFO, ... (INFO)
+    LOG_FORMAT       "text" or "json", one JSON object per line (text)
+    LOG_QUEUE        hand records to a background listener (true)
+    LOG_SAMPLE_<LEVEL>  fraction of records of that level to keep, e.g.
+                     LOG_SAMPLE_INFO=0.1 keeps every tenth INFO record (1.0)
+"""
+import itertools
+import json
+import logging
+import logging.handlers
+import os
+import queue
+import sys
+import time
+from contextvars import ContextVar
+from typing import Any
+
+# ——— Context var to hold the request ID for the current execution context ———
+request_id_ctx: ContextVar[str] = ContextVar("request_id", default="N/A")
+
+TEXT_FORMAT = "%(asctime)s - %(levelname)s - %(name)s - [%(request_id)s] - %(message)s"
+
+# Attributes every LogRecord has; anything else was passed with `extra=`
+_RECORD_FIELDS = frozenset(vars(logging.LogRecord("", 0, "", 0, "", (), None))) | {"message", "asctime", "request_id"}
+
+
+class RequestIDFilter(logging.Filter):
+    """
+    Stamps each record with the current request ID. Must run on the thread
+    that logged the record, where the request's context is visible.
+    """
+
+    def filter(self, record):
+        if not hasattr(record, "request_id"):
+            record.request_id = request_id_ctx.get()
+        return True
+
+
+class SamplingFilter(logging.Filter):
+    """
+    Keeps one in every round(1 / rate) records of each sampled level.
+
+    Uses a per-level counter rather than a random draw, so the kept share is
+    exact, and takes no lock: `next()` on an itertools.count is atomic under
+    the GIL. Levels without a rate are always kept.
+    """
+
+    def __init__(self, rates: dict[int, float]):
+        super().__init__()
+        self.strides = {level: max(1, round(1 / rate)) if rate > 0 else 0 for level, rate in rates.items() if rate < 1}
+        self.counters = {level: itertools.count() for level in self.strides}
+        self.dropped = 0
+
+    def filter(self, record):
+        stride = self.strides.get(record.levelno)
+        if stride is None:
+            return True
+        if stride and next(self.counters[record.levelno]) % stride == 0:
+            return True
+        self.dropped += 1
+        return False
+
+
+class JsonFormatter(logging.Formatter):
+    """
+    Formats a record as one JSON object per line, including the request ID and any `extra=` fields.
+    """
+
+    def format(self, record):
+        entry: dict[str, Any] = {
+            "ts": time.strftime("%Y-%m-%dT%H:%M:%S", time.gmtime(record.created)) + f".{int(record.msecs):03d}Z",
+            "level": record.levelname,
+            "logger": record.name,
+            "request_id": getattr(record, "request_id", None),
+            "message": record.getMessage(),
+        }
+        for key, value in record.__dict__.items():
+            if key not in _RECORD_FIELDS:
+                entry[key] = value
+        if record.exc_info:
+            entry["exc_info"] = self.formatException(record.exc_info)
+        return json.dumps(entry, default=str)
+
+
+# Arguments that cannot change after the call, so interpolating them later on the listener thread is safe
+_IMMUTABLE_ARGS = (str, int, float, bool, type(None), bytes)
+
+
+class DeferredQueueHandler(logging.handlers.QueueHandler):
+    """
+    QueueHandler that leaves formatting to the listener thread.
+
+    The stock `prepare` formats every message on the calling thread so records
+    can be pickled to another process; the listener here is a thread of the
+    same process. Only messages with mutable arguments (a DataFrame, a model,
+    a dict) are interpolated up front, so they show the state at the call.
+    """
+
+    def prepare(self, record):
+        args = record.args
+        if args and not (isinstance(args, tuple) and all(isinstance(arg, _IMMUTABLE_ARGS) for arg in args)):
+            record.msg = record.getMessage()
+            record.args = None
+        return record
+
+
+class LogListener(logging.handlers.QueueListener):
+    """
+    QueueListener whose `stop` may be called more than once (lifespan shutdown, then atexit).
+    """
+
+    def stop(self):
+        if self._thread is not None:
+            super().stop()
+
+
+def sampling_rates_from_env() -> dict[int, float]:
+    rates = {}
+    for name in ("DEBUG", "INFO", "WARNING"):
+        value = os.getenv(f"LOG_SAMPLE_{name}")
+        if value:
+            rates[logging.getLevelName(name)] = float(value)
+    return rates
+
+
+def configure_logging(
+    logger: logging.Logger,
+    level: str = "INFO",
+    fmt: str = "text",
+    use_queue: bool = True,
+    sampling: dict[int, float] | None = None,
+    stream=None,
+) -> LogListener | None:
+    """
+    Attaches the API's handler to `logger`.
+
+    Returns:
+        LogListener | None: The started listener when `use_queue` is set; stop it on shutdown to flush.
+    """
+    output = logging.StreamHandler(stream or sys.stderr)
+    output.setFormatter(JsonFormatter() if fmt == "json" else logging.Formatter(TEXT_FORMAT))
+
+    listener = None
+    if use_queue:
+        handler: logging.Handler = DeferredQueueHandler(queue.SimpleQueue())
+        listener = LogListener(handler.queue, output, respect_handler_level=True)
+        listener.start()
+    else:
+        handler = output
+
+    # Sample first, so dropped records are not stamped either
+    if sampling:
+        handler.addFilter(SamplingFilter(sampling))
+    handler.addFilter(RequestIDFilter())
+
+    logger.setLevel(level)
+    logger.addHandler(handler)
+    return listener
@@ -1,97 +1,416 @@
 import os
-import uuid
+import math
+import json
+import email.message
+import hmac
+import hashlib
+import time
+import atexit
+import asyncio
 import logging
-from contextvars import ContextVar
+import typing
+from contextlib import asynccontextmanager
 
-from fastapi import FastAPI, Request, HTTPException, Response
-from fastapi.responses import JSONResponse
+from fastapi import FastAPI, Request, HTTPException, Depends
+from starlette.concurrency import run_in_threadpool
+from starlette.background import BackgroundTask
+from starlette.requests import ClientDisconnect
+from fastapi.exceptions import RequestValidationError
+from fastapi.exception_handlers import request_validation_exception_handler
+from fastapi.responses import JSONResponse, ORJSONResponse, PlainTextResponse, StreamingResponse
 from dotenv import load_dotenv
 from pydantic import ValidationError
 
 from database import base
-from .services import load_resources, preprocess_input, predict
-from .schemas import LoanApplication, validate_payload
-from .crud import init_db, create_db, save_prediction
+from .services import (
+    load_resources, build_bundle, activate_bundle, current_bundle, current_fingerprint, warm_up,
+    score_matrix, prepare_input, init_worker, loan_status, synthetic_applications,
+)
+from .bulk import ResultSpool, decode_ndjson, decode_lines, iter_ndjson_lines, score_rows
+from .batching import MicroBatcher, BatcherQueueFull
+from .cache import PredictionCache, RedisBackend
+from .registry import ModelBundle, ModelRegistry
+from .idempotency import IdempotencyStore, IdempotencyConflict
+from .executor import InferenceExecutor, ExecutorSaturated
+from .persistence import PredictionWriter, PersistenceQueueFull
+from .schemas import LoanApplication, prediction_record, validate_payload
+from .memory import memory_usage
+from .startup import StartupState
+from .metrics import Registry
+from .logging_config import configure_logging, sampling_rates_from_env
+from .middleware import RequestIDMiddleware
+from .admission import AdmissionController, AdmissionRejected, TokenBucketLimiter
+from .deadlines import DeadlineExceeded, cancel_on_disconnect, check_deadline, deadline_after, remaining
+from .crud import (
+    init_db, create_db, check_schema, init_async_db, bulk_save_predictions, bulk_save_predictions_async,
+    get_db, get_async_db, pool_stats, warm_pool,
+)
 
-# ——— Context var to hold the request ID for the current execution context ———
-request_id_ctx: ContextVar[str] = ContextVar("request_id", default="N/A")
+if typing.TYPE_CHECKING:
+    # Annotations only: SQLAlchemy loads during start-up, not on import (see benchmarks/bench_startup.py)
+    import numpy as np
+    from sqlalchemy.orm import Session
+    from sqlalchemy.ext.asyncio import AsyncSession
 
-# ——— Load env & resources ———
+# ——— Load env ———
 load_dotenv()
 
-# ——— Logging setup with filter that draws from our ContextVar ———
-class RequestIDFilter(logging.Filter):
-    def filter(self, record):
-        record.request_id = request_id_ctx.get()
-        return True
-
-formatter = logging.Formatter(
-    "%(asctime)s - %(levelname)s - %(name)s - [%(request_id)s] - %(message)s"
+# ——— Logging: queued to a background listener, request ID from a ContextVar (see logging_config) ———
+logger = logging.getLogger("loan_predictor")
+log_listener = configure_logging(
+    logger,
+    level=os.getenv("LOG_LEVEL", "INFO").upper(),
+    fmt=os.getenv("LOG_FORMAT", "text"),
+    use_queue=os.getenv("LOG_QUEUE", "true").lower() in ("1", "true", "yes"),
+    sampling=sampling_rates_from_env(),
 )
-handler = logging.StreamHandler()
-handler.setFormatter(formatter)
-handler.addFilter(RequestIDFilter())
+if log_listener is not None:
+    atexit.register(log_listener.stop)
 
-logger = logging.getLogger("loan_predictor")
-logger.setLevel(logging.INFO)
-logger.addHandler(handler)
+# "sync" (psycopg2) or "async" (asyncpg / AsyncSession) for prediction writes;
+# schema creation always uses the sync engine.
+DB_BACKEND = os.getenv("DB_BACKEND", "sync")
+
+# ——— Start-up: the heavy work runs in the background from the lifespan, so the
+#     process answers /livez at once and /readyz once it can serve predictions ———
+startup = StartupState(logger)
+
+# Warm-up before readiness: synthetic predictions through the whole /predict
+# path and a full connection pool, so real traffic does not pay the cold costs
+WARMUP_PREDICTIONS = int(os.getenv("WARMUP_PREDICTIONS", 32))
+WARMUP_DB_CONNECTIONS = int(os.getenv("WARMUP_DB_CONNECTIONS", os.getenv("DB_POOL_SIZE", 5)))
+
+def start_up() -> None:
+    # The pre-fork server (app.server) has already loaded the model in the
+    # master; its workers share that copy.
+    if current_bundle() is None:
+        startup.stage("model", load_resources, logger)
+    startup.stage("database", init_db)
+    # DB_CREATE_SCHEMA=false leaves the schema to `python -m app.server migrate`
+    if os.getenv("DB_CREATE_SCHEMA", "true").lower() in ("1", "true", "yes"):
+        startup.stage("schema", create_db)
+    # Stay unready on a database that `migrate` has not brought up to date
+    startup.stage("schema_check", check_schema)
+    if DB_BACKEND == "async":
+        startup.stage("async_database", init_async_db)
+    if WARMUP_DB_CONNECTIONS > 0:
+        # The async engine's connections belong to the writer's loop; they open on its first flush
+        startup.stage("db_pool", warm_pool, WARMUP_DB_CONNECTIONS)
+    if PERSIST_MODE == "write_behind":
+        prediction_writer.start()
+
+async def warm_up_predictions(n: int) -> None:
+    """
+    Scores `n` synthetic applications like /predict does (validation, encoding,
+    micro-batcher, executor), first one alone and then all at once. Nothing is
+    cached or persisted.
+
+    Raises:
+        RuntimeError: If the model returns an invalid score.
+    """
+    bundle = current_bundle()
+    applications = synthetic_applications(n)
+    rows = []
+    for application in applications:
+        validate_payload(application, logger)
+        rows.append(prepare_input(application, logger, bundle))
+
+    results = [await batcher.submit((bundle, rows[0], None))]
+    results += await asyncio.gather(*(batcher.submit((bundle, row, None)) for row in rows[1:]))
+    if not all(0.0 <= float(result.get("confidence", 0.0)) <= 1.0 for result in results):
+        raise RuntimeError(f"Warm-up produced invalid scores: {results[:3]}")
+
+# A failed start-up (e.g. the database is not up yet) is retried with exponential
+# back-off; after STARTUP_ATTEMPTS failures /livez fails too, so the process is restarted
+STARTUP_ATTEMPTS = int(os.getenv("STARTUP_ATTEMPTS", 6))
+STARTUP_RETRY_BACKOFF_S = float(os.getenv("STARTUP_RETRY_BACKOFF_S", 1))
+STARTUP_RETRY_BACKOFF_MAX_S = float(os.getenv("STARTUP_RETRY_BACKOFF_MAX_S", 30))
+
+async def start() -> None:
+    for attempt in range(1, STARTUP_ATTEMPTS + 1):
+        try:
+            await run_in_threadpool(start_up)
+            if WARMUP_PREDICTIONS > 0:
+                await startup.stage_async("warm_up", warm_up_predictions, WARMUP_PREDICTIONS)
+            model_registry.start()
+            startup.mark_ready()
+            return
+        except Exception:
+            if attempt >= STARTUP_ATTEMPTS:
+                logger.exception("Start-up failed %d times, giving up; /livez now fails.", attempt)
+                startup.mark_failed()
+                return
+            delay = min(STARTUP_RETRY_BACKOFF_MAX_S, STARTUP_RETRY_BACKOFF_S * 2 ** (attempt - 1))
+            logger.exception("Start-up attempt %d of %d failed, retrying in %.1fs.", attempt, STARTUP_ATTEMPTS, delay)
+            await asyncio.sleep(delay)
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    starting = asyncio.ensure_future(start())
+    yield
+    # Do not sit out a start-up back-off on shutdown
+    starting.cancel()
+    await asyncio.gather(starting, return_exceptions=True)
+    model_registry.stop()
+    inference_executor.shutdown(wait=True)
+    prediction_writer.close(timeout=float(os.getenv("PERSIST_DRAIN_TIMEOUT_S", 30)))
+    if log_listener is not None:
+        log_listener.stop()
+
+def require_ready() -> None:
+    if not startup.ready:
+        raise HTTPException(
+            status_code=503,
+            detail={"error": "Service is starting, please retry", "status": "Error"},
+            headers={"Retry-After": "1"},
+        )
 
 # ——— FastAPI app ———
-app = FastAPI()
+app = FastAPI(lifespan=lifespan)
+
+# ——— Metrics: per-stage latency histograms and outcome counters, scraped from GET /metrics ———
+# Recording touches only the calling thread's shard (see app.metrics); queue depths
+# and pool stats are read from the components' stats() at scrape time.
+metrics = Registry()
+predict_stage_seconds = metrics.histogram(
+    "loan_predict_stage_seconds",
+    "Time spent in each /predict stage. validate is the body parse on /predict/fast (FastAPI validates "
+    "/predict bodies before the route runs); preprocess covers encoding and scaling (folded into one step); "
+    "predict is the wait for a score, including batching and the cache; predict_proba is one model call per batch.",
+    ["stage"],
+)
+STAGE_VALIDATE, STAGE_PREPROCESS, STAGE_PREDICT, STAGE_PREDICT_PROBA, STAGE_SAVE, STAGE_TOTAL = (
+    predict_stage_seconds.labels(stage)
+    for stage in ("validate", "preprocess", "predict", "predict_proba", "save", "total")
+)
+predictions_total = metrics.counter("loan_predictions_total", "Predictions returned by /predict, by loan status.", ["status"])
+predict_errors_total = metrics.counter("loan_predict_errors_total", "Failed /predict requests, by error class.", ["error"])
+metrics.gauges("loan_batcher", lambda: batcher.stats())
+metrics.gauges("loan_executor", lambda: inference_executor.stats())
+metrics.gauges("loan_persistence", lambda: prediction_writer.stats())
+metrics.gauges("loan_cache", lambda: prediction_cache.stats() if prediction_cache is not None else None)
+metrics.gauges("loan_idempotency", lambda: idempotency_store.stats())
+metrics.gauges("loan_model", lambda: model_registry.stats())
+metrics.gauges("loan_db_pool", lambda: pool_stats(base.async_engine.sync_engine if DB_BACKEND == "async" else None))
+metrics.gauges("loan_process", memory_usage)
+
+# ——— Inference executor: keeps CPU-bound scoring off the event loop ———
+inference_executor = InferenceExecutor(
+    kind=os.getenv("INFERENCE_EXECUTOR", "thread"),
+    max_workers=int(os.getenv("INFERENCE_WORKERS", 0)) or None,
+    max_pending=int(os.getenv("INFERENCE_MAX_PENDING", 0)) or None,
+    initializer=init_worker if os.getenv("INFERENCE_EXECUTOR", "thread") == "process" else None,
+    logger=logger,
+)
+
+# ——— Micro-batcher: concurrent /predict calls share one model call ———
+async def score_batch(items: list[tuple[ModelBundle, "np.ndarray", float | None]]) -> list[dict]:
+    # Rows are (bundle, encoded row, deadline); a batch that straddles a model reload is
+    # scored per bundle so every row meets the model it was encoded for.
+    # Process workers hold their own copy of the model and are recycled on reload.
+    import numpy as np
+
+    groups: dict[int, list[int]] = {}
+    for i, (bundle, _, _) in enumerate(items):
+        groups.setdefault(id(bundle), []).append(i)
+
+    results: list[dict | None] = [None] * len(items)
+    for indices in groups.values():
+        bundle = items[indices[0]][0] if inference_executor.kind == "thread" else None
+        X = np.vstack([items[i][1] for i in indices])
+        # The group is dropped from the executor queue only once every row's deadline has passed
+        deadlines = [items[i][2] for i in indices]
+        deadline = None if None in deadlines else max(deadlines)
+        started = time.perf_counter()
+        scores = await inference_executor.run(score_matrix, X, logger, bundle, deadline=deadline)
+        STAGE_PREDICT_PROBA.observe(time.perf_counter() - started)
+        for i, score in zip(indices, scores):
+            results[i] = score
+    return results
+
+batcher = MicroBatcher(
+    score_batch,
+    max_batch_size=int(os.getenv("BATCH_MAX_SIZE", 64)),
+    max_wait_us=int(os.getenv("BATCH_MAX_WAIT_US", 500)),
+    max_queue_size=int(os.getenv("BATCH_MAX_QUEUE", 1024)),
+    max_in_flight=inference_executor.max_workers,
+    logger=logger,
+)
+
+# ——— Prediction cache: repeated applications skip the model (CACHE_MAX_ENTRIES=0 disables it) ———
+# CACHE_BACKEND=redis shares hits between workers through CACHE_REDIS_URL.
+CACHE_MAX_ENTRIES = int(os.getenv("CACHE_MAX_ENTRIES", 10000))
+prediction_cache = None
+if CACHE_MAX_ENTRIES > 0:
+    cache_backend = None
+    if os.getenv("CACHE_BACKEND", "local") == "redis":
+        cache_backend = RedisBackend(os.getenv("CACHE_REDIS_URL", "redis://localhost:6379/0"))
+    prediction_cache = PredictionCache(
+        max_entries=CACHE_MAX_ENTRIES,
+        ttl_s=float(os.getenv("CACHE_TTL_S", 300)),
+        backend=cache_backend,
+        logger=logger,
+    )
+
+# ——— Model registry: hot-reloads models/ in the background and swaps the bundle atomically ———
+# MODEL_WATCH_INTERVAL_S=0 disables the file watcher; POST /admin/reload still works.
+ADMIN_TOKEN = os.getenv("ADMIN_TOKEN", "")
+
+def on_model_swap(bundle: ModelBundle) -> None:
+    if inference_executor.kind == "process":
+        inference_executor.recycle()
+    if prediction_cache is not None:
+        prediction_cache.clear()
+
+model_registry = ModelRegistry(
+    load=lambda: build_bundle(logger),
+    activate=activate_bundle,
+    current=current_bundle,
+    fingerprint=current_fingerprint,
+    warm_up=lambda bundle: warm_up(bundle, logger, int(os.getenv("MODEL_WARMUP_ROWS", 64))),
+    on_swap=[on_model_swap],
+    poll_interval_s=float(os.getenv("MODEL_WATCH_INTERVAL_S", 5)),
+    logger=logger,
+)
+
+# ——— Idempotency-Key: retries inside the window replay the stored response ———
+IDEMPOTENCY_KEY_MAX_LENGTH = 255
+idempotency_store = IdempotencyStore(
+    max_entries=int(os.getenv("IDEMPOTENCY_MAX_KEYS", 100000)),
+    ttl_s=float(os.getenv("IDEMPOTENCY_TTL_S", 86400)),
+    logger=logger,
+)
+
+# ——— Persistence: "write_behind" bulk-inserts in the background, "inline" commits per request ———
+PERSIST_MODE = os.getenv("PERSIST_MODE", "write_behind")
+
+def persist_batch(records: list[dict]) -> int:
+    with base.SessionLocal() as db:
+        return bulk_save_predictions(db, records)
 
-# Load resources like models, encoders, etc.
-load_resources(logging.getLogger("loan_predictor"))
-init_db()
-create_db()
+async def persist_batch_async(records: list[dict]) -> int:
+    async with base.AsyncSessionLocal() as db:
+        return await bulk_save_predictions_async(db, records)
 
-# ——— Middleware to generate & store a new request ID per incoming request ———
-@app.middleware("http")
-async def add_request_id(request: Request, call_next):
-    # 1) Generate & store request ID
-    rid = str(uuid.uuid4())
-    request.state.request_id = rid
-    request_id_ctx.set(rid)
+async def dispose_async_engine() -> None:
+    # The writer thread's loop owns the async pool's connections
+    await base.async_engine.dispose()
 
-    client = request.client
-    http_ver = request.scope.get("http_version", "1.1")
+async def no_session() -> None:
+    # In write-behind mode the writer opens its own sessions, so requests need none
+    return None
 
+if PERSIST_MODE != "inline":
+    get_session = no_session
+else:
+    get_session = get_async_db if DB_BACKEND == "async" else get_db
+
+prediction_writer = PredictionWriter(
+    persist_batch_async if DB_BACKEND == "async" else persist_batch,
+    max_queue_size=int(os.getenv("PERSIST_MAX_QUEUE", 10000)),
+    batch_size=int(os.getenv("PERSIST_BATCH_SIZE", 500)),
+    flush_interval_ms=int(os.getenv("PERSIST_FLUSH_INTERVAL_MS", 200)),
+    on_close=dispose_async_engine if DB_BACKEND == "async" else None,
+    logger=logger,
+)
+atexit.register(prediction_writer.close)
+
+# ——— Deadlines: X-Request-Timeout-Ms, else REQUEST_TIMEOUT_MS (0 = none); see app.deadlines ———
+REQUEST_TIMEOUT_MS = float(os.getenv("REQUEST_TIMEOUT_MS", 0))
+
+def request_deadline(request: Request) -> float | None:
+    header = request.headers.get("X-Request-Timeout-Ms")
+    if header is None:
+        return deadline_after(REQUEST_TIMEOUT_MS)
     try:
-        # 2) Call the downstream handler
-        response: Response = await call_next(request)
-    except HTTPException as exc:
-        # 3a) If an HTTPException bubbles up, log with its detail
-        logger.error(
-            f'{client.host}:{client.port} - "{request.method} {request.url.path} HTTP/{http_ver}" '
-            f'{exc.status_code} - {exc.detail}',
-            extra={"request_id": rid}
-        )
-        # re-raise so FastAPI still returns the correct error response
-        raise
-
-    # 3b) For non-exception responses, build a base log message
-    base = (
-        f'{client.host}:{client.port} - '
-        f'"{request.method} {request.url.path} HTTP/{http_ver}" '
-        f'{response.status_code}'
+        timeout_ms = float(header)
+    except ValueError:
+        timeout_ms = 0.0
+    if not 0 < timeout_ms < float("inf"):
+        raise HTTPException(
+            status_code=400,
+            detail={"error": "X-Request-Timeout-Ms must be a positive number of milliseconds", "status": "Error"}
+        )
+    return deadline_after(timeout_ms)
+
+# ——— Admission control: bounded concurrency and wait queue, plus a per-client token bucket ———
+# Requests beyond ADMISSION_MAX_CONCURRENCY wait up to ADMISSION_MAX_WAIT_MS in a queue of
+# ADMISSION_MAX_QUEUE and are shed with 503 after that; RATE_LIMIT_RPS=0 disables the rate limit.
+admission = AdmissionController(
+    max_concurrency=int(os.getenv("ADMISSION_MAX_CONCURRENCY", 256)),
+    max_queue=int(os.getenv("ADMISSION_MAX_QUEUE", 512)),
+    max_wait_ms=float(os.getenv("ADMISSION_MAX_WAIT_MS", 1000)),
+)
+RATE_LIMIT_RPS = float(os.getenv("RATE_LIMIT_RPS", 0))
+RATE_LIMIT_KEY_HEADER = os.getenv("RATE_LIMIT_KEY_HEADER", "X-API-Key")
+# Only these keys (comma-separated) get a bucket of their own; any other value
+# could be changed per request to dodge the limit, so it counts as the client address
+RATE_LIMIT_API_KEYS = frozenset(key.strip() for key in os.getenv("RATE_LIMIT_API_KEYS", "").split(",") if key.strip())
+rate_limiter = None
+if RATE_LIMIT_RPS > 0:
+    rate_limiter = TokenBucketLimiter(
+        rate=RATE_LIMIT_RPS,
+        burst=int(os.getenv("RATE_LIMIT_BURST", 0)) or None,
+        max_clients=int(os.getenv("RATE_LIMIT_MAX_CLIENTS", 10000)),
     )
+def rate_limit_client(request: Request) -> str:
+    """
+    Returns the rate-limit bucket of a request: its API key if the key is one
+    of RATE_LIMIT_API_KEYS, else its address.
+    """
+    key = request.headers.get(RATE_LIMIT_KEY_HEADER)
+    if key and any(hmac.compare_digest(key, known) for known in RATE_LIMIT_API_KEYS):
+        return f"key:{key}"
+    return f"addr:{request.client.host if request.client else '-'}"
 
-    if response.status_code >= 400:
-        # Try to grab the body text as “description”
-        try:
-            # Note: this only works if response.body() is available;
-            # streaming responses will need a different approach.
-            body_bytes = await response.body()
-            desc = body_bytes.decode(errors="ignore")
-        except Exception:
-            desc = "<unable to read body>"
+admission_wait_seconds = metrics.histogram("loan_admission_wait_seconds", "Time admitted requests waited for a slot.")
+metrics.gauges("loan_admission", admission.stats)
+metrics.gauges("loan_rate_limit", lambda: rate_limiter.stats() if rate_limiter is not None else None)
 
-        logger.error(f"{base} - {desc}", extra={"request_id": rid})
-    else:
-        logger.info(base, extra={"request_id": rid})
+async def admit_request(request: Request, deadline: float | None) -> None:
+    """
+    Rate-limits the client (see `rate_limit_client`) with 429, then takes an
+    admission slot or sheds the request with 503 (504 if its deadline ran out while
+    it waited). The caller must `admission.release()` the slot.
+    """
+    if rate_limiter is not None:
+        retry_after = rate_limiter.take(rate_limit_client(request))
+        if retry_after:
+            raise HTTPException(
+                status_code=429,
+                detail={"error": "Rate limit exceeded, please retry later", "status": "Error"},
+                headers={"Retry-After": str(math.ceil(retry_after))},
+            )
+    started = time.perf_counter()
+    try:
+        await admission.acquire(remaining(deadline))
+    except AdmissionRejected as e:
+        logger.warning("Shedding request: %s", e)
+        if deadline is not None and remaining(deadline) <= 0:
+            raise HTTPException(
+                status_code=504,
+                detail={"error": "Deadline exceeded before admission", "status": "Error"},
+            )
+        raise HTTPException(
+            status_code=503,
+            detail={"error": "Server is busy, please retry", "status": "Error"},
+            headers={"Retry-After": "1"},
+        )
+    admission_wait_seconds.observe(time.perf_counter() - started)
+
+async def admit(request: Request, deadline: float | None = Depends(request_deadline)):
+    """
+    Dependency for the scoring routes: holds an admission slot (see `admit_request`)
+    until the route returns. /predict/stream admits itself, for the whole stream.
+    """
+    await admit_request(request, deadline)
+    try:
+        yield
+    finally:
+        admission.release()
 
-    # 4) Attach the header & return
-    response.headers["X-Request-ID"] = rid
-    return response
+# ——— Middleware: request ID (incoming X-Request-ID or a generated one) and access log, see app.middleware ———
+app.add_middleware(RequestIDMiddleware, logger=logger)
 
 
 # ——— Health check ———
@@ -100,81 +419,514 @@ def health_check():
     logger.info("Health check endpoint hit")
     return {"message": "Welcome to the Loan Approval Prediction API", "status": "Running"}
 
-@app.post("/predict")
-async def predict_endpoint(input_data: LoanApplication, request: Request) -> JSONResponse:
+@app.get("/livez")
+def liveness():
+    if startup.failed:
+        return JSONResponse(status_code=503, content={"status": "Failed", "error": startup.error})
+    return {"status": "Alive"}
+
+@app.get("/readyz")
+def readiness():
+    if not startup.ready:
+        status = "Failed" if startup.failed else "Starting"
+        return JSONResponse(status_code=503, content={"status": status, **startup.stats()})
+    return {"status": "Ready", **startup.stats()}
+
+@app.get("/stats")
+def stats():
+    return {
+        "startup": startup.stats(),
+        "batcher": batcher.stats(),
+        "executor": inference_executor.stats(),
+        "model": model_registry.stats(),
+        "cache": prediction_cache.stats() if prediction_cache is not None else None,
+        "idempotency": idempotency_store.stats(),
+        "admission": admission.stats(),
+        "rate_limit": rate_limiter.stats() if rate_limiter is not None else None,
+        "persistence": prediction_writer.stats(),
+        "db_pool": pool_stats(base.async_engine.sync_engine if DB_BACKEND == "async" else None),
+        "process": {"pid": os.getpid(), **memory_usage()},
+    }
+
+@app.get("/metrics")
+def metrics_endpoint():
+    return PlainTextResponse(metrics.render(), media_type="text/plain; version=0.0.4; charset=utf-8")
+
+# ——— Prediction routes ———
+PREDICT_PATHS = ("/predict", "/predict/fast")
+
+@app.exception_handler(RequestValidationError)
+async def validation_error_handler(request: Request, exc: RequestValidationError) -> JSONResponse:
+    # FastAPI rejects invalid /predict bodies before the route runs; count them here for both routes
+    if request.url.path in PREDICT_PATHS:
+        predict_errors_total.labels("validation").inc()
+    return await request_validation_exception_handler(request, exc)
+
+@app.post("/predict", dependencies=[Depends(require_ready), Depends(admit)])
+async def predict_endpoint(
+    input_data: LoanApplication,
+    request: Request,
+    db: "Session | AsyncSession | None" = Depends(get_session),
+    deadline: float | None = Depends(request_deadline),
+) -> JSONResponse:
     """
     Validates, preprocesses, predicts, saves to DB, and returns the result.
+
+    With an Idempotency-Key header, a retry of the same request returns the
+    stored response (marked with Idempotent-Replayed: true) without scoring
+    or saving it again. With X-Request-Timeout-Ms, work still pending when
+    that time is up is dropped and the request fails with 504.
+    """
+    return await predict_application(input_data, request, db, JSONResponse, deadline)
+
+# ——— Fast path: raw body parsed and validated in one compiled step, orjson response ———
+def is_json_content_type(content_type: str | None) -> bool:
+    """
+    Returns whether FastAPI would decode a body with this Content-Type as JSON:
+    none at all, application/json or application/*+json.
+    """
+    if not content_type or content_type == "application/json":
+        return True
+    message = email.message.Message()
+    message["content-type"] = content_type
+    subtype = message.get_content_subtype()
+    return message.get_content_maintype() == "application" and (subtype == "json" or subtype.endswith("+json"))
+
+def parse_application(body: bytes, content_type: str | None = None) -> LoanApplication:
+    """
+    Parses and validates a raw /predict body straight into a LoanApplication
+    (pydantic-core reads the JSON itself, without building a dict first).
+
+    Raises:
+        RequestValidationError: With the same errors FastAPI reports for /predict, so both routes answer 422 alike.
+    """
+    missing = {"type": "missing", "loc": ("body",), "msg": "Field required", "input": None}
+    not_an_object = {
+        "type": "model_attributes_type",
+        "loc": ("body",),
+        "msg": "Input should be a valid dictionary or object to extract fields from",
+    }
+    if not body:
+        raise RequestValidationError([missing])
+    if not is_json_content_type(content_type):
+        # FastAPI validates the raw bytes of a non-JSON body, which can never be an object
+        raise RequestValidationError([{**not_an_object, "input": body}], body=body)
+    try:
+        return LoanApplication.model_validate_json(body)
+    except ValidationError as e:
+        errors = e.errors(include_url=False)
+    if len(errors) == 1 and errors[0]["type"] == "model_type" and not errors[0]["loc"]:
+        # The body is valid JSON but not an object; FastAPI treats null as no body at all
+        value = errors[0]["input"]
+        raise RequestValidationError([missing] if value is None else [{**not_an_object, "input": value}], body=value)
+    if any(error["type"] == "json_invalid" for error in errors):
+        # Rare path: let the json module locate the syntax error the way FastAPI reports it
+        try:
+            json.loads(body)
+        except json.JSONDecodeError as e:
+            raise RequestValidationError(
+                [{"type": "json_invalid", "loc": ("body", e.pos), "msg": "JSON decode error", "input": {}, "ctx": {"error": e.msg}}],
+                body=e.doc,
+            ) from None
+    raise RequestValidationError([{**error, "loc": ("body", *error["loc"])} for error in errors], body=body)
+
+@app.post("/predict/fast", dependencies=[Depends(require_ready), Depends(admit)])
+async def predict_fast_endpoint(
+    request: Request,
+    db: "Session | AsyncSession | None" = Depends(get_session),
+    deadline: float | None = Depends(request_deadline),
+) -> ORJSONResponse:
     """
+    /predict for high-throughput clients: same request, response and errors, less
+    per-request overhead. The body is validated by `parse_application` instead of
+    FastAPI's JSON decode and model parse, and the response is serialised with orjson.
+    """
+    body = await request.body()
+    started = time.perf_counter()
+    input_data = parse_application(body, request.headers.get("content-type"))
+    STAGE_VALIDATE.observe(time.perf_counter() - started)
+    return await predict_application(input_data, request, db, ORJSONResponse, deadline)
+
+async def predict_application(
+    input_data: LoanApplication,
+    request: Request,
+    db: "Session | AsyncSession | None",
+    response_class: type[JSONResponse] | type[ORJSONResponse],
+    deadline: float | None,
+) -> JSONResponse | ORJSONResponse:
+    """
+    Scores one validated application for /predict and /predict/fast and answers with `response_class`.
+
+    If the client disconnects first, the pending work is cancelled: a row still
+    waiting in the micro-batcher or the executor queue is never scored, and nothing is saved.
+    """
+    try:
+        return await cancel_on_disconnect(request, predict_one(input_data, request, db, response_class, deadline))
+    except ClientDisconnect:
+        logger.warning("Client disconnected; prediction cancelled.")
+        predict_errors_total.labels("disconnected").inc()
+        raise HTTPException(
+            status_code=499,
+            detail={"error": "Client closed request", "status": "Error"}
+        )
+
+async def predict_one(
+    input_data: LoanApplication,
+    request: Request,
+    db: "Session | AsyncSession | None",
+    response_class: type[JSONResponse] | type[ORJSONResponse],
+    deadline: float | None,
+) -> JSONResponse | ORJSONResponse:
     logger.info("Prediction request received.")
+    started = time.perf_counter()
 
-    # 1. Explicit payload validation
-    is_valid, errors = validate_payload(input_data.model_dump(), logger)
+    # 1. Explicit payload validation; the route already parsed the body into a frozen
+    #    LoanApplication (timed as the validate stage on /predict/fast), which is
+    #    checked, encoded and persisted without copies
+    is_valid, errors = validate_payload(input_data, logger)
     if not is_valid:
         # abort early on validation errors
+        predict_errors_total.labels("validation").inc()
         raise HTTPException(
             status_code=400,
             detail={"error": errors, "status": "Error"}
         )
 
+    idempotency_key = request.headers.get("Idempotency-Key")
+    if idempotency_key is not None:
+        if not 0 < len(idempotency_key) <= IDEMPOTENCY_KEY_MAX_LENGTH:
+            predict_errors_total.labels("validation").inc()
+            raise HTTPException(
+                status_code=400,
+                detail={"error": f"Idempotency-Key must be 1 to {IDEMPOTENCY_KEY_MAX_LENGTH} characters", "status": "Error"}
+            )
+        fingerprint = hashlib.sha256(input_data.model_dump_json().encode()).hexdigest()
+        try:
+            stored = await idempotency_store.begin(idempotency_key, fingerprint)
+        except IdempotencyConflict as e:
+            logger.warning("Rejecting prediction request: %s", e)
+            predict_errors_total.labels("idempotency_conflict").inc()
+            raise HTTPException(
+                status_code=422,
+                detail={"error": str(e), "status": "Error"}
+            )
+        if stored is not None:
+            logger.info("Replaying stored response for Idempotency-Key %s.", idempotency_key)
+            return response_class(status_code=200, content=stored, headers={"Idempotent-Replayed": "true"})
+
     try:
-        # 2. Preprocess & predict
-        df = preprocess_input(input_data.model_dump(), logger)
-        result = predict(df, logger)
+        # 2. Preprocess, then predict unless an identical row was scored recently;
+        #    misses are batched with concurrent requests
+        check_deadline(deadline, "preprocessing")
+        bundle = current_bundle()
+        stage_started = time.perf_counter()
+        row = prepare_input(input_data, logger, bundle)
+        STAGE_PREPROCESS.observe(time.perf_counter() - stage_started)
+
+        stage_started = time.perf_counter()
+        key = prediction_cache.key(row, bundle.resource_fingerprint) if prediction_cache is not None else None
+        result = await prediction_cache.get(key) if key is not None else None
+        if result is None:
+            result = await batcher.submit((bundle, row, deadline), deadline)
+            if key is not None:
+                await prediction_cache.set(key, result)
+        STAGE_PREDICT.observe(time.perf_counter() - stage_started)
 
         prediction = int(result["prediction"])
         confidence = float(result.get("confidence", 0.0))
-        status = "Approved" if prediction == 1 else "Rejected"
-        
-        print(f"Result : {result}")
-        print(f"Inpit Data : {input_data}")
-        print(f"Prediction : {prediction}")
-        print(f"Confident : {confidence}")
-        print(f"Status : {status}")
-        
-        db = base.SessionLocal()
-        
-        print(f"TESETINGGGG : {input_data.person_age}")
-        user = save_prediction(
-            db,
-            person_age= input_data.person_age,
-            person_gender= input_data.person_gender,
-            person_education=input_data.person_education,
-            person_income=input_data.person_income,
-            person_emp_exp=input_data.person_emp_exp,
-            person_home_ownership=input_data.person_home_ownership,
-            loan_amnt=input_data.loan_amnt,
-            loan_intent=input_data.loan_intent,
-            loan_int_rate=input_data.loan_int_rate,
-            loan_percent_income=input_data.loan_percent_income,
-            cb_person_cred_hist_length=input_data.cb_person_cred_hist_length,
-            credit_score=input_data.credit_score,
-            previous_loan_defaults_on_file= input_data.previous_loan_defaults_on_file,
-            loan_status=status,
-            confidence=confidence
-        )
-        
-        return JSONResponse(
-            status_code=200,
-            content={
-                "prediction": prediction,
-                "confidence": confidence,
-                "status": status
-            }
+        status = loan_status(prediction)
+        logger.debug("Prediction %s (confidence %.4f) for %s", status, confidence, input_data)
+
+        # 3. Persist: hand the row to the write-behind queue so the response does not
+        #    wait on Postgres, or commit it on this request's session
+        check_deadline(deadline, "saving")
+        record = prediction_record(
+            input_data, loan_status=status, confidence=confidence, idempotency_key=idempotency_key
         )
+        stage_started = time.perf_counter()
+        if PERSIST_MODE == "inline" and DB_BACKEND == "async":
+            await bulk_save_predictions_async(db, [record])
+        elif PERSIST_MODE == "inline":
+            await run_in_threadpool(bulk_save_predictions, db, [record])
+        else:
+            prediction_writer.submit(record)
+        STAGE_SAVE.observe(time.perf_counter() - stage_started)
+
+        content = {
+            "prediction": prediction,
+            "confidence": confidence,
+            "status": status
+        }
+        if idempotency_key is not None:
+            idempotency_store.complete(idempotency_key, content)
+        predictions_total.labels(status).inc()
+        STAGE_TOTAL.observe(time.perf_counter() - started)
+        return response_class(status_code=200, content=content)
 
+    except DeadlineExceeded as e:
+        logger.warning("Dropping prediction request: %s", e)
+        predict_errors_total.labels("deadline").inc()
+        raise HTTPException(
+            status_code=504,
+            detail={"error": str(e), "status": "Error"}
+        )
+    except (BatcherQueueFull, ExecutorSaturated, PersistenceQueueFull) as e:
+        logger.warning("Rejecting prediction request: %s", e)
+        predict_errors_total.labels("busy").inc()
+        raise HTTPException(
+            status_code=503,
+            detail={"error": "Server is busy, please retry", "status": "Error"}
+        )
     except ValueError as ve:
         logger.error("Value error in prediction pipeline: %s", ve)
+        predict_errors_total.labels("value_error").inc()
         raise HTTPException(
             status_code=400,
             detail={"error": str(ve), "status": "Error"}
         )
     except Exception as e:
         logger.exception("Unexpected error in predict endpoint: %s", e)
+        predict_errors_total.labels("internal").inc()
         raise HTTPException(
             status_code=500,
             detail={"error": "Internal server error", "status": "Error"}
         )
+    finally:
+        # A failed attempt releases its key so the client's retry runs again
+        if idempotency_key is not None:
+            idempotency_store.abandon(idempotency_key)
     
+# ——— Admin ———
+@app.post("/admin/reload")
+async def admin_reload(request: Request) -> JSONResponse:
+    """
+    Loads the files in models/ now, warms them up and swaps them in; requires X-Admin-Token.
+    """
+    token = request.headers.get("X-Admin-Token", "")
+    if not ADMIN_TOKEN or not hmac.compare_digest(token, ADMIN_TOKEN):
+        raise HTTPException(
+            status_code=403,
+            detail={"error": "Forbidden", "status": "Error"}
+        )
+
+    try:
+        bundle = await run_in_threadpool(model_registry.reload)
+    except Exception as e:
+        raise HTTPException(
+            status_code=500,
+            detail={"error": f"Reload failed, the previous model is still active: {e}", "status": "Error"}
+        )
+
+    return JSONResponse(
+        status_code=200,
+        content={
+            "status": "Reloaded",
+            "fingerprint": bundle.resource_fingerprint[:16],
+            "load_s": model_registry.last_load_s,
+            "warm_up_s": model_registry.last_warm_up_s,
+        }
+    )
+
+# ——— Bulk scoring: one validation pass, one model call and one insert per batch ———
+NDJSON_CONTENT_TYPES = ("application/x-ndjson", "application/ndjson", "application/jsonl")
+PREDICT_BATCH_MAX_ROWS = int(os.getenv("PREDICT_BATCH_MAX_ROWS", 10000))
+# Checked before anything is parsed, so an oversized batch costs neither memory nor CPU
+PREDICT_BATCH_MAX_BYTES = int(os.getenv("PREDICT_BATCH_MAX_BYTES", 8 * 1024 * 1024))
+
+async def read_body(request: Request, max_bytes: int) -> bytes:
+    """
+    Reads the request body, rejecting it with 413 as soon as it is known to exceed
+    `max_bytes`: from Content-Length up front, otherwise while it streams in.
+    """
+    too_large = HTTPException(
+        status_code=413,
+        detail={"error": f"Request body exceeds the limit of {max_bytes} bytes", "status": "Error"}
+    )
+    content_length = request.headers.get("content-length")
+    if content_length is not None and content_length.isdigit() and int(content_length) > max_bytes:
+        raise too_large
+
+    body = bytearray()
+    async for chunk in request.stream():
+        body += chunk
+        if len(body) > max_bytes:
+            raise too_large
+    return bytes(body)
+
+@app.post("/predict/batch", dependencies=[Depends(require_ready), Depends(admit)])
+async def predict_batch_endpoint(
+    request: Request,
+    db: "Session | AsyncSession | None" = Depends(get_session),
+    deadline: float | None = Depends(request_deadline),
+) -> JSONResponse:
+    """
+    Scores a JSON array (or NDJSON body) of loan applications.
+
+    Invalid rows are reported individually; the rest of the batch is still scored and saved.
+    """
+    body = await read_body(request, PREDICT_BATCH_MAX_BYTES)
+    content_type = request.headers.get("content-type", "").split(";")[0].strip().lower()
+
+    if content_type in NDJSON_CONTENT_TYPES:
+        rows, errors = decode_ndjson(body)
+    else:
+        try:
+            rows, errors = json.loads(body), {}
+        except ValueError as e:
+            raise HTTPException(status_code=400, detail={"error": f"Invalid JSON: {e}", "status": "Error"})
+        if not isinstance(rows, list):
+            raise HTTPException(
+                status_code=400,
+                detail={"error": "Expected a JSON array of loan applications", "status": "Error"}
+            )
+
+    if len(rows) > PREDICT_BATCH_MAX_ROWS:
+        raise HTTPException(
+            status_code=413,
+            detail={"error": f"Batch of {len(rows)} rows exceeds the limit of {PREDICT_BATCH_MAX_ROWS}", "status": "Error"}
+        )
+    logger.info("Batch prediction request received with %d rows.", len(rows))
+
+    try:
+        results, records = await inference_executor.run(score_rows, rows, logger, errors, deadline=deadline)
+        check_deadline(deadline, "saving")
+
+        if records and PERSIST_MODE == "inline" and DB_BACKEND == "async":
+            await bulk_save_predictions_async(db, records)
+        elif records and PERSIST_MODE == "inline":
+            await run_in_threadpool(bulk_save_predictions, db, records)
+        elif records:
+            prediction_writer.submit_many(records)
+
+    except DeadlineExceeded as e:
+        logger.warning("Dropping batch prediction request: %s", e)
+        raise HTTPException(
+            status_code=504,
+            detail={"error": str(e), "status": "Error"}
+        )
+    except (ExecutorSaturated, PersistenceQueueFull) as e:
+        logger.warning("Rejecting batch prediction request: %s", e)
+        raise HTTPException(
+            status_code=503,
+            detail={"error": "Server is busy, please retry", "status": "Error"}
+        )
+    except Exception as e:
+        logger.exception("Unexpected error in batch predict endpoint: %s", e)
+        raise HTTPException(
+            status_code=500,
+            detail={"error": "Internal server error", "status": "Error"}
+        )
+
+    return JSONResponse(
+        status_code=200,
+        content={
+            "results": results,
+            "total": len(results),
+            "succeeded": len(records),
+            "failed": len(results) - len(records),
+        }
+    )
+
+# ——— Streaming scoring: NDJSON in, NDJSON out ———
+STREAM_CHUNK_ROWS = int(os.getenv("STREAM_CHUNK_ROWS", 1000))
+STREAM_MAX_LINE_BYTES = int(os.getenv("STREAM_MAX_LINE_BYTES", 65536))
+# Results the client has not read yet are held in memory up to this size, then on disk
+STREAM_SPOOL_MEMORY_BYTES = int(os.getenv("STREAM_SPOOL_MEMORY_BYTES", 8 * 1024 * 1024))
+
+class BodyStreamingResponse(StreamingResponse):
+    """
+    StreamingResponse for generators that are still reading the request body.
+
+    On ASGI < 2.4 servers (uvicorn) StreamingResponse listens for a disconnect
+    with `receive()` while streaming, which would swallow the body chunks the
+    generator is waiting for. Here only the generator receives; a client that
+    goes away mid-upload surfaces as ClientDisconnect from `request.stream()`.
+    The background task (releasing the admission slot) runs however the stream ends.
+    """
+
+    async def __call__(self, scope, receive, send) -> None:
+        try:
+            await self.stream_response(send)
+        finally:
+            if self.background is not None:
+                await self.background()
+
+def error_line(index: int, error: str) -> bytes:
+    return (json.dumps({"index": index, "status": "Error", "error": error}) + "\n").encode()
+
+async def score_chunk(lines: list[bytes | None], offset: int, deadline: float | None) -> bytes:
+    rows, errors = decode_lines(lines)
+    while True:
+        try:
+            results, _ = await inference_executor.run(score_rows, rows, logger, errors, offset, deadline=deadline)
+            break
+        except ExecutorSaturated:
+            # A long-running stream waits for capacity instead of failing half way
+            check_deadline(deadline, "inference")
+            await asyncio.sleep(0.01)
+    return "".join(json.dumps(result) + "\n" for result in results).encode()
+
+@app.post("/predict/stream", dependencies=[Depends(require_ready)])
+async def predict_stream_endpoint(
+    request: Request,
+    deadline: float | None = Depends(request_deadline),
+) -> BodyStreamingResponse:
+    """
+    Scores an NDJSON body of any size, STREAM_CHUNK_ROWS lines at a time.
+
+    Results are streamed back as NDJSON in input order. Reading the body does
+    not wait for the client to read the results, so both full-duplex clients
+    and clients that upload the whole body before reading (as most HTTP
+    clients do) work. Unread results go through a ResultSpool: in memory up to
+    STREAM_SPOOL_MEMORY_BYTES, then in a temporary file, so memory stays
+    bounded while a half-duplex client uploads. Results are not persisted.
+
+    Goes through admission control and X-Request-Timeout-Ms like /predict/batch;
+    once the deadline passes, the remaining lines are reported in one error line.
+    """
+    await admit_request(request, deadline)
+    logger.info("Streaming prediction request received.")
+    output = ResultSpool(STREAM_SPOOL_MEMORY_BYTES)
+
+    async def score_body() -> None:
+        chunk: list[bytes | None] = []
+        offset = 0
+        try:
+            async for line in iter_ndjson_lines(request.stream(), STREAM_MAX_LINE_BYTES):
+                chunk.append(line)
+                if len(chunk) >= STREAM_CHUNK_ROWS:
+                    await output.put(await score_chunk(chunk, offset, deadline))
+                    offset += len(chunk)
+                    chunk = []
+            if chunk:
+                # The body is read: a client that goes away now cancels the last chunk
+                await output.put(await cancel_on_disconnect(request, score_chunk(chunk, offset, deadline)))
+                offset += len(chunk)
+            logger.info("Streaming prediction finished after %d rows.", offset)
+        except ClientDisconnect:
+            logger.warning("Client disconnected from streaming prediction after %d rows.", offset)
+        except DeadlineExceeded as e:
+            logger.warning("Streaming prediction stopped after %d rows: %s", offset, e)
+            await output.put(error_line(offset, str(e)))
+        except Exception as e:
+            logger.exception("Streaming prediction failed after %d rows: %s", offset, e)
+            await output.put(error_line(offset, "Internal server error"))
+        finally:
+            output.close()
+
+    async def results():
+        scoring = asyncio.ensure_future(score_body())
+        try:
+            while (data := await output.get()) is not None:
+                yield data
+        finally:
+            scoring.cancel()
+            output.discard()
+
+    return BodyStreamingResponse(
+        results(), media_type="application/x-ndjson", background=BackgroundTask(admission.release)
+    )
+
 
 # ——— Entry point for local development ———
 if __name__ == "__main__":
@@ -0,0 +1,32 @@
+"""
+Process memory from /proc, kept apart from app.server so that app.main can
+report it without importing uvicorn.
+"""
+
+MEMORY_FIELDS = {
+    "Rss": "rss_mb",
+    "Pss": "pss_mb",
+    "Shared_Clean": "shared_mb",
+    "Shared_Dirty": "shared_mb",
+    "Private_Clean": "private_mb",
+    "Private_Dirty": "private_mb",
+}
+
+
+def memory_usage(pid: int | str = "self") -> dict[str, float]:
+    """
+    Returns the resident memory of a process in MiB, split into shared and
+    private pages, from /proc/<pid>/smaps_rollup. PSS divides shared pages
+    between the processes sharing them, so summing it over workers gives their
+    real footprint. Empty where /proc is not available.
+    """
+    usage = dict.fromkeys(set(MEMORY_FIELDS.values()), 0.0)
+    try:
+        with open(f"/proc/{pid}/smaps_rollup") as f:
+            for line in f:
+                name, _, value = line.partition(":")
+                if name in MEMORY_FIELDS:
+                    usage[MEMORY_FIELDS[name]] += int(value.split()[0]) / 1024
+    except (OSError, ValueError):
+        return {}
+    return {key: round(value, 1) for key, value in usage.items()}
@@ -0,0 +1,222 @@
+"""
+Prometheus-style metrics with lock-light recording.
+
+Histograms and counters keep one shard per recording thread: a thread only
+ever writes to its own shard, so `observe` and `inc` take no lock and never
+contend with other threads or with a scrape. A scrape sums the shards; it may
+miss an observation that is being recorded at the same moment, which the
+next scrape picks up.
+
+Gauges are read at scrape time from callbacks, typically the `stats()` of
+the batcher, executor, writer and connection pool.
+"""
+import abc
+import bisect
+import re
+import threading
+from typing import Any, Callable, Iterable
+
+# Latency buckets in seconds, from 50 µs to 5 s
+LATENCY_BUCKETS = (
+    0.00005, 0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0,
+)
+
+
+def _labels(names: tuple[str, ...], values: tuple[str, ...], extra: str = "") -> str:
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+def _escape(value: Any) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _number(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class _Sharded:
+    """
+    Per-thread shards of a metric child; `shard()` returns the calling thread's own.
+    """
+
+    def __init__(self, new_shard: Callable[[], Any]):
+        self._new_shard = new_shard
+        self._local = threading.local()
+        self._shards: list[Any] = []
+        self._lock = threading.Lock()
+
+    def shard(self) -> Any:
+        try:
+            return self._local.shard
+        except AttributeError:
+            shard = self._new_shard()
+            with self._lock:
+                self._shards.append(shard)
+            self._local.shard = shard
+            return shard
+
+    def shards(self) -> list[Any]:
+        with self._lock:
+            return list(self._shards)
+
+
+class _HistogramChild:
+    def __init__(self, buckets: tuple[float, ...]):
+        self.buckets = buckets
+        # Shard layout: counts per bucket plus one overflow slot, then the sum
+        self._sharded = _Sharded(lambda: [0] * (len(buckets) + 1) + [0.0])
+
+    def observe(self, value: float) -> None:
+        shard = self._sharded.shard()
+        shard[bisect.bisect_left(self.buckets, value)] += 1
+        shard[-1] += value
+
+    def snapshot(self) -> tuple[list[int], float]:
+        counts = [0] * (len(self.buckets) + 1)
+        total = 0.0
+        for shard in self._sharded.shards():
+            for i in range(len(counts)):
+                counts[i] += shard[i]
+            total += shard[-1]
+        return counts, total
+
+
+class _CounterChild:
+    def __init__(self):
+        self._sharded = _Sharded(lambda: [0.0])
+
+    def inc(self, amount: float = 1.0) -> None:
+        self._sharded.shard()[0] += amount
+
+    def value(self) -> float:
+        return sum(shard[0] for shard in self._sharded.shards())
+
+
+class _Metric(abc.ABC):
+    kind = ""
+
+    def __init__(self, name: str, help: str, labelnames: Iterable[str] = ()):
+        self.name = name
+        self.help = help
+        self.labelnames = tuple(labelnames)
+        self._children: dict[tuple[str, ...], Any] = {}
+        self._lock = threading.Lock()
+
+    def labels(self, *values: str):
+        """
+        Returns the child for these label values; cache it for hot paths.
+        """
+        key = tuple(str(v) for v in values)
+        child = self._children.get(key)
+        if child is None:
+            with self._lock:
+                child = self._children.setdefault(key, self._new_child())
+        return child
+
+    @abc.abstractmethod
+    def _new_child(self): ...
+
+    def _items(self) -> list[tuple[tuple[str, ...], Any]]:
+        with self._lock:
+            return list(self._children.items())
+
+    def render(self) -> list[str]:
+        return [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} {self.kind}"] + self._samples()
+
+    @abc.abstractmethod
+    def _samples(self) -> list[str]: ...
+
+
+class Histogram(_Metric):
+    kind = "histogram"
+
+    def __init__(self, name: str, help: str, labelnames: Iterable[str] = (), buckets: tuple[float, ...] = LATENCY_BUCKETS):
+        super().__init__(name, help, labelnames)
+        self.buckets = tuple(sorted(buckets))
+
+    def _new_child(self) -> _HistogramChild:
+        return _HistogramChild(self.buckets)
+
+    def observe(self, value: float) -> None:
+        self.labels().observe(value)
+
+    def _samples(self) -> list[str]:
+        lines = []
+        for values, child in self._items():
+            counts, total = child.snapshot()
+            cumulative = 0
+            for bound, count in zip(self.buckets + (float("inf"),), counts):
+                cumulative += count
+                le = 'le="' + _number(bound) + '"'
+                lines.append(f"{self.name}_bucket{_labels(self.labelnames, values, le)} {cumulative}")
+            lines.append(f"{self.name}_sum{_labels(self.labelnames, values)} {_number(total)}")
+            lines.append(f"{self.name}_count{_labels(self.labelnames, values)} {cumulative}")
+        return lines
+
+
+class Counter(_Metric):
+    kind = "counter"
+
+    def _new_child(self) -> _CounterChild:
+        return _CounterChild()
+
+    def inc(self, amount: float = 1.0) -> None:
+        self.labels().inc(amount)
+
+    def _samples(self) -> list[str]:
+        return [f"{self.name}{_labels(self.labelnames, values)} {_number(child.value())}" for values, child in self._items()]
+
+
+class StatsGauges:
+    """
+    Exposes the numeric fields of a `stats()` dict as gauges named `<prefix>_<field>`.
+
+    Booleans become 0/1; nested dicts and other values are skipped.
+    """
+
+    def __init__(self, prefix: str, stats: Callable[[], dict[str, Any] | None]):
+        self.prefix = prefix
+        self.stats = stats
+
+    def render(self) -> list[str]:
+        lines = []
+        for key, value in (self.stats() or {}).items():
+            if isinstance(value, bool):
+                value = int(value)
+            if not isinstance(value, (int, float)):
+                continue
+            name = f"{self.prefix}_{re.sub(r'[^a-zA-Z0-9_]', '_', key)}"
+            lines += [f"# TYPE {name} gauge", f"{name} {_number(value)}"]
+        return lines
+
+
+class Registry:
+    def __init__(self):
+        self._metrics: list[Any] = []
+
+    def register(self, metric):
+        self._metrics.append(metric)
+        return metric
+
+    def histogram(self, name: str, help: str, labelnames: Iterable[str] = (), **kwargs) -> Histogram:
+        return self.register(Histogram(name, help, labelnames, **kwargs))
+
+    def counter(self, name: str, help: str, labelnames: Iterable[str] = ()) -> Counter:
+        return self.register(Counter(name, help, labelnames))
+
+    def gauges(self, prefix: str, stats: Callable[[], dict[str, Any] | None]) -> StatsGauges:
+        return self.register(StatsGauges(prefix, stats))
+
+    def render(self) -> str:
+        """
+        Returns every metric in the Prometheus text exposition format (version 0.0.4).
+        """
+        lines = []
+        for metric in self._metrics:
+            lines += metric.render()
+        return "\n".join(lines) + "\n"
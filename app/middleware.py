@@ -0,0 +1,103 @@
+"""
+Request ID and access-log middleware, written against plain ASGI.
+
+`@app.middleware("http")` (BaseHTTPMiddleware) runs every request through an
+extra task and a wrapped response stream, and the response it hands back has
+no readable body, so error bodies of streaming responses could not be logged.
+This middleware only wraps `send`: it adds the X-Request-ID header to the
+response start and keeps the first bytes of an error body as it streams past.
+"""
+import itertools
+import logging
+import os
+import re
+
+from .logging_config import request_id_ctx
+
+# An incoming X-Request-ID is reused only if it is this safe to put in logs and headers
+_VALID_REQUEST_ID = re.compile(rb"[A-Za-z0-9._:\-]{1,128}")
+
+
+class RequestIDGenerator:
+    """
+    Cheap unique request IDs: a random per-process prefix and a counter, e.g. "3f9a1c0e7b2d-1a".
+
+    `next()` on an itertools.count is atomic under the GIL, so no lock is needed.
+    The prefix is drawn again in a forked child, so workers never share IDs.
+    """
+
+    def __init__(self):
+        self._reset()
+        os.register_at_fork(after_in_child=self._reset)
+
+    def _reset(self) -> None:
+        self._prefix = os.urandom(6).hex() + "-"
+        self._counter = itertools.count(1)
+
+    def __call__(self) -> str:
+        return f"{self._prefix}{next(self._counter):x}"
+
+
+class RequestIDMiddleware:
+    """
+    Tags every HTTP request with an ID and writes one access-log line per request.
+
+    The ID is the incoming X-Request-ID header when it is valid, otherwise a
+    generated one. It is set in `request_id_ctx` for the request's logs, in
+    `request.state.request_id`, and returned as X-Request-ID. Responses with a
+    status of 400 or more are logged at ERROR with up to `max_error_body` bytes
+    of their body, streamed or not.
+    """
+
+    def __init__(self, app, logger: logging.Logger | None = None, max_error_body: int = 4096):
+        self.app = app
+        self.logger = logger or logging.getLogger("loan_predictor")
+        self.max_error_body = max_error_body
+        self.new_id = RequestIDGenerator()
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        rid = None
+        for name, value in scope["headers"]:
+            if name == b"x-request-id":
+                if _VALID_REQUEST_ID.fullmatch(value):
+                    rid = value.decode("ascii")
+                break
+        if rid is None:
+            rid = self.new_id()
+        rid_header = (b"x-request-id", rid.encode("ascii"))
+        scope.setdefault("state", {})["request_id"] = rid
+        token = request_id_ctx.set(rid)
+
+        status = 500
+        error_body = bytearray()
+
+        async def send_with_request_id(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+                message = {**message, "headers": [*message.get("headers", ()), rid_header]}
+            elif status >= 400 and message["type"] == "http.response.body" and len(error_body) < self.max_error_body:
+                error_body.extend(message.get("body", b"")[: self.max_error_body - len(error_body)])
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_request_id)
+        except Exception:
+            status = 500
+            raise
+        finally:
+            self._log(scope, rid, status, error_body)
+            request_id_ctx.reset(token)
+
+    def _log(self, scope, rid: str, status: int, error_body: bytearray) -> None:
+        host, port = scope.get("client") or ("-", "-")
+        args = (host, port, scope["method"], scope["path"], scope.get("http_version", "1.1"), status)
+        if status >= 400:
+            desc = error_body.decode(errors="ignore") if error_body else "<no body>"
+            self.logger.error('%s:%s - "%s %s HTTP/%s" %s - %s', *args, desc, extra={"request_id": rid})
+        else:
+            self.logger.info('%s:%s - "%s %s HTTP/%s" %s', *args, extra={"request_id": rid})
@@ -0,0 +1,223 @@
+import asyncio
+import inspect
+import logging
+import queue
+import threading
+import time
+from typing import Any, Callable
+
+
+class PersistenceQueueFull(Exception):
+    """Raised by `PredictionWriter.submit` when the write-behind queue is at capacity."""
+
+
+_STOP = object()
+
+
+class PredictionWriter:
+    """
+    Write-behind persistence for predictions.
+
+    `submit` only appends the record to a bounded in-memory queue; a background
+    thread drains it and hands the records to `flush_batch` (one bulk INSERT)
+    every `batch_size` records or `flush_interval_ms` after the first record of
+    a batch was queued, whichever comes first. The request never waits on the
+    database.
+
+    A failed flush is retried `max_retries` times with a short backoff before
+    the batch is dropped and counted in `failed`. `close` stops accepting new
+    records, drains whatever is still queued and then calls `on_close`.
+
+    `flush_batch` and `on_close` may be coroutine functions (async database
+    backend); they then run on an event loop owned by the writer thread.
+    """
+
+    def __init__(
+        self,
+        flush_batch: Callable[[list[dict[str, Any]]], Any],
+        max_queue_size: int = 10000,
+        batch_size: int = 500,
+        flush_interval_ms: int = 200,
+        max_retries: int = 3,
+        retry_backoff_ms: int = 200,
+        on_close: Callable[[], Any] | None = None,
+        logger: logging.Logger | None = None,
+    ):
+        self.flush_batch = flush_batch
+        self.on_close = on_close
+        self.batch_size = max(1, batch_size)
+        self.flush_interval = max(0, flush_interval_ms) / 1000
+        self.max_retries = max_retries
+        self.retry_backoff = retry_backoff_ms / 1000
+        self.logger = logger or logging.getLogger("loan_predictor")
+
+        self._queue: queue.Queue = queue.Queue(maxsize=max_queue_size)
+        self._thread: threading.Thread | None = None
+        self._start_lock = threading.Lock()
+        self._closed = False
+        self._loop: asyncio.AbstractEventLoop | None = None
+
+        self.submitted = 0
+        self.flushed = 0
+        self.failed = 0
+        self.rejected = 0
+        self.flushes = 0
+        self.last_flush_lag_s = 0.0
+        self.max_flush_lag_s = 0.0
+
+    def start(self) -> None:
+        with self._start_lock:
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name="prediction-writer", daemon=True)
+                self._thread.start()
+
+    def submit(self, record: dict[str, Any]) -> None:
+        """
+        Queues one record for the next bulk flush without blocking.
+
+        Raises:
+            PersistenceQueueFull: If the queue is full or the writer is closed.
+        """
+        if self._thread is None:
+            self.start()
+        if self._closed:
+            raise PersistenceQueueFull("Prediction writer is closed")
+        try:
+            self._queue.put_nowait((time.monotonic(), record))
+        except queue.Full:
+            self.rejected += 1
+            raise PersistenceQueueFull(f"Persistence queue is full ({self._queue.maxsize} pending)")
+        self.submitted += 1
+
+    def submit_many(self, records: list[dict[str, Any]]) -> None:
+        """
+        Queues several records, all or nothing.
+
+        Raises:
+            PersistenceQueueFull: If they do not all fit or the writer is closed.
+        """
+        if self._thread is None:
+            self.start()
+        if self._closed:
+            raise PersistenceQueueFull("Prediction writer is closed")
+        if self._queue.maxsize > 0 and self._queue.qsize() + len(records) > self._queue.maxsize:
+            self.rejected += len(records)
+            raise PersistenceQueueFull(f"Persistence queue cannot take {len(records)} more records")
+
+        now = time.monotonic()
+        for record in records:
+            self._queue.put_nowait((now, record))
+        self.submitted += len(records)
+
+    def close(self, timeout: float | None = 30.0) -> None:
+        """
+        Stops accepting records and waits up to `timeout` seconds for the queue to drain.
+        """
+        if self._closed:
+            return
+        self._closed = True
+        if self._thread is None:
+            return
+
+        self._queue.put(_STOP)
+        self._thread.join(timeout)
+        if self._thread.is_alive():
+            self.logger.error("Prediction writer did not drain within %ss, %d records left.", timeout, self._queue.qsize())
+        else:
+            self.logger.info("Prediction writer drained: %d records flushed.", self.flushed)
+
+    def _call(self, fn: Callable, *args: Any) -> Any:
+        if inspect.iscoroutinefunction(fn):
+            if self._loop is None:
+                self._loop = asyncio.new_event_loop()
+            return self._loop.run_until_complete(fn(*args))
+        return fn(*args)
+
+    def _run(self) -> None:
+        try:
+            self._drain()
+        finally:
+            if self.on_close is not None:
+                try:
+                    self._call(self.on_close)
+                except Exception as e:
+                    self.logger.error("Prediction writer on_close failed: %s", e)
+            if self._loop is not None:
+                self._loop.close()
+
+    def _drain(self) -> None:
+        stopping = False
+        while not stopping:
+            first = self._queue.get()
+            if first is _STOP:
+                break
+
+            batch = [first]
+            deadline = time.monotonic() + self.flush_interval
+            while len(batch) < self.batch_size:
+                timeout = deadline - time.monotonic()
+                try:
+                    item = self._queue.get(timeout=timeout) if timeout > 0 else self._queue.get_nowait()
+                except queue.Empty:
+                    break
+                if item is _STOP:
+                    stopping = True
+                    break
+                batch.append(item)
+
+            self._flush(batch)
+
+        # Drain anything queued before close() was called
+        leftover = []
+        while True:
+            try:
+                item = self._queue.get_nowait()
+            except queue.Empty:
+                break
+            if item is not _STOP:
+                leftover.append(item)
+        for start in range(0, len(leftover), self.batch_size):
+            self._flush(leftover[start:start + self.batch_size])
+
+    def _flush(self, batch: list[tuple[float, dict[str, Any]]]) -> None:
+        records = [record for _, record in batch]
+        for attempt in range(self.max_retries + 1):
+            try:
+                self._call(self.flush_batch, records)
+                break
+            except Exception as e:
+                if attempt == self.max_retries:
+                    self.failed += len(records)
+                    self.logger.error("Dropping %d predictions after %d failed flushes: %s", len(records), attempt + 1, e)
+                    return
+                self.logger.warning("Flush of %d predictions failed (attempt %d): %s", len(records), attempt + 1, e)
+                time.sleep(self.retry_backoff * (attempt + 1))
+
+        lag = time.monotonic() - batch[0][0]
+        self.flushes += 1
+        self.flushed += len(records)
+        self.last_flush_lag_s = lag
+        self.max_flush_lag_s = max(self.max_flush_lag_s, lag)
+
+    def stats(self) -> dict[str, Any]:
+        """
+        Returns queue depth and lag: how long the oldest queued record has been
+        waiting, and how old the oldest record of the last flush was when it committed.
+        """
+        try:
+            head = self._queue.queue[0]
+            oldest_age = time.monotonic() - head[0] if head is not _STOP else 0.0
+        except IndexError:
+            oldest_age = 0.0
+
+        return {
+            "queue_depth": self._queue.qsize(),
+            "oldest_queued_age_s": oldest_age,
+            "last_flush_lag_s": self.last_flush_lag_s,
+            "max_flush_lag_s": self.max_flush_lag_s,
+            "submitted": self.submitted,
+            "flushed": self.flushed,
+            "failed": self.failed,
+            "rejected": self.rejected,
+            "flushes": self.flushes,
+        }
@@ -0,0 +1,182 @@
+import logging
+import threading
+import time
+from dataclasses import dataclass
+from typing import Any, Callable
+
+
+@dataclass(frozen=True)
+class ModelBundle:
+    """
+    One consistent, immutable set of loaded model resources.
+
+    The field names match the `services` module globals they replace, so code
+    can take a snapshot of `services.bundle` once and use it for a whole
+    request without seeing a half-swapped model.
+    """
+
+    model: Any
+    scaler: Any
+    features: list[str]
+    gender_map: dict
+    default_map: dict
+    education_order: dict
+    home_ownership_options: list[str]
+    loan_intent_options: list[str]
+    encoder: Any
+    scaled_encoder: Any
+    predictor: Any
+    resource_fingerprint: str
+    loaded_at: float
+
+
+class ModelRegistry:
+    """
+    Hot-reloads the model resources without restarting the process.
+
+    `reload` builds a complete new bundle with `load`, warms it up with
+    `warm_up`, and then publishes it with `activate`, which must be a single
+    reference swap. Requests in flight keep the bundle they started with, and
+    new requests get the warmed-up one. After the swap every `on_swap`
+    callback runs, for example to recycle worker processes. If loading or
+    warm-up fails, the current bundle keeps serving.
+
+    With `poll_interval_s` > 0, `start` runs a watcher thread that compares
+    `fingerprint()` of the files on disk with the active bundle. A change is
+    only loaded once the fingerprint has been stable for one more poll, so
+    files that are still being copied are not picked up. A fingerprint that
+    failed to load is not retried until the files change again.
+    """
+
+    def __init__(
+        self,
+        load: Callable[[], ModelBundle],
+        activate: Callable[[ModelBundle], None],
+        current: Callable[[], ModelBundle | None],
+        fingerprint: Callable[[], str],
+        warm_up: Callable[[ModelBundle], None] | None = None,
+        on_swap: list[Callable[[ModelBundle], None]] | None = None,
+        poll_interval_s: float = 5.0,
+        logger: logging.Logger | None = None,
+    ):
+        self.load = load
+        self.activate = activate
+        self.current = current
+        self.fingerprint = fingerprint
+        self.warm_up = warm_up
+        self.on_swap = list(on_swap or [])
+        self.poll_interval = max(0.0, poll_interval_s)
+        self.logger = logger or logging.getLogger("loan_predictor")
+
+        self._reload_lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread: threading.Thread | None = None
+        self._candidate: str | None = None
+        self._failed: str | None = None
+
+        self.reloads = 0
+        self.failures = 0
+        self.last_error: str | None = None
+        self.last_load_s = 0.0
+        self.last_warm_up_s = 0.0
+
+    def start(self) -> None:
+        if self.poll_interval > 0 and self._thread is None:
+            self._thread = threading.Thread(target=self._watch, name="model-watcher", daemon=True)
+            self._thread.start()
+
+    def stop(self) -> None:
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(self.poll_interval + 1)
+            self._thread = None
+
+    def check(self) -> bool:
+        """
+        Polls the files once and reloads if they changed and have settled.
+
+        Returns:
+            bool: True if a new bundle was activated.
+        """
+        try:
+            on_disk = self.fingerprint()
+        except OSError as e:
+            self.logger.warning("Cannot fingerprint model files: %s", e)
+            return False
+
+        active = self.current()
+        if (active is not None and on_disk == active.resource_fingerprint) or on_disk == self._failed:
+            self._candidate = None
+            return False
+        if on_disk != self._candidate:
+            # Changed since the last poll; wait until the copy has settled
+            self._candidate = on_disk
+            return False
+
+        self._candidate = None
+        try:
+            self.reload()
+        except Exception:
+            self._failed = on_disk
+            return False
+        return True
+
+    def reload(self) -> ModelBundle:
+        """
+        Loads, warms up and activates a new bundle; concurrent calls run one at a time.
+
+        Raises:
+            Exception: Whatever `load` or `warm_up` raised; the previous bundle stays active.
+        """
+        with self._reload_lock:
+            try:
+                started = time.perf_counter()
+                bundle = self.load()
+                loaded = time.perf_counter()
+                if self.warm_up is not None:
+                    self.warm_up(bundle)
+                warmed = time.perf_counter()
+            except Exception as e:
+                self.failures += 1
+                self.last_error = str(e)
+                self.logger.error("Model reload failed, keeping the current model: %s", e)
+                raise
+
+            previous = self.current()
+            self.activate(bundle)
+            self.reloads += 1
+            self.last_error = None
+            self._failed = None
+            self.last_load_s = loaded - started
+            self.last_warm_up_s = warmed - loaded
+            self.logger.info(
+                "Activated model %s (was %s): loaded in %.3fs, warmed up in %.3fs.",
+                bundle.resource_fingerprint[:16],
+                previous.resource_fingerprint[:16] if previous is not None else None,
+                self.last_load_s,
+                self.last_warm_up_s,
+            )
+
+            for callback in self.on_swap:
+                try:
+                    callback(bundle)
+                except Exception as e:
+                    self.logger.error("Model swap callback %r failed: %s", callback, e)
+            return bundle
+
+    def _watch(self) -> None:
+        while not self._stop.wait(self.poll_interval):
+            self.check()
+
+    def stats(self) -> dict[str, Any]:
+        active = self.current()
+        return {
+            "fingerprint": active.resource_fingerprint[:16] if active is not None else None,
+            "loaded_at": active.loaded_at if active is not None else None,
+            "reloads": self.reloads,
+            "failures": self.failures,
+            "last_error": self.last_error,
+            "last_load_s": self.last_load_s,
+            "last_warm_up_s": self.last_warm_up_s,
+            "watching": self._thread is not None,
+        }
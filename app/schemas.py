@@ -1,5 +1,5 @@
-from pydantic import BaseModel, Field, ValidationError
-from typing import Literal, Tuple, Optional, Dict, Any
+from pydantic import BaseModel, ConfigDict, Field, TypeAdapter, ValidationError
+from typing import Literal, Tuple, Optional, Dict, Any, List
 
 class LoanApplication(BaseModel):
     """
@@ -10,8 +10,13 @@ class LoanApplication(BaseModel):
 	- gt: greater than
 	- ge: greater than or equal to
     - Literal: restricts the field to specific string values
+
+    Instances are frozen: once FastAPI has validated a request, the same object
+    is encoded and persisted without being validated or copied again.
     """
 
+    model_config = ConfigDict(frozen=True)
+
     person_age: float = Field(..., gt=0)
     person_gender: Literal["male", "female"]
     person_education: Literal["High School", "Associate", "Bachelor", "Master", "Doctorate"]
@@ -27,12 +32,13 @@ class LoanApplication(BaseModel):
     previous_loan_defaults_on_file: Literal["Yes", "No"]
 
 
-def validate_payload(payload: Dict[str, Any], logger) -> Tuple[bool, Optional[Dict[str, Any]]]:
+def validate_payload(payload: Dict[str, Any] | LoanApplication, logger) -> Tuple[bool, Optional[Dict[str, Any]]]:
     """
 	Checks if the given input data follows the rules defined in the LoanApplication model.
 
     Args:
-        payload (Dict[str, Any]): The input data in JSON or dictionary where the keys are strings and the values can be of any data type.
+        payload (Dict[str, Any] | LoanApplication): The input data in JSON or dictionary where the keys are strings and the values can be of any data type.
+            A LoanApplication was validated when it was built and cannot have changed since, so it is accepted as is.
 
     Returns:
         Tuple:
@@ -42,7 +48,8 @@ def validate_payload(payload: Dict[str, Any], logger) -> Tuple[bool, Optional[Di
               - {'type': 'greater_than', 'loc': ('person_age',), 'msg': 'Input should be greater than 0', 'input': -35.0, 'ctx': {'gt': 0.0}, 'url': 'https://errors.pydantic.dev/2.11/v/greater_than'}
     """
     try:
-        LoanApplication(**payload)
+        if not isinstance(payload, LoanApplication):
+            LoanApplication(**payload)
         logger.info("Payload validated successfully.")
         return True, None
 
@@ -53,4 +60,48 @@ def validate_payload(payload: Dict[str, Any], logger) -> Tuple[bool, Optional[Di
     except Exception as e:
         logger.exception("Unexpected error during payload validation.")
         return False, {"error": str(e)}
-    
\ No newline at end of file
+
+
+_APPLICATION_FIELDS = tuple(LoanApplication.model_fields)
+
+
+def prediction_record(application: LoanApplication, **fields) -> Dict[str, Any]:
+    """
+    Returns the application's field values plus `fields` (loan_status, confidence, ...) as one persistence record.
+
+    The declared fields are read from the validated model as they are, without serialising it through `model_dump`.
+    """
+    record = {name: getattr(application, name) for name in _APPLICATION_FIELDS}
+    record.update(fields)
+    return record
+
+
+_application_list = TypeAdapter(list[LoanApplication])
+
+
+def validate_batch(rows: List[Any]) -> Tuple[List[LoanApplication], List[int], Dict[int, List[Dict[str, Any]]]]:
+    """
+    Validates many payloads against LoanApplication in one pass.
+
+    The whole list is validated with a single compiled TypeAdapter call; only when
+    that fails are the errors split per row and the remaining rows validated again.
+
+    Args:
+        rows (List[Any]): The decoded payloads, usually dictionaries.
+
+    Returns:
+        Tuple:
+            - List[LoanApplication]: The valid applications, in input order.
+            - List[int]: The input index of each valid application.
+            - Dict[int, List[Dict[str, Any]]]: The validation errors of each invalid row, keyed by input index.
+    """
+    try:
+        return _application_list.validate_python(rows), list(range(len(rows))), {}
+    except ValidationError as e:
+        errors: Dict[int, List[Dict[str, Any]]] = {}
+        for error in e.errors(include_url=False):
+            index, *loc = error["loc"]
+            errors.setdefault(index, []).append({**error, "loc": tuple(loc)})
+
+    indices = [i for i in range(len(rows)) if i not in errors]
+    return _application_list.validate_python([rows[i] for i in indices]), indices, errors
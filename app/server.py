@@ -0,0 +1,190 @@
+"""
+Production entry point: a pre-forking master for the API.
+
+The master loads the model resources and imports the heavy libraries once,
+freezes the garbage collector's view of them and then forks the uvicorn
+workers, which share those pages copy-on-write instead of each loading their
+own copy (`uvicorn --workers` spawns fresh interpreters). The master holds no
+threads, database connections or event loop, so forking it is safe. Workers
+open their database pools after the fork, and a worker that dies is replaced
+by forking the master again.
+
+Workers do not create the schema; run the migration once per deployment:
+    python -m app.server migrate
+    python -m app.server --workers 4 --host 0.0.0.0 --port 8000
+or let a single-replica deployment migrate before it serves (the Docker image does):
+    python -m app.server --migrate --host 0.0.0.0 --port 8000
+
+A worker that exits within WORKER_FAST_EXIT_S of being started is re-forked
+after an exponentially growing delay; after WORKER_MAX_FAST_EXITS such exits
+in a row the master stops and exits with an error instead of crash-looping.
+"""
+import argparse
+import gc
+import logging
+import os
+import signal
+import time
+
+import uvicorn
+
+from .memory import memory_usage
+
+logger = logging.getLogger("loan_predictor")
+
+WORKER_FAST_EXIT_S = float(os.getenv("WORKER_FAST_EXIT_S", 10))
+WORKER_MAX_FAST_EXITS = int(os.getenv("WORKER_MAX_FAST_EXITS", 5))
+WORKER_RESTART_BACKOFF_S = float(os.getenv("WORKER_RESTART_BACKOFF_S", 0.5))
+WORKER_RESTART_BACKOFF_MAX_S = float(os.getenv("WORKER_RESTART_BACKOFF_MAX_S", 30))
+
+def preload() -> None:
+    """
+    Imports what the workers need and loads the model resources into the master.
+    """
+    # Everything app.main imports, but not app.main itself: it starts threads
+    # and opens database connections, neither of which survives a fork
+    import fastapi  # noqa: F401
+    import sqlalchemy.orm, sqlalchemy.ext.asyncio  # noqa: F401,E401 -- app.crud imports them lazily
+    import database.models  # noqa: F401
+    from . import batching, bulk, cache, crud, executor, idempotency, persistence, registry, schemas  # noqa: F401
+    from . import services
+
+    services.load_resources(logger)
+
+
+def migrate() -> None:
+    """
+    Creates the database schema, or brings one from an earlier release up to
+    date; a one-off step before starting the workers.
+
+    Raises:
+        RuntimeError: If the schema is still incomplete afterwards.
+    """
+    from .crud import check_schema, create_db, init_db
+    from database import base
+
+    init_db()
+    create_db()
+    try:
+        check_schema()
+    finally:
+        base.engine.dispose()
+
+
+def run_worker(config: uvicorn.Config, sock) -> None:
+    for sig in (signal.SIGTERM, signal.SIGINT):
+        signal.signal(sig, signal.SIG_DFL)
+    gc.enable()
+    # app.main installs the API's own log handler
+    logging.getLogger().handlers.clear()
+
+    config.load()
+    logger.info("Worker %d ready: %s", os.getpid(), memory_usage())
+    uvicorn.Server(config).run(sockets=[sock])
+
+
+def fork_worker(config: uvicorn.Config, sock) -> int:
+    pid = os.fork()
+    if pid == 0:
+        code = 0
+        try:
+            run_worker(config, sock)
+        except BaseException:
+            logger.exception("Worker %d crashed.", os.getpid())
+            code = 1
+        finally:
+            logging.shutdown()
+            os._exit(code)
+    return pid
+
+
+def serve(host: str, port: int, workers: int, log_level: str = "info") -> None:
+    """
+    Loads the model, binds the socket and runs `workers` forked uvicorn workers until SIGTERM/SIGINT.
+
+    Raises:
+        SystemExit: If workers keep exiting right after being started (WORKER_MAX_FAST_EXITS in a row).
+    """
+    # Workers inherit the environment; the schema is created by `migrate`
+    os.environ["DB_CREATE_SCHEMA"] = "false"
+
+    gc.disable()
+    preload()
+    config = uvicorn.Config("app.main:app", host=host, port=port, log_level=log_level)
+    sock = config.bind_socket()
+    sock.set_inheritable(True)
+
+    # Move everything loaded so far out of the collector's reach, so collections
+    # in the workers do not write to (and un-share) these pages
+    gc.collect()
+    gc.freeze()
+    logger.info("Master %d loaded the model: %s", os.getpid(), memory_usage())
+
+    # pid -> time.monotonic() when it was forked
+    children: dict[int, float] = {}
+    stopping = False
+    fast_exits = 0
+
+    def stop(signum=None, frame=None) -> None:
+        nonlocal stopping
+        stopping = True
+        for pid in children:
+            try:
+                os.kill(pid, signal.SIGTERM)
+            except ProcessLookupError:
+                pass
+
+    signal.signal(signal.SIGTERM, stop)
+    signal.signal(signal.SIGINT, stop)
+
+    for _ in range(workers):
+        children[fork_worker(config, sock)] = time.monotonic()
+    logger.info("Started %d workers on %s:%d.", workers, host, port)
+
+    while children:
+        pid, status = os.wait()
+        started = children.pop(pid, None)
+        if stopping or started is None:
+            continue
+        code = os.waitstatus_to_exitcode(status)
+        fast_exits = fast_exits + 1 if time.monotonic() - started < WORKER_FAST_EXIT_S else 0
+        if fast_exits >= WORKER_MAX_FAST_EXITS:
+            logger.error("Worker %d exited with status %d, %d workers in a row exited right after start; stopping.",
+                         pid, code, fast_exits)
+            stop()
+            continue
+        delay = min(WORKER_RESTART_BACKOFF_MAX_S, WORKER_RESTART_BACKOFF_S * 2 ** (fast_exits - 1)) if fast_exits else 0.0
+        logger.warning("Worker %d exited with status %d; starting a new one in %.1fs.", pid, code, delay)
+        # Sleep in steps so SIGTERM during the back-off is not held up
+        resume_at = time.monotonic() + delay
+        while not stopping and time.monotonic() < resume_at:
+            time.sleep(min(0.1, resume_at - time.monotonic()))
+        if not stopping:
+            children[fork_worker(config, sock)] = time.monotonic()
+    sock.close()
+    if fast_exits >= WORKER_MAX_FAST_EXITS:
+        raise SystemExit("Workers keep exiting right after start, see the log above")
+    logger.info("All workers stopped.")
+
+
+def main(argv: list[str] | None = None) -> None:
+    parser = argparse.ArgumentParser(prog="python -m app.server", description="Run the API with pre-forked workers.")
+    parser.add_argument("command", nargs="?", choices=("serve", "migrate"), default="serve")
+    parser.add_argument("--host", default=os.getenv("HOST", "127.0.0.1"))
+    parser.add_argument("--port", type=int, default=int(os.getenv("PORT", 8000)))
+    parser.add_argument("--workers", type=int, default=int(os.getenv("WEB_CONCURRENCY", os.cpu_count() or 1)))
+    parser.add_argument("--log-level", default="info")
+    parser.add_argument("--migrate", action="store_true", help="Run the migration before serving")
+    args = parser.parse_args(argv)
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s - %(levelname)s - %(name)s - %(message)s")
+
+    if args.command == "migrate":
+        migrate()
+    else:
+        if args.migrate:
+            migrate()
+        serve(args.host, args.port, max(1, args.workers), args.log_level)
+
+
+if __name__ == "__main__":
+    main()
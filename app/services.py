@@ -1,9 +1,51 @@
-import joblib
-import yaml
-import pandas as pd
+import os
+import sys
+import time
+import hashlib
+import random
+import dataclasses
+import importlib
+import typing
+import warnings
+import numpy as np
 import logging 
 
+from .artifacts import MANIFEST_FILE, ArtifactError, load_bundle as load_artifact
+from .encoder import FeatureEncoder, extract_affine
+from .inference import BoosterPredictor
+from .registry import ModelBundle
+from .schemas import LoanApplication
+
+if typing.TYPE_CHECKING:
+    import pandas as pd
+
+# Only needed to load the pickles or for the DataFrame path; imported on first
+# use so that importing the API stays fast (see benchmarks/bench_startup.py)
+_LAZY_MODULES = {"joblib": "joblib", "yaml": "yaml", "pd": "pandas"}
+
+def __getattr__(name: str):
+    if name in _LAZY_MODULES:
+        module = importlib.import_module(_LAZY_MODULES[name])
+        globals()[name] = module
+        return module
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+def scale_rows(scaler, X):
+    """
+    `scaler.transform(X)` for rows the encoder already laid out in `features` order.
+
+    sklearn's feature-name check on plain arrays is noise here, so its warning is
+    silenced for this call only, not for the whole interpreter.
+    """
+    with warnings.catch_warnings():
+        warnings.filterwarnings("ignore", message="X does not have valid feature names", category=UserWarning)
+        return scaler.transform(X)
+
 # Define global variables
+# `bundle` is the active, immutable set of resources; hot paths take one
+# snapshot of it per request. The individual globals below mirror it for
+# code that predates hot reloading.
+bundle: ModelBundle | None = None
 model: object = None
 scaler: object = None
 features: list[str] = []
@@ -12,14 +54,67 @@ default_map: dict[str, int] = {}
 education_order: dict[str, int] = {}
 home_ownership_options: list[str] = []
 loan_intent_options: list[str] = []
+encoder: FeatureEncoder | None = None
+scaled_encoder: FeatureEncoder | None = None
+predictor: BoosterPredictor | None = None
+resource_fingerprint: str = ""
+
+RESOURCE_FILES = (
+    "models/xgb_model.pkl",
+    "models/scaler.pkl",
+    "models/feature_names.pkl",
+    "models/config.yaml",
+)
 
 def load_resources(logger: logging.Logger) -> None:
     """
     Loads model, scaler, features, and configuration.
     """
+    activate_bundle(build_bundle(logger))
 
-    global model, scaler, features
-    global gender_map, default_map, education_order, home_ownership_options, loan_intent_options
+def artifact_dir() -> str:
+    """
+    Returns the exported model artifact directory, or "" if there is none to load.
+    """
+    path = os.getenv("MODEL_ARTIFACT_DIR", "models/bundle")
+    return path if path and os.path.exists(os.path.join(path, MANIFEST_FILE)) else ""
+
+def resource_files() -> tuple[str, ...]:
+    """
+    Returns the files a bundle is loaded from: the artifact manifest if one
+    was exported (it carries the checksums of the data files), else the pickles.
+    With an artifact, the pickles that exist are included too: the artifact is
+    only used while they match the checksums it was exported from.
+    """
+    path = artifact_dir()
+    if not path:
+        return RESOURCE_FILES
+    return (os.path.join(path, MANIFEST_FILE), *(f for f in RESOURCE_FILES if os.path.exists(f)))
+
+def current_fingerprint() -> str:
+    return fingerprint_files(resource_files())
+
+def _load_artifact(path: str, logger: logging.Logger):
+    """
+    Loads model, scaler, features and configuration from an exported artifact.
+
+    Returns:
+        Tuple: - model, scaler, features and the configuration dict.
+    """
+    verify = os.getenv("MODEL_ARTIFACT_VERIFY", "true").lower() in ("1", "true", "yes")
+    model, scaler, features, config, manifest = load_artifact(path, verify=verify)
+    logger.info("Model bundle %s loaded from %s.", manifest["version"], path)
+    return model, scaler, features, config
+
+def _load_pickles(logger: logging.Logger):
+    """
+    Loads model, scaler, features and configuration from the pickles and config.yaml.
+
+    Returns:
+        Tuple: - model, scaler, features and the configuration dict.
+    """
+    import joblib
+    import yaml
 
     logger.debug("Starting to load model, scaler, and feature files.")
     try:
@@ -41,31 +136,336 @@ def load_resources(logger: logging.Logger) -> None:
     try:
         with open("models/config.yaml", "r") as f:
             config = yaml.safe_load(f)
-
-        gender_map = config["gender_map"]
-        default_map = config["default_map"]
-        education_order = config["education_order"]
-        home_ownership_options = config["home_ownership_options"]
-        loan_intent_options = config["loan_intent_options"]
-
-        logger.info("Configuration loaded successfully from config.yaml.")
     except FileNotFoundError as e:
         logger.error("Configuration file 'config.yaml' not found: %s", e)
         raise
-    except KeyError as e:
-        logger.error("Missing expected key in config.yaml: %s", e)
-        raise
     except yaml.YAMLError as e:
         logger.error("YAML parsing error in config.yaml: %s", e)
         raise
     except Exception as e:
         logger.exception("Unexpected error while loading configuration.")
         raise
+    return model, scaler, features, config
+
+def build_bundle(logger: logging.Logger, attempts: int = 3) -> ModelBundle:
+    """
+    Loads model, scaler, features and configuration into a new ModelBundle
+    without touching the active one. An exported artifact (see app.artifacts)
+    is preferred; if it is unusable, the pickles are loaded instead.
+
+    The files are fingerprinted before loading and again after; if they changed
+    in between (a deploy copying new files), the load is repeated, up to `attempts` times.
+
+    Raises:
+        RuntimeError: If the files changed during every attempt.
+    """
+    for attempt in range(1, attempts + 1):
+        files = resource_files()
+        fingerprint = fingerprint_files(files)
+        new_bundle = _build_bundle(logger, fingerprint)
+        if fingerprint_files(resource_files()) == fingerprint:
+            return new_bundle
+        logger.warning("Model files changed while they were loaded (attempt %d of %d).", attempt, attempts)
+    raise RuntimeError(f"Model files kept changing while they were loaded ({attempts} attempts)")
+
+def _build_bundle(logger: logging.Logger, fingerprint: str) -> ModelBundle:
+    path = artifact_dir()
+    sources = None
+    if path:
+        try:
+            sources = _load_artifact(path, logger)
+        except ArtifactError as e:
+            logger.error("Model artifact unusable, falling back to the pickles: %s", e)
+    model, scaler, features, config = sources or _load_pickles(logger)
+
+    try:
+        predictor = BoosterPredictor(
+            model,
+            nthread=int(os.getenv("XGB_NTHREAD", 0)),
+            row_nthread=int(os.getenv("XGB_ROW_NTHREAD", 1)),
+            small_batch_max=int(os.getenv("XGB_SMALL_BATCH_MAX", 16)),
+        )
+        logger.info("Native booster ready for inplace prediction.")
+    except (AttributeError, TypeError, ValueError) as e:
+        predictor = None
+        logger.warning("Native booster unavailable, falling back to model.predict_proba: %s", e)
+
+    try:
+        gender_map = config["gender_map"]
+        default_map = config["default_map"]
+        education_order = config["education_order"]
+        home_ownership_options = config["home_ownership_options"]
+        loan_intent_options = config["loan_intent_options"]
+
+        logger.info("Configuration loaded successfully.")
+    except KeyError as e:
+        logger.error("Missing expected key in the configuration: %s", e)
+        raise
+
+    encoder = FeatureEncoder(
+        features,
+        gender_map,
+        default_map,
+        education_order,
+        home_ownership_options,
+        loan_intent_options,
+        dtype=os.getenv("FEATURE_DTYPE", "float64"),
+    )
+    logger.info("Feature encoder compiled for %d features.", encoder.width)
+
+    try:
+        center, scale = extract_affine(scaler, encoder.width)
+        scaled_encoder = FeatureEncoder(
+            features,
+            gender_map,
+            default_map,
+            education_order,
+            home_ownership_options,
+            loan_intent_options,
+            dtype=encoder.dtype,
+            center=center,
+            scale=scale,
+        )
+        logger.info("Scaler folded into the feature encoder.")
+    except (TypeError, ValueError, AttributeError) as e:
+        scaled_encoder = None
+        logger.warning("Scaler cannot be folded, falling back to scaler.transform: %s", e)
+
+    logger.info("Resource fingerprint: %s", fingerprint[:16])
+
+    new_bundle = ModelBundle(
+        model=model,
+        scaler=scaler,
+        features=features,
+        gender_map=gender_map,
+        default_map=default_map,
+        education_order=education_order,
+        home_ownership_options=home_ownership_options,
+        loan_intent_options=loan_intent_options,
+        encoder=encoder,
+        scaled_encoder=scaled_encoder,
+        predictor=predictor,
+        resource_fingerprint=fingerprint,
+        loaded_at=time.time(),
+    )
+
+    if scaled_encoder is not None and os.getenv("VERIFY_SCALER", "false").lower() in ("1", "true", "yes"):
+        if not verify_scaled_encoder(logger, bundle=new_bundle):
+            new_bundle = dataclasses.replace(new_bundle, scaled_encoder=None)
+
+    return new_bundle
+
+def activate_bundle(new_bundle: ModelBundle) -> None:
+    """
+    Makes `new_bundle` the active one. Readers of `bundle` switch over in a
+    single reference assignment; the legacy globals are updated first.
+    """
+    global bundle, model, scaler, features
+    global gender_map, default_map, education_order, home_ownership_options, loan_intent_options
+    global encoder, scaled_encoder, predictor, resource_fingerprint
+
+    model = new_bundle.model
+    scaler = new_bundle.scaler
+    features = new_bundle.features
+    gender_map = new_bundle.gender_map
+    default_map = new_bundle.default_map
+    education_order = new_bundle.education_order
+    home_ownership_options = new_bundle.home_ownership_options
+    loan_intent_options = new_bundle.loan_intent_options
+    encoder = new_bundle.encoder
+    scaled_encoder = new_bundle.scaled_encoder
+    predictor = new_bundle.predictor
+    resource_fingerprint = new_bundle.resource_fingerprint
+    bundle = new_bundle
+
+def current_bundle() -> ModelBundle | None:
+    return bundle
+
+def _resources(snapshot: ModelBundle | None):
+    # A bundle snapshot, or this module's globals (which mirror the active bundle)
+    return snapshot if snapshot is not None else sys.modules[__name__]
+
+def fingerprint_files(paths) -> str:
+    """
+    Returns a SHA-256 over the path, size and modification time of each file in
+    `paths`, identifying the loaded model resources without re-reading them.
+    """
+    digest = hashlib.sha256()
+    for path in paths:
+        stat = os.stat(path)
+        digest.update(f"{path}:{stat.st_size}:{stat.st_mtime_ns};".encode())
+    return digest.hexdigest()
+
+def init_worker(nthread: int | None = None) -> None:
+    """
+    Process-pool initializer: loads the model into the worker unless it was
+    already inherited from the parent through fork.
+
+    `nthread` overrides XGB_NTHREAD in this worker only.
+    """
+    if nthread is not None:
+        os.environ["XGB_NTHREAD"] = str(nthread)
+    if model is None:
+        load_resources(logging.getLogger("loan_predictor"))
+
+def synthetic_applications(n: int, seed: int = 0) -> list[LoanApplication]:
+    """
+    Generates `n` valid, reproducible LoanApplication objects covering every categorical value.
+    """
+    rng = random.Random(seed)
+    choices = {
+        name: typing.get_args(field.annotation)
+        for name, field in LoanApplication.model_fields.items()
+        if typing.get_origin(field.annotation) is typing.Literal
+    }
+
+    return [
+        LoanApplication(
+            person_age=rng.uniform(18.0, 80.0),
+            person_income=rng.uniform(0.0, 250000.0),
+            person_emp_exp=rng.randint(0, 40),
+            loan_amnt=rng.uniform(500.0, 50000.0),
+            loan_int_rate=rng.uniform(3.0, 25.0),
+            loan_percent_income=rng.uniform(0.0, 0.8),
+            cb_person_cred_hist_length=rng.uniform(0.0, 30.0),
+            credit_score=rng.randint(300, 850),
+            **{name: rng.choice(values) for name, values in choices.items()},
+        )
+        for _ in range(n)
+    ]
+
+def verify_scaled_encoder(logger: logging.Logger, n_samples: int = 256, bundle: ModelBundle | None = None) -> bool:
+    """
+    Checks the folded encoder against `scaler.transform` on synthetic applications.
+    """
+    r = _resources(bundle)
+    applications = synthetic_applications(n_samples)
+    expected = scale_rows(r.scaler, r.encoder.encode_batch(applications))
+    actual = r.scaled_encoder.encode_batch(applications)
+
+    tolerance = float(np.finfo(r.scaled_encoder.dtype).eps) * 16
+    max_error = float(np.nanmax(np.abs(actual - expected), initial=0.0))
+    if not np.allclose(actual, expected, rtol=tolerance, atol=tolerance, equal_nan=True):
+        logger.error(
+            "Folded scaler does not match scaler.transform (max abs error %.3g), disabling fast path.",
+            max_error,
+        )
+        return False
+
+    logger.info("Folded scaler verified on %d samples (max abs error %.3g).", n_samples, max_error)
+    return True
+
+def warm_up(bundle: ModelBundle, logger: logging.Logger, n_rows: int = 64) -> None:
+    """
+    Runs synthetic applications through a freshly loaded bundle, one row and a
+    full batch, so its first real requests do not pay for lazy initialisation.
+
+    Raises:
+        RuntimeError: If the bundle produces non-finite probabilities.
+    """
+    applications = synthetic_applications(max(1, n_rows))
+    for size in (1, len(applications)):
+        X = prepare_batch(applications[:size], logger, bundle)
+        probs = predict_proba(X, bundle)
+        if not np.isfinite(probs).all():
+            raise RuntimeError("Model produced non-finite probabilities during warm-up")
+    logger.info("Warmed up model %s with %d synthetic rows.", bundle.resource_fingerprint[:16], len(applications))
+
+def encode_input(application, logger: logging.Logger, bundle: ModelBundle | None = None) -> np.ndarray:
+    """
+    Encodes a validated LoanApplication into a (1, n_features) array in `features` order.
+
+    This is the pandas-free equivalent of `preprocess_input`.
+    """
+    r = _resources(bundle)
+    if r.encoder is None:
+        raise RuntimeError("Feature encoder is not loaded.")
+
+    try:
+        return r.encoder.encode(application)
+    except AttributeError as e:
+        logger.error("Missing field while encoding input: %s", e)
+        raise ValueError(f"Missing required field: {e}")
+
+def prepare_input(application, logger: logging.Logger, bundle: ModelBundle | None = None) -> np.ndarray:
+    """
+    Encodes and scales a validated LoanApplication into a model-ready (1, n_features) array.
+
+    Uses the folded encoder when available, otherwise `scaler.transform` on the encoded row.
+    Pass a `bundle` snapshot to encode for that bundle instead of the module globals.
+    """
+    r = _resources(bundle)
+    if r.scaled_encoder is None:
+        return scale_rows(r.scaler, encode_input(application, logger, bundle))
+
+    try:
+        return r.scaled_encoder.encode(application)
+    except AttributeError as e:
+        logger.error("Missing field while encoding input: %s", e)
+        raise ValueError(f"Missing required field: {e}")
+
+def prepare_batch(applications, logger: logging.Logger, bundle: ModelBundle | None = None) -> np.ndarray:
+    """
+    Encodes and scales a sequence of validated LoanApplications into one model-ready matrix.
+    """
+    r = _resources(bundle)
+    try:
+        if r.scaled_encoder is None:
+            return scale_rows(r.scaler, r.encoder.encode_batch(applications))
+        return r.scaled_encoder.encode_batch(applications)
+    except AttributeError as e:
+        logger.error("Missing field while encoding batch: %s", e)
+        raise ValueError(f"Missing required field: {e}")
 
-def preprocess_input(input_data: dict, logger: logging.Logger) -> pd.DataFrame:
+def prepare_columns(columns, logger: logging.Logger, bundle: ModelBundle | None = None) -> np.ndarray:
+    """
+    Encodes and scales validated applications held column-wise (e.g. a DataFrame chunk)
+    into one model-ready matrix.
+    """
+    r = _resources(bundle)
+    try:
+        if r.scaled_encoder is None:
+            return scale_rows(r.scaler, r.encoder.encode_columns(columns))
+        return r.scaled_encoder.encode_columns(columns)
+    except KeyError as e:
+        logger.error("Missing column while encoding batch: %s", e)
+        raise ValueError(f"Missing required field: {e}")
+
+def score_applications(applications, logger: logging.Logger, bundle: ModelBundle | None = None) -> list[dict[str, float | int]]:
+    """
+    Encodes, scales and predicts a batch of validated LoanApplications with one model call.
+
+    Returns one {"prediction", "confidence"} dict per application, in order.
+    """
+    bundle = bundle or current_bundle()
+    return score_matrix(prepare_batch(applications, logger, bundle), logger, bundle)
+
+def score_matrix(X: np.ndarray, logger: logging.Logger, bundle: ModelBundle | None = None) -> list[dict[str, float | int]]:
+    """
+    Predicts already encoded and scaled rows (e.g. stacked `prepare_input` rows) with one model call.
+
+    The rows must have been encoded for the same `bundle`.
+
+    Returns one {"prediction", "confidence"} dict per row, in order.
+    """
+    pred_class, confidence = predict_batch(X, logger, bundle)
+    return [
+        {"prediction": int(p), "confidence": float(c)}
+        for p, c in zip(pred_class.tolist(), confidence.tolist())
+    ]
+
+def loan_status(prediction: int) -> str:
+    """
+    Maps a predicted class to the status returned to clients and stored with the loan.
+    """
+    return "Approved" if prediction == 1 else "Rejected"
+
+def preprocess_input(input_data: dict, logger: logging.Logger) -> "pd.DataFrame":
     """
     Converts raw user input into a DataFrame suitable for prediction.
     """
+    import pandas as pd
+
     logger.debug("Starting preprocessing with input data: %s", input_data)
 
     try:
@@ -115,19 +515,59 @@ def preprocess_input(input_data: dict, logger: logging.Logger) -> pd.DataFrame:
     logger.info("Input data preprocessed successfully.")
     return df
 
-def predict(df: pd.DataFrame, logger: logging.Logger) -> dict[str, float | int]:
+def predict_proba(X: np.ndarray, bundle: ModelBundle | None = None) -> np.ndarray:
+    """
+    Returns class probabilities for already-scaled rows.
+
+    Uses the native booster when it was built from the currently loaded model,
+    otherwise the sklearn wrapper's `predict_proba`.
+    """
+    r = _resources(bundle)
+    if r.predictor is not None and r.predictor.source is r.model:
+        return r.predictor.predict_proba(X)
+    return r.model.predict_proba(X)
+
+def predict_batch(X: np.ndarray, logger: logging.Logger, bundle: ModelBundle | None = None) -> tuple[np.ndarray, np.ndarray]:
+    """
+    Predicts a matrix of already-scaled rows in one call.
+
+    Returns:
+        Tuple:
+            - np.ndarray: The predicted class of every row.
+            - np.ndarray: The probability of that class.
+    """
+    try:
+        probs = predict_proba(X, bundle)
+        pred_class = probs.argmax(axis=1)
+        confidence = probs[np.arange(len(probs)), pred_class].astype(np.float64)
+        logger.debug("Batch prediction successful for %d rows.", len(pred_class))
+        return pred_class, confidence
+    except ValueError as e:
+        logger.error("Value error during batch prediction: %s", e)
+        raise RuntimeError(f"Invalid input for prediction: {e}")
+    except AttributeError as e:
+        logger.error("Model not properly loaded: %s", e)
+        raise RuntimeError(f"Model state error: {e}")
+    except Exception as e:
+        logger.exception("Unexpected error during batch prediction.")
+        raise RuntimeError(f"Prediction failed: {e}")
+
+def predict(df: "pd.DataFrame | np.ndarray", logger: logging.Logger, prescaled: bool = False) -> dict[str, float | int]:
     """
     Scales and predicts using the preloaded model.
+
+    Accepts either the DataFrame from `preprocess_input` or the array from `encode_input`.
+    Pass `prescaled=True` for rows from `prepare_input`, which are already scaled.
     """
     logger.debug("Starting prediction with DataFrame: %s", df)
 
     try:
-        scaled = scaler.transform(df)
-        probs = model.predict_proba(scaled)[0]
+        scaled = df if prescaled else scale_rows(scaler, df)
+        probs = predict_proba(scaled)[0]
         pred_class = int(probs.argmax())
         confidence = float(probs[pred_class])
 
-        logger.info(f"Prediction successful: Class {pred_class} (confidence: {confidence:.4f})")
+        logger.info("Prediction successful: Class %s (confidence: %.4f)", pred_class, confidence)
 
         return {
             "prediction": pred_class,
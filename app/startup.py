@@ -0,0 +1,71 @@
+import logging
+import threading
+import time
+from typing import Any, Awaitable, Callable
+
+
+class StartupState:
+    """
+    Start-up progress of the API, for the liveness and readiness probes.
+
+    The process is live as soon as it serves requests; it is ready once every
+    start-up stage (model load, database setup, warm-up, ...) has finished.
+    Each stage runs through `stage` or `stage_async`, which record how long it
+    took. A stage that raises records its error, and the process stays
+    unready; the caller may retry the stages, or give up with `mark_failed`,
+    after which the process is no longer live either.
+    """
+
+    def __init__(self, logger: logging.Logger | None = None):
+        self.logger = logger or logging.getLogger("loan_predictor")
+        self.started_at = time.monotonic()
+        self.ready_at: float | None = None
+        self.error: str | None = None
+        self.failed = False
+        self.stages: dict[str, float] = {}
+        self._lock = threading.Lock()
+
+    @property
+    def ready(self) -> bool:
+        return self.ready_at is not None
+
+    def stage(self, name: str, fn: Callable[..., Any], *args) -> Any:
+        started = time.perf_counter()
+        try:
+            return fn(*args)
+        except Exception as e:
+            self.error = f"{name}: {e}"
+            raise
+        finally:
+            with self._lock:
+                self.stages[name] = round(time.perf_counter() - started, 4)
+
+    async def stage_async(self, name: str, fn: Callable[..., Awaitable[Any]], *args) -> Any:
+        started = time.perf_counter()
+        try:
+            return await fn(*args)
+        except Exception as e:
+            self.error = f"{name}: {e}"
+            raise
+        finally:
+            with self._lock:
+                self.stages[name] = round(time.perf_counter() - started, 4)
+
+    def mark_failed(self) -> None:
+        self.failed = True
+
+    def mark_ready(self) -> None:
+        self.ready_at = time.monotonic()
+        self.error = None
+        self.logger.info("Ready %.3fs after start-up began: %s", self.ready_at - self.started_at, self.stages)
+
+    def stats(self) -> dict[str, Any]:
+        with self._lock:
+            stages = dict(self.stages)
+        return {
+            "ready": self.ready,
+            "startup_s": round(self.ready_at - self.started_at, 4) if self.ready_at is not None else None,
+            "stages_s": stages,
+            "error": self.error,
+            "failed": self.failed,
+        }
@@ -0,0 +1,87 @@
+"""
+Shows what admission control does to latency under overload.
+
+A simulated service scores on `--workers` threads for `--service-ms` each,
+so its capacity is workers / service time. Requests arrive open-loop at
+`--overload` times that capacity for `--seconds`, with and without an
+AdmissionController in front. Without it every request is accepted and waits
+behind all earlier ones, so latency grows for as long as the spike lasts;
+with it the excess is shed (503) and the admitted requests keep a flat p99.
+
+Run from the repository root:
+    python -m benchmarks.bench_admission --overload 1.5 --seconds 3
+"""
+import argparse
+import asyncio
+import statistics
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from app.admission import AdmissionController, AdmissionRejected
+
+
+async def spike(args, admission: AdmissionController | None) -> tuple[list[float], int]:
+    loop = asyncio.get_running_loop()
+    executor = ThreadPoolExecutor(args.workers)
+    latencies: list[float] = []
+    shed = 0
+
+    async def request():
+        nonlocal shed
+        started = time.perf_counter()
+        try:
+            if admission is not None:
+                await admission.acquire()
+        except AdmissionRejected:
+            shed += 1
+            return
+        try:
+            await loop.run_in_executor(executor, time.sleep, args.service_ms / 1000)
+        finally:
+            if admission is not None:
+                admission.release()
+        latencies.append(time.perf_counter() - started)
+
+    capacity = args.workers / (args.service_ms / 1000)
+    interval = 1 / (capacity * args.overload)
+    tasks = []
+    started = time.perf_counter()
+    sent = 0
+    while time.perf_counter() - started < args.seconds:
+        due = started + sent * interval
+        if due > time.perf_counter():
+            await asyncio.sleep(due - time.perf_counter())
+        tasks.append(asyncio.create_task(request()))
+        sent += 1
+    await asyncio.gather(*tasks)
+    executor.shutdown()
+    return latencies, shed
+
+
+def report(name: str, latencies: list[float], shed: int) -> None:
+    quantiles = statistics.quantiles(latencies, n=100)
+    print(
+        f"{name:<10} {len(latencies):>8} {shed:>6} "
+        f"{quantiles[49] * 1000:>8.1f} {quantiles[98] * 1000:>8.1f} {max(latencies) * 1000:>8.1f}"
+    )
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--workers", type=int, default=4)
+    parser.add_argument("--service-ms", type=float, default=5.0)
+    parser.add_argument("--overload", type=float, default=1.5)
+    parser.add_argument("--seconds", type=float, default=3.0)
+    parser.add_argument("--max-concurrency", type=int, default=8)
+    parser.add_argument("--max-queue", type=int, default=16)
+    parser.add_argument("--max-wait-ms", type=float, default=50)
+    args = parser.parse_args()
+
+    print(f"{'mode':<10} {'served':>8} {'shed':>6} {'p50 ms':>8} {'p99 ms':>8} {'max ms':>8}")
+    report("unbounded", *asyncio.run(spike(args, None)))
+    admission = AdmissionController(args.max_concurrency, args.max_queue, args.max_wait_ms)
+    report("admission", *asyncio.run(spike(args, admission)))
+
+
+if __name__ == "__main__":
+    main()
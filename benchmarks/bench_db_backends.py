@@ -0,0 +1,89 @@
+"""
+Compares the sync (psycopg2) and async (asyncpg / AsyncSession) database
+backends under the locust workload in tests/stress_test.py.
+
+For each backend it starts the API with PERSIST_MODE=inline, so every request
+commits on the request path, runs locust headless against it and prints the
+/predict latency percentiles and throughput.
+
+Uses the database configured by the DB_* / DATABASE_URL environment variables.
+Run from the repository root:
+    python -m benchmarks.bench_db_backends --users 50 --duration 30s
+"""
+import argparse
+import csv
+import os
+import subprocess
+import sys
+import tempfile
+import time
+import urllib.request
+
+
+def wait_until_up(url: str, timeout: float = 60.0) -> None:
+    """
+    Polls /readyz until it returns 200: `/` answers before the model and database
+    are ready, and /predict returns 503 until then.
+    """
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            # urlopen raises HTTPError, an OSError, for the 503 while starting
+            with urllib.request.urlopen(f"{url}/readyz", timeout=1):
+                return
+        except OSError:
+            time.sleep(0.25)
+    raise RuntimeError(f"API did not become ready at {url}")
+
+
+def run_backend(backend: str, args: argparse.Namespace) -> dict[str, str]:
+    env = {**os.environ, "DB_BACKEND": backend, "PERSIST_MODE": "inline"}
+    host = f"http://127.0.0.1:{args.port}"
+    server = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "app.main:app", "--port", str(args.port), "--log-level", "warning"],
+        env=env,
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.DEVNULL,
+    )
+    try:
+        wait_until_up(host)
+        with tempfile.TemporaryDirectory() as tmp:
+            prefix = os.path.join(tmp, backend)
+            subprocess.run(
+                [
+                    "locust", "-f", "tests/stress_test.py", args.user_class,
+                    "--headless", "--only-summary",
+                    "-u", str(args.users), "-r", str(args.users),
+                    "-t", args.duration, "--host", host, "--csv", prefix,
+                ],
+                check=True,
+                stdout=subprocess.DEVNULL,
+                stderr=subprocess.DEVNULL,
+            )
+            with open(f"{prefix}_stats.csv") as f:
+                rows = {row["Name"]: row for row in csv.DictReader(f)}
+        return rows["/predict"]
+    finally:
+        server.terminate()
+        server.wait(timeout=30)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--users", type=int, default=50)
+    parser.add_argument("--duration", default="30s")
+    parser.add_argument("--user-class", default="DatabaseStressUser")
+    parser.add_argument("--port", type=int, default=8765)
+    args = parser.parse_args()
+
+    print(f"{'backend':<8} {'requests':>9} {'failures':>9} {'req/s':>8} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8}")
+    for backend in ("sync", "async"):
+        row = run_backend(backend, args)
+        print(
+            f"{backend:<8} {row['Request Count']:>9} {row['Failure Count']:>9} "
+            f"{float(row['Requests/s']):>8.1f} {row['50%']:>8} {row['95%']:>8} {row['99%']:>8}"
+        )
+
+
+if __name__ == "__main__":
+    main()
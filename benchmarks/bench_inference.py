@@ -0,0 +1,77 @@
+"""
+Latency benchmark for the /predict inference pipeline (no HTTP, no database).
+
+Compares, per call:
+- legacy:  preprocess_input (pandas) + scaler.transform + XGBClassifier.predict_proba
+- wrapper: prepare_input (folded encoder) + XGBClassifier.predict_proba
+- booster: prepare_input (folded encoder) + native Booster.inplace_predict
+
+Run from the repository root:
+    python -m benchmarks.bench_inference --iterations 2000
+"""
+import argparse
+import logging
+import time
+import warnings
+
+import numpy as np
+
+from app import services
+
+warnings.filterwarnings("ignore")
+
+
+def measure(fn, iterations: int, warmup: int = 50) -> np.ndarray:
+    for _ in range(warmup):
+        fn()
+    timings = np.empty(iterations)
+    for i in range(iterations):
+        start = time.perf_counter()
+        fn()
+        timings[i] = time.perf_counter() - start
+    return timings * 1e6
+
+
+def report(name: str, timings: np.ndarray, rows: int = 1) -> None:
+    p50, p99 = np.percentile(timings, [50, 99])
+    print(f"{name:<28} p50 {p50:10.1f} us   p99 {p99:10.1f} us   {rows / (p50 / 1e6):12.0f} rows/s")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--iterations", type=int, default=2000)
+    parser.add_argument("--batch-sizes", type=int, nargs="+", default=[64, 1024])
+    args = parser.parse_args()
+
+    logger = logging.getLogger("bench")
+    logger.setLevel(logging.CRITICAL)
+    services.load_resources(logger)
+
+    application = services.synthetic_applications(1)[0]
+    payload = application.model_dump()
+
+    print("single row")
+    report("legacy", measure(
+        lambda: services.model.predict_proba(services.scaler.transform(services.preprocess_input(payload, logger))),
+        args.iterations,
+    ))
+    report("wrapper", measure(
+        lambda: services.model.predict_proba(services.prepare_input(application, logger)),
+        args.iterations,
+    ))
+    report("booster", measure(
+        lambda: services.predictor.predict_proba(services.prepare_input(application, logger)),
+        args.iterations,
+    ))
+
+    for size in args.batch_sizes:
+        X = services.scaled_encoder.encode_batch(services.synthetic_applications(size, seed=size))
+        iterations = max(args.iterations // 10, 50)
+        print(f"batch of {size} (pre-encoded)")
+        report("wrapper", measure(lambda: services.model.predict_proba(X), iterations), size)
+        report("booster", measure(lambda: services.predictor.predict_proba(X), iterations), size)
+        report("booster, single thread", measure(lambda: services.predictor.row_booster.inplace_predict(X), iterations), size)
+
+
+if __name__ == "__main__":
+    main()
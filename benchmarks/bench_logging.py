@@ -0,0 +1,117 @@
+"""
+Measures the logging cost a /predict request pays on its own thread.
+
+Each configuration replays the log calls of one request (access-log line,
+"request received", and the DEBUG calls that dump the request, disabled at
+INFO) `--requests` times and reports the time spent in the calling thread
+per request. "drained" is the wall time until the
+queued records were also written, i.e. the work moved off the request path.
+
+  before       synchronous StreamHandler, f-string messages and the five
+               print() calls /predict used to make
+  sync         synchronous StreamHandler, lazy %-style messages, no prints
+  queue        QueueHandler + background listener (the default)
+  queue json   the same with JSON lines
+  queue 10%    the same, keeping one in ten INFO records (LOG_SAMPLE_INFO=0.1)
+
+Output goes to a temporary file; --write-delay-us makes every write block
+for that long, like stdout piped to a busy log collector. Run from the
+repository root:
+    python -m benchmarks.bench_logging --requests 20000 --write-delay-us 50
+"""
+import argparse
+import logging
+import os
+import tempfile
+import time
+
+import pandas as pd
+
+from app.logging_config import configure_logging, request_id_ctx
+
+DATAFRAME = pd.DataFrame([{"person_age": 35.0, "person_income": 60000.0, "loan_amnt": 10000.0, "credit_score": 720}])
+PAYLOAD = {"person_age": 35.0, "person_gender": "male", "person_income": 60000.0, "loan_amnt": 10000.0}
+RESULT = {"prediction": 0, "confidence": 0.98}
+
+
+class SlowFile:
+    """
+    File wrapper whose writes block for `delay` seconds (without holding the GIL).
+    """
+
+    def __init__(self, f, delay: float):
+        self.f = f
+        self.name = f.name
+        self.delay = delay
+
+    def write(self, data: str) -> int:
+        if self.delay:
+            time.sleep(self.delay)
+        return self.f.write(data)
+
+    def flush(self) -> None:
+        self.f.flush()
+
+
+def request_before(logger: logging.Logger, out) -> None:
+    host, port, method, path, version, status = "10.0.0.1", 51234, "POST", "/predict", "1.1", 200
+    logger.info("Prediction request received.")
+    print(f"Result : {RESULT}", file=out)
+    print(f"Inpit Data : {PAYLOAD}", file=out)
+    print(f"Prediction : {0}", file=out)
+    print(f"Confident : {0.98}", file=out)
+    print(f"Status : {'Rejected'}", file=out)
+    logger.info(f'{host}:{port} - "{method} {path} HTTP/{version}" {status}')
+
+
+def request_after(logger: logging.Logger, out) -> None:
+    host, port, method, path, version, status = "10.0.0.1", 51234, "POST", "/predict", "1.1", 200
+    logger.info("Prediction request received.")
+    logger.debug("Initial DataFrame: %s", DATAFRAME)
+    logger.debug("Prediction %s (confidence %.4f) for %s", "Rejected", 0.98, DATAFRAME)
+    logger.info('%s:%s - "%s %s HTTP/%s" %s', host, port, method, path, version, status)
+
+
+def run(name: str, emit, requests: int, write_delay_s: float = 0.0, **options) -> None:
+    logger = logging.getLogger(f"bench.{name}")
+    logger.propagate = False
+    with tempfile.TemporaryDirectory() as tmp, open(os.path.join(tmp, "log"), "w") as f:
+        out = SlowFile(f, write_delay_s)
+        listener = configure_logging(logger, level="INFO", stream=out, **options)
+        request_id_ctx.set("bench")
+
+        started = time.perf_counter()
+        for _ in range(requests):
+            emit(logger, out)
+        calling = time.perf_counter() - started
+        if listener is not None:
+            listener.stop()
+        drained = time.perf_counter() - started
+        out.flush()
+        size = os.path.getsize(out.name)
+
+        for handler in list(logger.handlers):
+            logger.removeHandler(handler)
+
+    print(
+        f"{name:<12} {calling / requests * 1e6:>10.1f} {drained / requests * 1e6:>10.1f} {size / requests:>10.0f}"
+    )
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--requests", type=int, default=20000)
+    parser.add_argument("--write-delay-us", type=float, default=0.0)
+    args = parser.parse_args()
+    delay = args.write_delay_us / 1e6
+
+    print(f"{'mode':<12} {'µs/request':>10} {'drained':>10} {'bytes/req':>10}")
+    run("before", request_before, args.requests, delay, use_queue=False)
+    run("sync", request_after, args.requests, delay, use_queue=False)
+    run("queue", request_after, args.requests, delay)
+    run("queue json", request_after, args.requests, delay, fmt="json")
+    run("queue 10%", request_after, args.requests, delay, sampling={logging.INFO: 0.1})
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,111 @@
+"""
+Measures the per-request overhead of the request ID / access-log middleware.
+
+Calls a trivial FastAPI endpoint through ASGI directly (no sockets), so the
+numbers are the middleware's own cost plus a constant for the endpoint:
+
+  none         no middleware
+  http         the former `@app.middleware("http")` add_request_id (BaseHTTPMiddleware, uuid4)
+  asgi         RequestIDMiddleware (pure ASGI, counter-based IDs)
+  asgi+header  the same with an incoming X-Request-ID
+
+Log records go to a handler that discards them. Run from the repository root:
+    python -m benchmarks.bench_middleware --requests 20000
+"""
+import argparse
+import asyncio
+import logging
+import time
+import uuid
+
+from fastapi import FastAPI, Request
+
+from app.logging_config import request_id_ctx
+from app.middleware import RequestIDMiddleware
+
+logger = logging.getLogger("bench.middleware")
+logger.propagate = False
+logger.setLevel(logging.INFO)
+logger.addHandler(logging.NullHandler())
+
+
+def endpoint_app() -> FastAPI:
+    app = FastAPI()
+
+    @app.get("/ping")
+    async def ping():
+        return {"status": "ok"}
+
+    return app
+
+
+def http_middleware_app() -> FastAPI:
+    app = endpoint_app()
+
+    @app.middleware("http")
+    async def add_request_id(request: Request, call_next):
+        rid = str(uuid.uuid4())
+        request.state.request_id = rid
+        request_id_ctx.set(rid)
+        client = request.client
+        response = await call_next(request)
+        logger.info(
+            '%s:%s - "%s %s HTTP/%s" %s', client.host, client.port, request.method, request.url.path,
+            request.scope.get("http_version", "1.1"), response.status_code, extra={"request_id": rid},
+        )
+        response.headers["X-Request-ID"] = rid
+        return response
+
+    return app
+
+
+def asgi_middleware_app() -> FastAPI:
+    app = endpoint_app()
+    app.add_middleware(RequestIDMiddleware, logger=logger)
+    return app
+
+
+async def run(app, requests: int, headers: list[tuple[bytes, bytes]]) -> float:
+    async def receive():
+        return {"type": "http.request", "body": b"", "more_body": False}
+
+    async def send(message):
+        pass
+
+    def scope():
+        return {
+            "type": "http", "asgi": {"version": "3.0"}, "http_version": "1.1", "method": "GET",
+            "scheme": "http", "path": "/ping", "raw_path": b"/ping", "root_path": "", "query_string": b"",
+            "headers": list(headers), "client": ("10.0.0.1", 51234), "server": ("127.0.0.1", 8000),
+            "app": app,
+        }
+
+    for _ in range(500):
+        await app(scope(), receive, send)
+    started = time.perf_counter()
+    for _ in range(requests):
+        await app(scope(), receive, send)
+    return (time.perf_counter() - started) / requests * 1e6
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--requests", type=int, default=20000)
+    args = parser.parse_args()
+
+    cases = [
+        ("none", endpoint_app(), []),
+        ("http", http_middleware_app(), []),
+        ("asgi", asgi_middleware_app(), []),
+        ("asgi+header", asgi_middleware_app(), [(b"x-request-id", b"upstream-1234")]),
+    ]
+    baseline = None
+    print(f"{'middleware':<12} {'µs/request':>10} {'overhead':>10}")
+    for name, app, headers in cases:
+        per_request = asyncio.run(run(app, args.requests, headers))
+        baseline = per_request if baseline is None else baseline
+        print(f"{name:<12} {per_request:>10.1f} {per_request - baseline:>10.1f}")
+
+
+if __name__ == "__main__":
+    main()
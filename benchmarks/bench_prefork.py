@@ -0,0 +1,91 @@
+"""
+Compares the memory footprint of `uvicorn --workers N`, where every worker is
+a fresh interpreter that loads its own model, with the pre-forking server in
+app.server, where workers share the master's copy.
+
+For each server it starts N workers, sends some /predict traffic so the
+workers have touched their hot paths, and prints every worker's RSS, the part
+of it shared with other processes, and PSS (shared pages split between the
+processes using them). The PSS total is what the workers really cost.
+
+Uses the database configured by the DB_* / DATABASE_URL environment variables.
+Run from the repository root after `python -m app.server migrate`:
+    python -m benchmarks.bench_prefork --workers 4
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+import time
+import urllib.request
+
+from app.memory import memory_usage
+from benchmarks.bench_db_backends import wait_until_up
+
+PAYLOAD = json.dumps({
+    "person_age": 35.0,
+    "person_gender": "male",
+    "person_education": "Bachelor",
+    "person_income": 60000.0,
+    "person_emp_exp": 10,
+    "person_home_ownership": "RENT",
+    "loan_amnt": 10000.0,
+    "loan_intent": "PERSONAL",
+    "loan_int_rate": 12.5,
+    "loan_percent_income": 0.15,
+    "cb_person_cred_hist_length": 4.0,
+    "credit_score": 720,
+    "previous_loan_defaults_on_file": "No",
+}).encode()
+
+
+def children(pid: int) -> list[int]:
+    with open(f"/proc/{pid}/task/{pid}/children") as f:
+        return [int(child) for child in f.read().split()]
+
+
+def measure(name: str, command: list[str], args: argparse.Namespace) -> list[dict]:
+    host = f"http://127.0.0.1:{args.port}"
+    env = {**os.environ, "DB_CREATE_SCHEMA": "false"}
+    started = time.perf_counter()
+    server = subprocess.Popen(command, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    try:
+        wait_until_up(host)
+        up_s = time.perf_counter() - started
+        for _ in range(args.requests):
+            request = urllib.request.Request(
+                f"{host}/predict", data=PAYLOAD, headers={"Content-Type": "application/json"}
+            )
+            with urllib.request.urlopen(request, timeout=10) as response:
+                response.read()
+        workers = [{"pid": pid, **memory_usage(pid)} for pid in children(server.pid)]
+        # uvicorn --workers also runs a multiprocessing helper; only count processes that loaded the API
+        workers = [w for w in workers if w.get("rss_mb", 0) > 50]
+        master = memory_usage(server.pid)
+        print(f"\n{name}: up in {up_s:.1f}s, master RSS {master.get('rss_mb', 0):.1f} MiB, PSS {master.get('pss_mb', 0):.1f} MiB")
+        print(f"{'pid':>8} {'rss MiB':>9} {'shared':>9} {'pss MiB':>9}")
+        for w in workers:
+            print(f"{w['pid']:>8} {w['rss_mb']:>9.1f} {w['shared_mb']:>9.1f} {w['pss_mb']:>9.1f}")
+        print(f"{'total':>8} {sum(w['rss_mb'] for w in workers):>9.1f} {'':>9} {sum(w['pss_mb'] for w in workers):>9.1f}")
+        print(f"PSS of workers and master: {sum(w['pss_mb'] for w in workers) + master.get('pss_mb', 0):.1f} MiB")
+        return workers
+    finally:
+        server.terminate()
+        server.wait(timeout=30)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--workers", type=int, default=4)
+    parser.add_argument("--requests", type=int, default=200)
+    parser.add_argument("--port", type=int, default=8765)
+    args = parser.parse_args()
+
+    port = ["--port", str(args.port), "--workers", str(args.workers), "--log-level", "warning"]
+    measure("uvicorn --workers", [sys.executable, "-m", "uvicorn", "app.main:app", *port], args)
+    measure("app.server (pre-fork)", [sys.executable, "-m", "app.server", *port], args)
+
+
+if __name__ == "__main__":
+    main()
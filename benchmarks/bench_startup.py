@@ -0,0 +1,99 @@
+"""
+Measures how fast a fresh API process becomes useful:
+
+  import_s             `import app.main`
+  ready_s              from the start of the import until /readyz returns 200
+  first_prediction_s   from the start of the import until the first /predict returns
+
+Each run is a new interpreter with a throwaway SQLite database. It also lists
+the heavy libraries that `import app.main` pulled in; they should only load
+during start-up. tests/test_startup.py runs this with time budgets.
+
+Run from the repository root:
+    python -m benchmarks.bench_startup --runs 5
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+
+from benchmarks.bench_prefork import PAYLOAD
+
+# Loaded on start-up or on first use, never by `import app.main`
+HEAVY_MODULES = ("pandas", "sklearn", "scipy", "xgboost", "joblib", "yaml", "sqlalchemy", "uvicorn")
+
+PROBE = """
+import json, sys, time
+started = time.perf_counter()
+import app.main
+imported = time.perf_counter()
+heavy = sorted(name for name in {heavy!r} if name in sys.modules)
+
+from fastapi.testclient import TestClient
+with TestClient(app.main.app) as client:
+    while (readiness := client.get("/readyz")).status_code != 200:
+        time.sleep(0.02)
+    ready = time.perf_counter()
+    response = client.post("/predict", content={payload!r})
+    first = time.perf_counter()
+    assert response.status_code == 200, response.text
+
+print(json.dumps({{
+    "import_s": imported - started,
+    "ready_s": ready - started,
+    "first_prediction_s": first - started,
+    "heavy_modules_on_import": heavy,
+    "stages_s": readiness.json()["stages_s"],
+}}))
+"""
+
+
+def measure_once() -> dict:
+    with tempfile.TemporaryDirectory() as tmp:
+        env = {
+            **os.environ,
+            "DATABASE_URL": f"sqlite:///{os.path.join(tmp, 'startup.db')}",
+            "MODEL_WATCH_INTERVAL_S": "0",
+        }
+        probe = PROBE.format(heavy=HEAVY_MODULES, payload=PAYLOAD)
+        out = subprocess.run(
+            [sys.executable, "-c", probe], env=env, check=True, capture_output=True, text=True
+        ).stdout
+    return json.loads(out.strip().splitlines()[-1])
+
+
+def measure(runs: int = 3) -> dict:
+    """
+    Returns the median timings over `runs` fresh processes, and the heavy
+    modules imported by `import app.main` in any of them.
+    """
+    samples = [measure_once() for _ in range(max(1, runs))]
+    result = {
+        key: statistics.median(sample[key] for sample in samples)
+        for key in ("import_s", "ready_s", "first_prediction_s")
+    }
+    result["heavy_modules_on_import"] = sorted({name for s in samples for name in s["heavy_modules_on_import"]})
+    result["stages_s"] = {
+        stage: statistics.median(sample["stages_s"].get(stage, 0.0) for sample in samples)
+        for stage in samples[0]["stages_s"]
+    }
+    return result
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--runs", type=int, default=5)
+    args = parser.parse_args()
+
+    result = measure(args.runs)
+    print(f"{'import':>10} {'ready':>10} {'first prediction':>18}")
+    print(f"{result['import_s']:>9.3f}s {result['ready_s']:>9.3f}s {result['first_prediction_s']:>17.3f}s")
+    print("start-up stages: " + ", ".join(f"{stage} {s:.3f}s" for stage, s in result["stages_s"].items()))
+    print(f"heavy modules loaded by import: {', '.join(result['heavy_modules_on_import']) or 'none'}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,74 @@
+"""
+Measures the per-request cost of getting a /predict body from JSON to a persistence record.
+
+  before   FastAPI's LoanApplication parse, `model_dump()` for validate_payload,
+           which built a second LoanApplication, and `model_dump()` again for
+           the record
+  after    the same parse into a frozen LoanApplication, which validate_payload
+           accepts as is and `prediction_record` reads without serialising
+
+Encoding and the model call are the same in both and are left out. Reports the
+CPU time per request and, with tracemalloc, the bytes allocated at peak while
+handling one request (CPython has no allocation counter). Run from the repository root:
+    python -m benchmarks.bench_validation --requests 50000
+"""
+import argparse
+import json
+import logging
+import time
+import tracemalloc
+
+from app.schemas import LoanApplication, prediction_record, validate_payload
+from benchmarks.bench_prefork import PAYLOAD
+
+logger = logging.getLogger("bench.validation")
+logger.setLevel(logging.WARNING)
+
+
+def request_before(body: bytes) -> dict:
+    application = LoanApplication.model_validate(json.loads(body))
+    validate_payload(application.model_dump(), logger)
+    return {**application.model_dump(), "loan_status": "Approved", "confidence": 0.9, "idempotency_key": None}
+
+
+def request_after(body: bytes) -> dict:
+    application = LoanApplication.model_validate(json.loads(body))
+    validate_payload(application, logger)
+    return prediction_record(application, loan_status="Approved", confidence=0.9, idempotency_key=None)
+
+
+def cpu_us(handle, requests: int) -> float:
+    for _ in range(1000):
+        handle(PAYLOAD)
+    started = time.process_time()
+    for _ in range(requests):
+        handle(PAYLOAD)
+    return (time.process_time() - started) / requests * 1e6
+
+
+def peak_bytes(handle, samples: int = 200) -> float:
+    total = 0
+    tracemalloc.start()
+    for _ in range(samples):
+        tracemalloc.reset_peak()
+        baseline, _ = tracemalloc.get_traced_memory()
+        handle(PAYLOAD)
+        _, peak = tracemalloc.get_traced_memory()
+        total += peak - baseline
+    tracemalloc.stop()
+    return total / samples
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--requests", type=int, default=50000)
+    args = parser.parse_args()
+
+    assert request_before(PAYLOAD) == request_after(PAYLOAD)
+    print(f"{'mode':<8} {'µs/request':>10} {'peak bytes':>10}")
+    for name, handle in (("before", request_before), ("after", request_after)):
+        print(f"{name:<8} {cpu_us(handle, args.requests):>10.2f} {peak_bytes(handle):>10.0f}")
+
+
+if __name__ == "__main__":
+    main()
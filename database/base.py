@@ -1,5 +1,16 @@
-from sqlalchemy.ext.declarative import declarative_base
-
-Base = declarative_base()
 engine = None
 SessionLocal = None
+
+# Optional asyncio backend (DB_BACKEND=async)
+async_engine = None
+AsyncSessionLocal = None
+
+
+def __getattr__(name: str):
+    # `Base` is built on first use, so importing this module does not load SQLAlchemy
+    if name == "Base":
+        from sqlalchemy.orm import declarative_base
+
+        globals()["Base"] = declarative_base()
+        return globals()["Base"]
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
@@ -1,8 +1,12 @@
+import os
 from dataclasses import dataclass
 from dotenv import load_dotenv
 
 load_dotenv()
 
+def _env_bool(name: str, default: bool) -> bool:
+    return os.getenv(name, str(default)).strip().lower() in ("1", "true", "yes", "on")
+
 @dataclass
 class DatabaseConfig:
     host: str
@@ -10,10 +14,79 @@ class DatabaseConfig:
     database: str
     username: str
     password: str
+
+    # Connection pool settings
+    pool_size: int = 5
+    max_overflow: int = 10
+    pool_timeout: float = 30.0
+    pool_recycle: int = 1800
+    pool_pre_ping: bool = True
+    echo: bool = False
+
+    # Full SQLAlchemy URL; overrides the individual fields (e.g. a SQLite stand-in)
+    url: str | None = None
+
+    @classmethod
+    def from_env(cls) -> "DatabaseConfig":
+        """
+        Builds the config from the DB_* environment variables (see .env).
+        """
+        return cls(
+            host=os.getenv("DB_HOST", "localhost"),
+            port=int(os.getenv("DB_PORT", 5432)),
+            database=os.getenv("DB_NAME", "loan_postgres"),
+            username=os.getenv("DB_USER", "bdpit4"),
+            password=os.getenv("DB_PASSWORD", "Bcabca1"),
+            pool_size=int(os.getenv("DB_POOL_SIZE", 5)),
+            max_overflow=int(os.getenv("DB_MAX_OVERFLOW", 10)),
+            pool_timeout=float(os.getenv("DB_POOL_TIMEOUT", 30)),
+            pool_recycle=int(os.getenv("DB_POOL_RECYCLE", 1800)),
+            pool_pre_ping=_env_bool("DB_POOL_PRE_PING", True),
+            echo=_env_bool("DB_ECHO", False),
+            url=os.getenv("DATABASE_URL") or None,
+        )
     
     @property
     def connection_string(self) -> str:
+        if self.url:
+            return self.url
         return (
             f"postgresql://{self.username}:{self.password}"
             f"@{self.host}:{self.port}/{self.database}"
         )
+
+    @property
+    def async_connection_string(self) -> str:
+        """
+        The same database addressed through an asyncio driver (asyncpg / aiosqlite).
+        """
+        from sqlalchemy.engine import make_url
+
+        url = make_url(self.connection_string)
+        drivers = {"postgresql": "postgresql+asyncpg", "sqlite": "sqlite+aiosqlite"}
+        backend = url.get_backend_name()
+        if backend not in drivers:
+            raise ValueError(f"No async driver configured for {backend!r}")
+        return url.set(drivername=drivers[backend]).render_as_string(hide_password=False)
+
+    @property
+    def engine_options(self) -> dict:
+        """
+        Keyword arguments for `create_engine`.
+        """
+        from sqlalchemy.engine import make_url
+
+        options = {
+            "echo": self.echo,
+            "pool_pre_ping": self.pool_pre_ping,
+            "pool_recycle": self.pool_recycle,
+        }
+        # In-memory SQLite uses a single-connection pool without sizing options
+        url = make_url(self.connection_string)
+        if url.get_backend_name() != "sqlite" or url.database not in (None, "", ":memory:"):
+            options.update(
+                pool_size=self.pool_size,
+                max_overflow=self.max_overflow,
+                pool_timeout=self.pool_timeout,
+            )
+        return options
@@ -17,6 +17,8 @@ class Loan(Base):
     prev_loan_def = Column(String)
     loan_status = Column(String)
     confidence = Column(Float)
+    # Set from the Idempotency-Key header; a retried request is never stored twice
+    idempotency_key = Column(String(255), unique=True, nullable=True)
 
     users = relationship("User", back_populates="loans")
 
@@ -0,0 +1,14 @@
+import os
+import tempfile
+
+# Run the API against a throwaway SQLite database instead of Postgres.
+# Must be set before the app starts, since it connects on start-up.
+os.environ.setdefault(
+    "DATABASE_URL", f"sqlite:///{os.path.join(tempfile.mkdtemp(prefix='loan_api_'), 'test.db')}"
+)
+
+# Load the pickles even if an artifact was exported locally with `python -m app.artifacts export`
+os.environ.setdefault("MODEL_ARTIFACT_DIR", "")
+
+# Locust scenario, run with `locust -f tests/stress_test.py`, not pytest
+collect_ignore = ["stress_test.py"]
@@ -0,0 +1,70 @@
+import asyncio
+
+import pytest
+
+from app.admission import AdmissionController, AdmissionRejected, TokenBucketLimiter
+
+
+def run(coro):
+    return asyncio.run(coro)
+
+
+def test_waiters_get_slots_in_order_and_full_queue_is_shed():
+    admission = AdmissionController(max_concurrency=2, max_queue=2, max_wait_ms=1000)
+    order = []
+
+    async def request(i, hold):
+        await admission.acquire()
+        try:
+            order.append(i)
+            await asyncio.sleep(hold)
+        finally:
+            admission.release()
+
+    async def scenario():
+        running = [asyncio.create_task(request(i, 0.05)) for i in range(4)]
+        await asyncio.sleep(0)
+        assert admission.stats()["in_flight"] == 2 and admission.stats()["queued"] == 2
+        with pytest.raises(AdmissionRejected):
+            await admission.acquire()
+        await asyncio.gather(*running)
+
+    run(scenario())
+    assert order == [0, 1, 2, 3]
+    stats = admission.stats()
+    assert (stats["in_flight"], stats["queued"], stats["admitted"], stats["shed_queue_full"]) == (0, 0, 4, 1)
+
+
+def test_wait_past_deadline_is_shed():
+    admission = AdmissionController(max_concurrency=1, max_queue=4, max_wait_ms=20)
+
+    async def scenario():
+        await admission.acquire()
+        with pytest.raises(AdmissionRejected):
+            await admission.acquire()
+        admission.release()
+        # The shed waiter left no trace: the next request gets the slot at once
+        await admission.acquire()
+        admission.release()
+
+    run(scenario())
+    stats = admission.stats()
+    assert (stats["in_flight"], stats["queued"], stats["shed_timeout"], stats["admitted"]) == (0, 0, 1, 2)
+
+
+def test_token_bucket_limits_each_client(monkeypatch):
+    now = [100.0]
+    monkeypatch.setattr("app.admission.time.monotonic", lambda: now[0])
+    limiter = TokenBucketLimiter(rate=2, burst=3, max_clients=2)
+
+    assert [limiter.take("a") for _ in range(3)] == [0.0, 0.0, 0.0]
+    assert limiter.take("a") == pytest.approx(0.5)
+    assert limiter.take("b") == 0.0
+
+    now[0] += 0.5
+    assert limiter.take("a") == 0.0
+    assert limiter.take("a") > 0
+
+    # A third client evicts the least recently seen bucket ("b")
+    limiter.take("c")
+    assert limiter.stats()["clients"] == 2 and limiter.stats()["limited"] == 2
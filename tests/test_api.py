@@ -1,3 +1,6 @@
+import json
+import time
+
 import pytest
 from fastapi.testclient import TestClient
 from app.main import app
@@ -5,6 +8,17 @@ from app.main import app
 # Create a TestClient for our FastAPI app
 client = TestClient(app)
 
+
+@pytest.fixture(scope="module", autouse=True)
+def started_app():
+    # Entering the client runs the lifespan; the model and database are set up in the background
+    with client:
+        deadline = time.monotonic() + 60
+        while client.get("/readyz").status_code != 200:
+            assert time.monotonic() < deadline, client.get("/readyz").json()
+            time.sleep(0.05)
+        yield
+
 # A valid payload matching LoanApplication schema
 def valid_payload():
     return {
@@ -24,6 +38,73 @@ def valid_payload():
     }
 
 
+def test_liveness_and_readiness():
+    assert client.get("/livez").json() == {"status": "Alive"}
+
+    readiness = client.get("/readyz")
+    assert readiness.status_code == 200
+    assert readiness.json()["status"] == "Ready"
+    assert {"database", "db_pool", "warm_up"} <= readiness.json()["stages_s"].keys()
+
+
+def test_predict_waits_for_startup(monkeypatch):
+    from app import main
+
+    monkeypatch.setattr(main.startup, "ready_at", None)
+
+    response = client.post("/predict", json=valid_payload())
+    assert response.status_code == 503
+    assert response.headers["Retry-After"] == "1"
+    assert client.get("/readyz").json()["status"] == "Starting"
+
+
+def test_start_up_retries_until_the_database_is_up(monkeypatch):
+    from app import main
+    from app.startup import StartupState
+    from database.database_config import DatabaseConfig
+
+    real_init_db = main.init_db
+    attempts = []
+
+    def init_db_once_the_database_is_up():
+        attempts.append(1)
+        if len(attempts) == 1:
+            config = DatabaseConfig.from_env()
+            config.url = "sqlite:////nonexistent/loans.db"
+            return real_init_db(config)
+        return real_init_db()
+
+    monkeypatch.setattr(main, "startup", StartupState())
+    monkeypatch.setattr(main, "init_db", init_db_once_the_database_is_up)
+    monkeypatch.setattr(main, "STARTUP_RETRY_BACKOFF_S", 0.01)
+    monkeypatch.setattr(main, "WARMUP_PREDICTIONS", 0)
+    client.portal.call(main.start)
+
+    assert len(attempts) == 2
+    assert main.startup.ready and not main.startup.failed
+    assert client.get("/livez").status_code == 200
+
+
+def test_start_up_gives_up_and_fails_liveness(monkeypatch):
+    from app import main
+    from app.startup import StartupState
+
+    def unreachable():
+        raise ConnectionError("connection refused")
+
+    monkeypatch.setattr(main, "startup", StartupState())
+    monkeypatch.setattr(main, "init_db", unreachable)
+    monkeypatch.setattr(main, "STARTUP_ATTEMPTS", 3)
+    monkeypatch.setattr(main, "STARTUP_RETRY_BACKOFF_S", 0.01)
+    client.portal.call(main.start)
+
+    assert main.startup.failed and not main.startup.ready
+    liveness = client.get("/livez")
+    assert liveness.status_code == 503
+    assert liveness.json() == {"status": "Failed", "error": "database: connection refused"}
+    assert client.get("/readyz").json()["status"] == "Failed"
+
+
 def test_health_check():
     response = client.get("/")
     assert response.status_code == 200
@@ -43,6 +124,21 @@ def test_predict_success():
     assert data["status"] in ("Approved", "Rejected")
 
 
+def test_write_behind_predict_routes_open_no_session():
+    from app import main
+    from app.crud import get_async_db, get_db
+
+    assert main.PERSIST_MODE == "write_behind"
+    calls = {
+        dependency.call
+        for route in app.routes
+        if getattr(route, "path", "").startswith("/predict")
+        for dependency in route.dependant.dependencies
+    }
+    assert main.no_session in calls
+    assert get_db not in calls and get_async_db not in calls
+
+
 def test_predict_invalid_type():
     # person_age must be > 0, so -1 should cause a 422
     bad = valid_payload()
@@ -69,3 +165,332 @@ def test_predict_extra_field():
     if response.status_code == 200:
         data = response.json()
         assert set(data.keys()) == {"prediction", "confidence", "status"}
+
+
+def test_predict_fast_matches_predict():
+    payload = {**valid_payload(), "loan_amnt": 15151.0}
+
+    fast = client.post("/predict/fast", json=payload)
+
+    assert fast.status_code == 200
+    assert fast.json() == client.post("/predict", json=payload).json()
+
+    # JSON subtypes and a missing Content-Type are decoded as JSON, like /predict does
+    body = json.dumps(payload).encode()
+    for headers in ({"Content-Type": "application/vnd.api+json"}, {"Content-Type": "application/json; charset=utf-8"}, {}):
+        assert client.post("/predict/fast", content=body, headers=headers).json() == fast.json()
+
+
+@pytest.mark.parametrize("body, content_type", [
+    (b"", "application/json"),
+    (b'{"person_age": 35.0,', "application/json"),
+    (json.dumps({**valid_payload(), "person_age": "abc", "loan_intent": "VACATION"}).encode(), "application/json"),
+    (json.dumps({k: v for k, v in valid_payload().items() if k != "credit_score"}).encode(), "application/json"),
+    # Valid JSON that is not an object
+    (b"null", "application/json"),
+    (b"[1, 2]", "application/json"),
+    (b'"loan"', "application/json"),
+    (b"42", "application/vnd.api+json"),
+    # A valid application under a content type FastAPI does not decode as JSON
+    (json.dumps(valid_payload()).encode(), "text/plain"),
+    (json.dumps(valid_payload()).encode(), "application/x-www-form-urlencoded"),
+    (b"{not json", "text/plain; charset=utf-8"),
+])
+def test_predict_fast_errors_match_predict(body, content_type):
+    headers = {"Content-Type": content_type}
+
+    fast = client.post("/predict/fast", content=body, headers=headers)
+    slow = client.post("/predict", content=body, headers=headers)
+
+    assert fast.status_code == slow.status_code == 422
+    assert fast.json() == slow.json()
+
+
+def test_stats_exposes_batcher():
+    response = client.get("/stats")
+    assert response.status_code == 200
+    batcher = response.json()["batcher"]
+    assert {"queue_depth", "batches", "items", "batch_size_histogram"} <= set(batcher)
+
+
+def test_predict_batch_json_array_with_invalid_row():
+    bad = valid_payload()
+    bad["person_age"] = -1
+    rows = [valid_payload(), bad, {**valid_payload(), "loan_intent": "VENTURE"}]
+
+    response = client.post("/predict/batch", json=rows)
+
+    assert response.status_code == 200
+    data = response.json()
+    assert (data["total"], data["succeeded"], data["failed"]) == (3, 2, 1)
+    assert [r["index"] for r in data["results"]] == [0, 1, 2]
+    assert data["results"][0]["status"] in ("Approved", "Rejected")
+    assert data["results"][1]["status"] == "Error"
+    assert data["results"][1]["error"][0]["loc"] == ["person_age"]
+
+    single = client.post("/predict", json=valid_payload()).json()
+    assert data["results"][0]["prediction"] == single["prediction"]
+    assert abs(data["results"][0]["confidence"] - single["confidence"]) < 1e-6
+
+
+def test_predict_batch_ndjson():
+
+    body = "\n".join([json.dumps(valid_payload()), "{not json", "", json.dumps(valid_payload())])
+    response = client.post("/predict/batch", content=body, headers={"Content-Type": "application/x-ndjson"})
+
+    assert response.status_code == 200
+    data = response.json()
+    assert data["total"] == 3
+    assert data["results"][1]["error"][0]["type"] == "json_invalid"
+    assert data["results"][2]["status"] in ("Approved", "Rejected")
+
+
+def test_predict_batch_rejects_non_array_and_oversized(monkeypatch):
+    from app import main
+
+    assert client.post("/predict/batch", json=valid_payload()).status_code == 400
+
+    monkeypatch.setattr(main, "PREDICT_BATCH_MAX_ROWS", 2)
+    assert client.post("/predict/batch", json=[valid_payload()] * 3).status_code == 413
+
+    # The byte limit is enforced before the body is parsed
+    monkeypatch.setattr(main, "PREDICT_BATCH_MAX_BYTES", 100)
+    monkeypatch.setattr(main.json, "loads", lambda body: pytest.fail("oversized body was parsed"))
+    too_large = client.post("/predict/batch", json=[valid_payload()])
+    assert too_large.status_code == 413
+    assert "exceeds the limit of 100 bytes" in too_large.text
+
+
+def test_predict_stream_scores_in_chunks(monkeypatch):
+    from app import main
+
+    monkeypatch.setattr(main, "STREAM_CHUNK_ROWS", 4)
+    lines = [json.dumps(valid_payload()) for _ in range(10)]
+    lines[6] = '{"person_age": 30}'
+    body = ("\n".join(lines) + "\n").encode()
+
+    def chunks(size=37):
+        # Chunk boundaries deliberately fall in the middle of lines
+        for start in range(0, len(body), size):
+            yield body[start:start + size]
+
+    response = client.post("/predict/stream", content=chunks(), headers={"Content-Type": "application/x-ndjson"})
+
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("application/x-ndjson")
+    results = [json.loads(line) for line in response.text.splitlines()]
+    assert [r["index"] for r in results] == list(range(10))
+    assert results[6]["status"] == "Error"
+    assert all(r["status"] in ("Approved", "Rejected") for i, r in enumerate(results) if i != 6)
+
+
+def test_predict_stream_reads_body_while_client_is_not_reading(monkeypatch):
+    import asyncio
+    from app import main
+
+    monkeypatch.setattr(main, "STREAM_CHUNK_ROWS", 2)
+    # Far less than the results: unread chunks must go to disk, not be dropped
+    monkeypatch.setattr(main, "STREAM_SPOOL_MEMORY_BYTES", 200)
+    spools = []
+
+    class RecordingSpool(main.ResultSpool):
+        def __init__(self, max_memory):
+            super().__init__(max_memory)
+            spools.append(self)
+
+    monkeypatch.setattr(main, "ResultSpool", RecordingSpool)
+    body = [(json.dumps(valid_payload()) + "\n").encode() for _ in range(10)]
+
+    async def upload_then_read():
+        received = []
+        body_read = asyncio.Event()
+        sent = []
+
+        async def receive():
+            if received == body:
+                await asyncio.Event().wait()
+            received.append(body[len(received)])
+            if received == body:
+                body_read.set()
+            return {"type": "http.request", "body": received[-1], "more_body": len(received) < len(body)}
+
+        async def send(message):
+            # Like a client that uploads the whole body before it reads the response
+            if message["type"] == "http.response.body" and message.get("body"):
+                await body_read.wait()
+            sent.append(message)
+
+        scope = {
+            "type": "http", "asgi": {"version": "3.0"}, "http_version": "1.1", "method": "POST",
+            "scheme": "http", "path": "/predict/stream", "raw_path": b"/predict/stream", "root_path": "",
+            "query_string": b"", "headers": [(b"content-type", b"application/x-ndjson")],
+            "client": ("testclient", 50000), "server": ("testserver", 80),
+        }
+        await asyncio.wait_for(app(scope, receive, send), 10)
+        return b"".join(m.get("body", b"") for m in sent if m["type"] == "http.response.body")
+
+    in_flight = main.admission.in_flight
+    results = [json.loads(line) for line in client.portal.call(upload_then_read).splitlines()]
+
+    assert [r["index"] for r in results] == list(range(10))
+    assert all(r["status"] in ("Approved", "Rejected") for r in results)
+    assert len(spools) == 1 and spools[0].spilled
+    assert main.admission.in_flight == in_flight
+
+
+def test_repeated_predict_is_served_from_cache():
+    payload = {**valid_payload(), "loan_amnt": 12345.0}
+    before = client.get("/stats").json()
+    batched_before = before["batcher"]["items"]
+
+    first = client.post("/predict", json=payload).json()
+    second = client.post("/predict", json=payload).json()
+
+    after = client.get("/stats").json()
+    assert second == first
+    assert after["cache"]["hits"] == before["cache"]["hits"] + 1
+    assert after["batcher"]["items"] == batched_before + 1
+
+
+def test_idempotent_retry_replays_stored_response():
+    from sqlalchemy import func, select
+    from database import base
+    from database.models import Loan
+    from app.main import prediction_writer
+
+    payload = {**valid_payload(), "loan_amnt": 23456.0}
+    headers = {"Idempotency-Key": "retry-test-1"}
+    batched_before = client.get("/stats").json()["batcher"]["items"]
+
+    first = client.post("/predict", json=payload, headers=headers)
+    retry = client.post("/predict", json=payload, headers=headers)
+
+    assert first.status_code == retry.status_code == 200
+    assert retry.json() == first.json()
+    assert retry.headers["Idempotent-Replayed"] == "true"
+    assert "Idempotent-Replayed" not in first.headers
+    assert client.get("/stats").json()["batcher"]["items"] == batched_before + 1
+
+    # Wait for the write-behind queue to flush the first attempt
+    deadline = time.monotonic() + 5
+    while time.monotonic() < deadline:
+        stats = prediction_writer.stats()
+        if stats["queue_depth"] == 0 and stats["flushed"] + stats["failed"] >= stats["submitted"]:
+            break
+        time.sleep(0.05)
+    with base.SessionLocal() as db:
+        stored = db.scalar(select(func.count()).select_from(Loan).where(Loan.idempotency_key == "retry-test-1"))
+    assert stored == 1
+
+
+def test_idempotency_key_reused_for_another_request():
+    headers = {"Idempotency-Key": "retry-test-2"}
+    assert client.post("/predict", json=valid_payload(), headers=headers).status_code == 200
+
+    response = client.post("/predict", json={**valid_payload(), "loan_amnt": 1.0}, headers=headers)
+    assert response.status_code == 422
+    assert client.post("/predict", json=valid_payload(), headers={"Idempotency-Key": ""}).status_code == 400
+
+
+def test_admin_reload_swaps_model(monkeypatch):
+    from app import main, services
+
+    assert client.post("/admin/reload").status_code == 403
+    monkeypatch.setattr(main, "ADMIN_TOKEN", "secret")
+    assert client.post("/admin/reload", headers={"X-Admin-Token": "wrong"}).status_code == 403
+
+    before = services.current_bundle()
+    response = client.post("/admin/reload", headers={"X-Admin-Token": "secret"})
+
+    assert response.status_code == 200
+    assert response.json()["status"] == "Reloaded"
+    assert services.current_bundle() is not before
+    assert client.get("/stats").json()["model"]["reloads"] >= 1
+    assert client.post("/predict", json=valid_payload()).status_code == 200
+
+
+def test_metrics_exposes_stage_histograms_and_counters():
+    client.post("/predict", json={**valid_payload(), "loan_amnt": 17171.0})
+    client.post("/predict/fast", json={**valid_payload(), "loan_amnt": 17172.0})
+
+    response = client.get("/metrics")
+
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("text/plain; version=0.0.4")
+    text = response.text
+    for stage in ("validate", "preprocess", "predict", "predict_proba", "save", "total"):
+        assert f'loan_predict_stage_seconds_count{{stage="{stage}"}}' in text
+    assert "loan_predictions_total{status=" in text
+    assert "loan_batcher_queue_depth " in text and "loan_db_pool_checked_out " in text
+    assert 'loan_predict_stage_seconds_count{stage="validate"} 0\n' not in text
+
+
+def test_metrics_count_validation_errors_on_both_predict_routes():
+    def validation_errors():
+        for line in client.get("/metrics").text.splitlines():
+            if line.startswith('loan_predict_errors_total{error="validation"}'):
+                return float(line.split()[-1])
+        return 0.0
+
+    before = validation_errors()
+    assert client.post("/predict", json={"person_age": -1}).status_code == 422
+    assert client.post("/predict/fast", json={"person_age": -1}).status_code == 422
+    assert client.post("/predict/batch", json={"person_age": -1}).status_code == 400
+    assert validation_errors() == before + 2
+
+
+def test_rate_limit_and_shedding(monkeypatch):
+    from app import main
+    from app.admission import AdmissionController, TokenBucketLimiter
+
+    monkeypatch.setattr(main, "rate_limiter", TokenBucketLimiter(rate=0.5, burst=1))
+    monkeypatch.setattr(main, "RATE_LIMIT_API_KEYS", frozenset({"client-1", "client-2", "client-3"}))
+    headers = {"X-API-Key": "client-1"}
+    assert client.post("/predict", json=valid_payload(), headers=headers).status_code == 200
+    limited = client.post("/predict", json=valid_payload(), headers=headers)
+    assert limited.status_code == 429
+    assert limited.headers["Retry-After"] == "2"
+    assert client.post("/predict", json=valid_payload(), headers={"X-API-Key": "client-2"}).status_code == 200
+    # Unknown keys share the address's bucket, so a fresh key per request gains nothing
+    assert client.post("/predict", json=valid_payload(), headers={"X-API-Key": "forged-1"}).status_code == 200
+    assert client.post("/predict", json=valid_payload(), headers={"X-API-Key": "forged-2"}).status_code == 429
+    assert main.rate_limiter.stats()["clients"] == 3
+
+    busy = AdmissionController(max_concurrency=1, max_queue=0)
+    busy.in_flight = 1
+    monkeypatch.setattr(main, "admission", busy)
+    shed = client.post("/predict/fast", json=valid_payload(), headers={"X-API-Key": "client-3"})
+    assert shed.status_code == 503
+    assert shed.headers["Retry-After"] == "1"
+    assert shed.json()["detail"]["status"] == "Error"
+
+
+def test_request_deadline(monkeypatch):
+    from app import main
+    from app.admission import AdmissionController
+
+    invalid = client.post("/predict", json=valid_payload(), headers={"X-Request-Timeout-Ms": "soon"})
+    assert invalid.status_code == 400
+
+    # Expires while the row waits to be preprocessed: dropped before inference
+    prepare_input = main.prepare_input
+
+    def slow_prepare_input(*args):
+        time.sleep(0.05)
+        return prepare_input(*args)
+
+    monkeypatch.setattr(main, "prepare_input", slow_prepare_input)
+    expired_before = client.get("/stats").json()["batcher"]["expired"]
+    late = client.post("/predict", json={**valid_payload(), "loan_amnt": 9191.0}, headers={"X-Request-Timeout-Ms": "20"})
+    assert late.status_code == 504
+    assert late.json()["detail"] == {"error": "Deadline exceeded before inference", "status": "Error"}
+    assert client.get("/stats").json()["batcher"]["expired"] == expired_before + 1
+
+    # Expires while waiting for admission
+    busy = AdmissionController(max_concurrency=1, max_queue=4, max_wait_ms=5000)
+    busy.in_flight = 1
+    monkeypatch.setattr(main, "admission", busy)
+    started = time.monotonic()
+    waited = client.post("/predict", json=valid_payload(), headers={"X-Request-Timeout-Ms": "50"})
+    assert waited.status_code == 504
+    assert time.monotonic() - started < 1
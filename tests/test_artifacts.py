@@ -0,0 +1,91 @@
+import logging
+import os
+
+import joblib
+import numpy as np
+import pytest
+import yaml
+
+from app import services
+from app.artifacts import ArtifactError, MANIFEST_FILE, NativeClassifier, _sha256, export_bundle, load_bundle, read_manifest
+
+
+@pytest.fixture(scope="module")
+def sources():
+    with open("models/config.yaml") as f:
+        config = yaml.safe_load(f)
+    return (
+        joblib.load("models/xgb_model.pkl"),
+        joblib.load("models/scaler.pkl"),
+        joblib.load("models/feature_names.pkl"),
+        config,
+    )
+
+
+@pytest.fixture
+def artifact(sources, tmp_path):
+    export_bundle(*sources, str(tmp_path))
+    return str(tmp_path)
+
+
+def test_artifact_round_trip_matches_the_pickles(sources, artifact):
+    model, scaler, features, config = sources
+    loaded_model, loaded_scaler, loaded_features, loaded_config, manifest = load_bundle(artifact)
+
+    assert loaded_features == features
+    # YAML 1.1 reads Yes/No as booleans; the keys must survive JSON unchanged
+    assert loaded_config == config
+    assert isinstance(loaded_scaler.center_, np.memmap)
+
+    X = np.random.default_rng(0).normal(size=(200, len(features)))
+    np.testing.assert_array_equal(loaded_scaler.transform(X), scaler.transform(X))
+    np.testing.assert_array_equal(loaded_model.predict_proba(X), model.predict_proba(X))
+    with pytest.raises(AttributeError):
+        loaded_model.best_iteration
+    assert manifest["model"]["n_classes"] == 2
+
+
+def test_corrupted_artifact_is_rejected(artifact):
+    manifest = read_manifest(artifact)
+    with open(os.path.join(artifact, manifest["model"]["file"]), "r+b") as f:
+        f.seek(100)
+        f.write(b"\xff")
+
+    with pytest.raises(ArtifactError, match="Checksum mismatch"):
+        load_bundle(artifact)
+
+
+def test_reexport_replaces_the_previous_files(sources, artifact):
+    model, scaler, features, config = sources
+    first = read_manifest(artifact)
+
+    changed = dict(config, loan_intent_options=[*config["loan_intent_options"], "OTHER"])
+    second = export_bundle(model, scaler, features, changed, artifact)
+
+    assert second["version"] != first["version"]
+    assert sorted(os.listdir(artifact)) == sorted([MANIFEST_FILE, second["model"]["file"], second["tables"]["file"]])
+
+
+def test_build_bundle_prefers_the_artifact(artifact, monkeypatch):
+    monkeypatch.setenv("MODEL_ARTIFACT_DIR", artifact)
+
+    bundle = services.build_bundle(logging.getLogger("test"))
+
+    assert services.resource_files() == (os.path.join(artifact, MANIFEST_FILE), *services.RESOURCE_FILES)
+    assert bundle.resource_fingerprint == services.current_fingerprint()
+    assert bundle.predictor is not None and bundle.scaled_encoder is not None
+    assert isinstance(bundle.model, NativeClassifier)
+
+
+def test_build_bundle_falls_back_when_the_pickles_changed(sources, tmp_path, monkeypatch):
+    monkeypatch.setenv("MODEL_ARTIFACT_DIR", str(tmp_path))
+    source = {name: _sha256(os.path.join("models", name)) for name in ("xgb_model.pkl", "scaler.pkl", "config.yaml")}
+
+    export_bundle(*sources, str(tmp_path), source=source)
+    assert isinstance(services.build_bundle(logging.getLogger("test")).model, NativeClassifier)
+
+    # As if xgb_model.pkl had been retrained after the export
+    export_bundle(*sources, str(tmp_path), source={**source, "xgb_model.pkl": "0" * 64})
+    with pytest.raises(ArtifactError, match="xgb_model.pkl changed"):
+        load_bundle(str(tmp_path))
+    assert not isinstance(services.build_bundle(logging.getLogger("test")).model, NativeClassifier)
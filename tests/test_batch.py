@@ -0,0 +1,144 @@
+import json
+import logging
+import os
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from app import batch, services
+from app.schemas import LoanApplication
+
+
+@pytest.fixture
+def applications_frame():
+    services.load_resources(logging.getLogger("loan_predictor"))
+    frame = pd.DataFrame([application.model_dump() for application in services.synthetic_applications(250)])
+    frame.insert(0, "loan_id", [f"L{i:04d}" for i in range(len(frame))])
+    # A few invalid rows
+    frame.loc[3, "person_age"] = -1
+    frame.loc[7, "loan_intent"] = "YACHT"
+    frame["credit_score"] = frame["credit_score"].astype(float)
+    frame.loc[11, "credit_score"] = 700.5
+    return frame
+
+
+def read_parts(output_dir: str) -> pd.DataFrame:
+    parts = sorted(name for name in os.listdir(output_dir) if name.startswith("part-"))
+    readers = {".parquet": pd.read_parquet, ".csv": pd.read_csv}
+    return pd.concat(
+        [readers[os.path.splitext(name)[1]](os.path.join(output_dir, name)) for name in parts],
+        ignore_index=True,
+    )
+
+
+def test_validate_frame_reports_invalid_rows(applications_frame):
+    frame = applications_frame.drop(columns="loan_id")
+
+    _, errors = batch.validate_frame(frame)
+
+    assert [i for i, error in enumerate(errors) if error is not None] == [3, 7, 11]
+    assert errors[3].startswith("person_age: Input should be a valid number greater than 0")
+    assert errors[7].startswith("loan_intent: Input should be one of")
+    assert errors[11].startswith("credit_score: Input should be a valid integer")
+
+
+def test_validate_frame_missing_column(applications_frame):
+    _, errors = batch.validate_frame(applications_frame.drop(columns="credit_score"))
+
+    assert all(error.endswith("credit_score: Field required") for error in errors)
+
+
+def test_score_frame_matches_score_applications(applications_frame):
+    result = batch.score_frame(applications_frame, logging.getLogger("loan_predictor"))
+
+    valid = [i for i in range(len(applications_frame)) if i not in (3, 7, 11)]
+    rows = applications_frame.drop(columns="loan_id").iloc[valid].to_dict("records")
+    expected = services.score_applications(
+        [LoanApplication(**row) for row in rows], logging.getLogger("loan_predictor")
+    )
+
+    assert result.loc[valid, "prediction"].tolist() == [score["prediction"] for score in expected]
+    np.testing.assert_allclose(result.loc[valid, "confidence"], [score["confidence"] for score in expected])
+    assert (result.loc[[3, 7, 11], "loan_status"] == "Error").all()
+    assert result.loc[[3, 7, 11], "prediction"].isna().all()
+
+
+@pytest.mark.parametrize("input_format,output_format", [("csv", "parquet"), ("ndjson", "csv"), ("parquet", "parquet")])
+def test_run_scores_every_row(tmp_path, applications_frame, input_format, output_format):
+    input_path = str(tmp_path / f"loans.{input_format}")
+    if input_format == "csv":
+        applications_frame.to_csv(input_path, index=False)
+    elif input_format == "ndjson":
+        applications_frame.to_json(input_path, orient="records", lines=True)
+    else:
+        applications_frame.to_parquet(input_path, index=False)
+    output_dir = str(tmp_path / "scored")
+
+    summary = batch.run(input_path, output_dir, output_format=output_format, chunk_rows=100, workers=1, id_column="loan_id")
+
+    assert summary["rows"] == summary["scored_this_run"] == 250
+    assert summary["errors"] == 3
+    assert summary["chunks"] == 3
+
+    result = read_parts(output_dir)
+    assert result["row"].tolist() == list(range(250))
+    assert result["loan_id"].tolist() == applications_frame["loan_id"].tolist()
+    assert (result["loan_status"] == "Error").sum() == 3
+    assert set(result["loan_status"]) <= {"Approved", "Rejected", "Error"}
+
+
+def test_run_resumes_from_checkpoint(tmp_path, applications_frame):
+    input_path = str(tmp_path / "loans.csv")
+    applications_frame.to_csv(input_path, index=False)
+    output_dir = str(tmp_path / "scored")
+
+    batch.run(input_path, output_dir, output_format="csv", chunk_rows=100, workers=1)
+    # Simulate a run that died after the first chunk
+    os.remove(os.path.join(output_dir, "part-00002.csv"))
+    checkpoint = os.path.join(output_dir, batch.CHECKPOINT_FILE)
+    with open(checkpoint) as f:
+        state = json.load(f)
+    state.update(completed=[0, 1], rows=200, errors=3)
+    with open(checkpoint, "w") as f:
+        json.dump(state, f)
+
+    summary = batch.run(input_path, output_dir, output_format="csv", chunk_rows=100, workers=1)
+
+    assert summary["scored_this_run"] == 50
+    assert summary["rows"] == 250
+    assert read_parts(output_dir)["row"].tolist() == list(range(250))
+
+
+def test_run_rejects_foreign_checkpoint(tmp_path, applications_frame):
+    input_path = str(tmp_path / "loans.csv")
+    applications_frame.to_csv(input_path, index=False)
+    output_dir = str(tmp_path / "scored")
+    batch.run(input_path, output_dir, output_format="csv", chunk_rows=100, workers=1)
+
+    with pytest.raises(ValueError, match="Checkpoint"):
+        batch.run(input_path, output_dir, output_format="csv", chunk_rows=50, workers=1)
+
+    summary = batch.run(input_path, output_dir, output_format="csv", chunk_rows=50, workers=1, restart=True)
+    assert summary["chunks"] == 5
+
+    # The same path with other contents must not resume from the old parts
+    applications_frame.head(120).to_csv(input_path, index=False)
+    with pytest.raises(ValueError, match="another version"):
+        batch.run(input_path, output_dir, output_format="csv", chunk_rows=50, workers=1)
+
+
+def test_run_in_process_pool(tmp_path, applications_frame):
+    input_path = str(tmp_path / "loans.csv")
+    applications_frame.to_csv(input_path, index=False)
+    output_dir = str(tmp_path / "scored")
+
+    xgb_nthread = os.environ.get("XGB_NTHREAD")
+    summary = batch.run(input_path, output_dir, output_format="parquet", chunk_rows=50, workers=2)
+
+    assert os.environ.get("XGB_NTHREAD") == xgb_nthread
+    assert summary["rows"] == 250
+    inline = batch.score_frame(applications_frame, logging.getLogger("loan_predictor"))
+    result = read_parts(output_dir)
+    assert result["prediction"].tolist() == inline["prediction"].tolist()
+    np.testing.assert_allclose(result["confidence"], inline["confidence"])
@@ -0,0 +1,115 @@
+import asyncio
+import contextvars
+
+import pytest
+
+from app.batching import MicroBatcher, BatcherQueueFull
+
+
+def run(coro):
+    return asyncio.run(coro)
+
+
+def make_batcher(**kwargs):
+    calls = []
+
+    async def process(items):
+        calls.append(list(items))
+        return [item * 10 for item in items]
+
+    return MicroBatcher(process, **kwargs), calls
+
+
+def test_concurrent_submissions_share_one_batch():
+    batcher, calls = make_batcher(max_batch_size=8, max_wait_us=50_000)
+
+    async def scenario():
+        return await asyncio.gather(*(batcher.submit(i) for i in range(5)))
+
+    assert run(scenario()) == [0, 10, 20, 30, 40]
+    assert calls == [[0, 1, 2, 3, 4]]
+
+
+def test_max_batch_size_is_respected():
+    batcher, calls = make_batcher(max_batch_size=4, max_wait_us=50_000)
+
+    async def scenario():
+        return await asyncio.gather(*(batcher.submit(i) for i in range(10)))
+
+    assert run(scenario()) == [i * 10 for i in range(10)]
+    assert [len(c) for c in calls] == [4, 4, 2]
+    stats = batcher.stats()
+    assert stats["batches"] == 3
+    assert stats["items"] == 10
+    assert stats["batch_size_histogram"] == {"le_1": 0, "le_2": 1, "le_4": 2}
+
+
+def test_single_request_waits_at_most_the_window():
+    batcher, calls = make_batcher(max_batch_size=64, max_wait_us=20_000)
+
+    async def scenario():
+        loop = asyncio.get_running_loop()
+        start = loop.time()
+        result = await batcher.submit(7)
+        return result, loop.time() - start
+
+    result, elapsed = run(scenario())
+    assert result == 70
+    assert elapsed < 0.5
+    assert calls == [[7]]
+
+
+def test_batch_errors_reach_every_request():
+    async def process(items):
+        raise ValueError("bad batch")
+
+    batcher = MicroBatcher(process, max_wait_us=10_000)
+
+    async def scenario():
+        return await asyncio.gather(batcher.submit(1), batcher.submit(2), return_exceptions=True)
+
+    results = run(scenario())
+    assert all(isinstance(r, ValueError) for r in results)
+
+
+def test_full_queue_rejects_submission():
+    release = None
+
+    async def process(items):
+        await release.wait()
+        return items
+
+    batcher = MicroBatcher(process, max_batch_size=1, max_wait_us=0, max_queue_size=1)
+
+    async def scenario():
+        nonlocal release
+        release = asyncio.Event()
+        first = asyncio.ensure_future(batcher.submit(1))
+        await asyncio.sleep(0.01)  # first is now in flight
+        second = asyncio.ensure_future(batcher.submit(2))
+        await asyncio.sleep(0)  # second is queued
+        with pytest.raises(BatcherQueueFull):
+            await batcher.submit(3)
+        assert batcher.stats()["queue_depth"] == 1
+        release.set()
+        return await asyncio.gather(first, second)
+
+    assert run(scenario()) == [1, 2]
+
+
+def test_worker_does_not_inherit_the_first_callers_context():
+    request_id = contextvars.ContextVar("request_id", default=None)
+    seen = []
+
+    async def process(items):
+        seen.append(request_id.get())
+        return items
+
+    batcher = MicroBatcher(process, max_wait_us=1000)
+
+    async def scenario():
+        request_id.set("first-request")
+        return await batcher.submit(1)
+
+    assert run(scenario()) == 1
+    assert seen == [None]
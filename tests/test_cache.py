@@ -0,0 +1,121 @@
+import asyncio
+
+import numpy as np
+import pytest
+
+from app import cache as cache_module
+from app.cache import InMemoryBackend, PredictionCache
+
+
+RESULT = {"prediction": 1, "confidence": 0.9}
+
+
+def test_key_depends_on_row_and_fingerprint():
+    cache = PredictionCache()
+    row = np.array([[1.0, 2.0, np.nan]])
+
+    assert cache.key(row, "a" * 64) == cache.key(row.copy(), "a" * 64)
+    assert cache.key(row, "a" * 64) != cache.key(row + 1, "a" * 64)
+    assert cache.key(row, "a" * 64) != cache.key(row.astype(np.float32), "a" * 64)
+    assert cache.key(row, "a" * 64) != cache.key(row, "b" * 64)
+
+
+def test_lru_eviction_and_hit_metrics():
+    cache = PredictionCache(max_entries=2)
+
+    async def scenario():
+        await cache.set("a", RESULT)
+        await cache.set("b", RESULT)
+        assert await cache.get("a") == RESULT  # "a" becomes most recently used
+        await cache.set("c", RESULT)           # evicts "b"
+        return await cache.get("b"), await cache.get("a"), await cache.get("c")
+
+    b, a, c = asyncio.run(scenario())
+
+    assert b is None and a == RESULT and c == RESULT
+    stats = cache.stats()
+    assert stats["size"] == 2
+    assert stats["evictions"] == 1
+    assert stats["hits"] == 3 and stats["misses"] == 1
+    assert stats["hit_ratio"] == pytest.approx(0.75)
+
+
+def test_entries_expire_after_ttl(monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr(cache_module.time, "monotonic", lambda: now[0])
+    cache = PredictionCache(ttl_s=10)
+
+    async def scenario():
+        await cache.set("a", RESULT)
+        now[0] += 5
+        fresh = await cache.get("a")
+        now[0] += 6
+        return fresh, await cache.get("a")
+
+    fresh, expired = asyncio.run(scenario())
+
+    assert fresh == RESULT and expired is None
+    assert cache.stats()["expirations"] == 1
+
+
+def test_bundles_overlapping_during_a_reload_keep_their_entries():
+    cache = PredictionCache()
+    row = np.zeros((1, 3))
+    old_key, new_key = cache.key(row, "a" * 64), cache.key(row, "b" * 64)
+
+    async def scenario():
+        await cache.set(old_key, RESULT)
+        await cache.set(new_key, {"prediction": 0, "confidence": 0.6})
+        return await cache.get(cache.key(row, "a" * 64)), await cache.get(cache.key(row, "b" * 64))
+
+    old, new = asyncio.run(scenario())
+
+    assert old == RESULT and new == {"prediction": 0, "confidence": 0.6}
+    assert cache.stats()["size"] == 2
+
+    cache.clear()  # what the registry's on_swap callback does
+    assert cache.stats()["size"] == 0
+
+
+def test_backend_interface_is_abstract():
+    class Incomplete(cache_module.CacheBackend):
+        async def get(self, key):
+            return None
+
+    with pytest.raises(TypeError):
+        Incomplete()
+
+
+def test_shared_backend_serves_other_workers():
+    backend = InMemoryBackend()
+    worker_a = PredictionCache(backend=backend)
+    worker_b = PredictionCache(backend=backend)
+
+    async def scenario():
+        await worker_a.set("k", RESULT)
+        return await worker_b.get("k"), await worker_b.get("k")
+
+    shared, local = asyncio.run(scenario())
+
+    assert shared == local == RESULT
+    assert worker_b.stats()["shared_hits"] == 1
+    assert worker_b.stats()["hits"] == 1
+
+
+def test_backend_errors_are_misses():
+    class BrokenBackend(InMemoryBackend):
+        async def get(self, key):
+            raise ConnectionError("down")
+
+        async def set(self, key, value, ttl_s):
+            raise ConnectionError("down")
+
+    cache = PredictionCache(backend=BrokenBackend())
+
+    async def scenario():
+        await cache.set("k", RESULT)
+        cache.clear()
+        return await cache.get("k")
+
+    assert asyncio.run(scenario()) is None
+    assert cache.stats()["backend_errors"] == 2
@@ -0,0 +1,288 @@
+import pytest
+from sqlalchemy import create_engine, func, select
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
+
+from app.crud import bulk_save_predictions
+from database.base import Base
+from database.models import User, Loan
+
+
+@pytest.fixture
+def db():
+    engine = create_engine("sqlite://", poolclass=StaticPool)
+    Base.metadata.create_all(engine)
+    session = sessionmaker(bind=engine)()
+    yield session
+    session.close()
+    engine.dispose()
+
+
+def prediction_record(**overrides):
+    record = {
+        "person_age": 35.0,
+        "person_gender": "male",
+        "person_education": "Bachelor",
+        "person_income": 60000.0,
+        "person_emp_exp": 10,
+        "person_home_ownership": "RENT",
+        "loan_amnt": 10000.0,
+        "loan_intent": "PERSONAL",
+        "loan_int_rate": 12.5,
+        "loan_percent_income": 0.15,
+        "cb_person_cred_hist_length": 4.0,
+        "credit_score": 720,
+        "previous_loan_defaults_on_file": "No",
+        "loan_status": "Approved",
+        "confidence": 0.91,
+    }
+    record.update(overrides)
+    return record
+
+
+def test_bulk_save_predictions_links_users_and_loans(db):
+    records = [prediction_record(person_age=20.0 + i, loan_amnt=1000.0 * (i + 1)) for i in range(25)]
+
+    assert bulk_save_predictions(db, records) == 25
+
+    assert db.scalar(select(func.count()).select_from(User)) == 25
+    assert db.scalar(select(func.count()).select_from(Loan)) == 25
+    for user in db.scalars(select(User)):
+        assert len(user.loans) == 1
+        # age and amount were generated together, so they must stay paired
+        assert user.loans[0].amount == 1000.0 * (user.age - 19.0)
+
+
+def test_bulk_save_predictions_empty(db):
+    assert bulk_save_predictions(db, []) == 0
+    assert db.scalar(select(func.count()).select_from(User)) == 0
+
+
+def test_bulk_save_predictions_skips_stored_idempotency_keys(db):
+    assert bulk_save_predictions(db, [prediction_record(idempotency_key="a")]) == 1
+
+    records = [
+        prediction_record(idempotency_key="a"),  # already stored
+        prediction_record(idempotency_key="b"),
+        prediction_record(idempotency_key="b"),  # repeated in the batch
+        prediction_record(),
+        prediction_record(),
+    ]
+    assert bulk_save_predictions(db, records) == 3
+
+    assert db.scalar(select(func.count()).select_from(User)) == 4
+    keys = list(db.scalars(select(Loan.idempotency_key)))
+    assert sorted(filter(None, keys)) == ["a", "b"]
+    assert keys.count(None) == 2
+
+
+def test_bulk_save_predictions_sessions_racing_on_one_key(tmp_path):
+    import threading
+
+    engine = create_engine(f"sqlite:///{tmp_path / 'race.db'}")
+    Base.metadata.create_all(engine)
+    Session = sessionmaker(bind=engine)
+    barrier = threading.Barrier(2)
+    saved, errors = [], []
+
+    def worker(i):
+        with Session() as session:
+            barrier.wait()
+            try:
+                saved.append(bulk_save_predictions(
+                    session, [prediction_record(idempotency_key="k"), prediction_record(person_age=20.0 + i)]
+                ))
+            except Exception as e:
+                errors.append(e)
+
+    threads = [threading.Thread(target=worker, args=(i,)) for i in range(2)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert errors == []
+    assert sorted(saved) == [1, 2]
+    with Session() as session:
+        assert list(session.scalars(select(Loan.idempotency_key).where(Loan.idempotency_key.is_not(None)))) == ["k"]
+        # the loser's user row for "k" was removed with its skipped loan
+        assert session.scalar(select(func.count()).select_from(User)) == 3
+        assert session.scalar(select(func.count()).select_from(Loan)) == 3
+    engine.dispose()
+
+
+# ---------- Engine & session lifecycle ----------
+@pytest.fixture
+def pooled_db(tmp_path):
+    from sqlalchemy import event
+    from database import base
+    from database.database_config import DatabaseConfig
+    from app.crud import init_db, create_db
+
+    saved = base.engine, base.SessionLocal
+    config = DatabaseConfig.from_env()
+    config.url = f"sqlite:///{tmp_path / 'soak.db'}"
+    config.pool_size = 3
+    config.max_overflow = 0
+    config.pool_timeout = 2
+
+    init_db(config)
+    create_db()
+    connects = []
+    event.listen(base.engine, "connect", lambda *args: connects.append(1))
+
+    yield base.engine, connects
+
+    base.engine.dispose()
+    base.engine, base.SessionLocal = saved
+
+
+def test_database_config_from_env(monkeypatch):
+    from database.database_config import DatabaseConfig
+
+    monkeypatch.setenv("DB_HOST", "db.internal")
+    monkeypatch.setenv("DB_PORT", "6543")
+    monkeypatch.setenv("DB_POOL_SIZE", "12")
+    monkeypatch.setenv("DB_ECHO", "false")
+    monkeypatch.delenv("DATABASE_URL", raising=False)
+
+    config = DatabaseConfig.from_env()
+
+    assert config.connection_string.endswith("@db.internal:6543/loan_postgres")
+    assert config.engine_options["pool_size"] == 12
+    assert config.engine_options["echo"] is False
+    assert config.engine_options["pool_pre_ping"] is True
+
+
+def test_get_db_soak_keeps_connections_flat(pooled_db):
+    from fastapi import Depends, FastAPI
+    from fastapi.testclient import TestClient
+    from sqlalchemy import text
+    from sqlalchemy.orm import Session
+    from app.crud import get_db, pool_stats
+
+    engine, connects = pooled_db
+    app = FastAPI()
+
+    @app.get("/ping")
+    def ping(db: Session = Depends(get_db)):
+        return {"users": db.execute(text("SELECT count(*) FROM users")).scalar()}
+
+    @app.get("/boom")
+    def boom(db: Session = Depends(get_db)):
+        db.execute(text("SELECT 1"))
+        raise RuntimeError("handler failed after using the session")
+
+    with TestClient(app, raise_server_exceptions=False) as client:
+        for i in range(300):
+            response = client.get("/boom" if i % 10 == 0 else "/ping")
+            assert response.status_code == (500 if i % 10 == 0 else 200)
+            assert pool_stats()["checked_out"] == 0
+
+    # With pool_size=3 and no overflow, a leaked session would exhaust the
+    # pool within a few requests; instead the same connections are reused.
+    assert len(connects) <= 3
+    assert pool_stats()["checked_out"] == 0
+
+
+def test_warm_pool_opens_connections_once(pooled_db):
+    from app.crud import pool_stats, warm_pool
+
+    engine, connects = pooled_db
+    engine.dispose()
+    connects.clear()
+
+    assert warm_pool(3) == 3
+    assert len(connects) == 3
+    assert pool_stats() == {"size": 3, "checked_out": 0, "checked_in": 3, "overflow": 0}
+
+    # Warm connections are reused rather than opened again
+    warm_pool(3)
+    assert len(connects) == 3
+
+
+# ---------- Async backend ----------
+def test_async_connection_string():
+    from database.database_config import DatabaseConfig
+
+    config = DatabaseConfig("db", 5432, "loans", "user", "secret")
+    assert config.async_connection_string == "postgresql+asyncpg://user:secret@db:5432/loans"
+
+    config.url = "sqlite:///tmp/loans.db"
+    assert config.async_connection_string == "sqlite+aiosqlite:///tmp/loans.db"
+
+
+def test_bulk_save_predictions_async(tmp_path):
+    import asyncio
+    from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+    from app.crud import bulk_save_predictions_async
+
+    async def scenario():
+        engine = create_async_engine(f"sqlite+aiosqlite:///{tmp_path / 'async.db'}")
+        async with engine.begin() as connection:
+            await connection.run_sync(Base.metadata.create_all)
+
+        async with async_sessionmaker(engine)() as db:
+            saved = await bulk_save_predictions_async(db, [prediction_record(person_age=30.0 + i) for i in range(10)])
+            repeated = await bulk_save_predictions_async(
+                db, [prediction_record(idempotency_key="a"), prediction_record(idempotency_key="a")]
+            )
+            users = await db.scalar(select(func.count()).select_from(User))
+            loans = await db.scalar(select(func.count()).select_from(Loan))
+
+        await engine.dispose()
+        return saved, repeated, users, loans
+
+    saved, repeated, users, loans = asyncio.run(scenario())
+    assert saved == 10
+    assert repeated == 1
+    assert users == loans == 11
+
+
+def test_upgrade_schema_adds_idempotency_key_to_old_tables():
+    from sqlalchemy import text
+    from sqlalchemy.exc import IntegrityError
+    from app.crud import check_schema, missing_columns, upgrade_schema
+
+    engine = create_engine("sqlite://", poolclass=StaticPool)
+    with engine.begin() as connection:
+        # The loans table as released before idempotency keys
+        connection.execute(text("CREATE TABLE users (id INTEGER PRIMARY KEY, age FLOAT, gender VARCHAR, "
+                                "education VARCHAR, income FLOAT, employ_expereience INTEGER, home_ownership VARCHAR)"))
+        connection.execute(text("CREATE TABLE loans (id INTEGER PRIMARY KEY, user_id INTEGER REFERENCES users(id), "
+                                "amount FLOAT, intent VARCHAR, interest_rate FLOAT, percent_income FLOAT, "
+                                "cred_history_yearly FLOAT, credit_score INTEGER, prev_loan_def VARCHAR, "
+                                "loan_status VARCHAR, confidence FLOAT)"))
+
+    assert missing_columns(engine) == ["loans.idempotency_key"]
+    with pytest.raises(RuntimeError, match="loans.idempotency_key"):
+        check_schema(engine)
+
+    assert upgrade_schema(engine) == ["loans.idempotency_key"]
+    assert upgrade_schema(engine) == []
+    check_schema(engine)
+
+    session = sessionmaker(bind=engine)()
+    assert bulk_save_predictions(session, [prediction_record(idempotency_key="a")]) == 1
+    session.add(User(loans=[Loan(idempotency_key="a")]))
+    with pytest.raises(IntegrityError):
+        session.commit()
+    session.close()
+    engine.dispose()
+
+
+def test_init_db_raises_when_the_database_is_unreachable(tmp_path):
+    from database import base
+    from database.database_config import DatabaseConfig
+    from app.crud import init_db
+
+    saved = base.engine, base.SessionLocal
+    config = DatabaseConfig.from_env()
+    config.url = f"sqlite:///{tmp_path / 'missing' / 'loans.db'}"
+    try:
+        with pytest.raises(Exception, match="unable to open database file"):
+            init_db(config)
+    finally:
+        if base.engine is not None and base.engine is not saved[0]:
+            base.engine.dispose()
+        base.engine, base.SessionLocal = saved
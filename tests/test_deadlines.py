@@ -0,0 +1,90 @@
+import asyncio
+import threading
+import time
+
+import pytest
+from starlette.requests import ClientDisconnect
+
+from app.batching import MicroBatcher
+from app.deadlines import DeadlineExceeded, cancel_on_disconnect, deadline_after
+from app.executor import InferenceExecutor
+
+
+def run(coro):
+    return asyncio.run(coro)
+
+
+def test_batcher_drops_expired_items():
+    calls = []
+
+    async def process(items):
+        calls.append(list(items))
+        return [item * 10 for item in items]
+
+    batcher = MicroBatcher(process, max_batch_size=8, max_wait_us=20_000)
+
+    async def scenario():
+        return await asyncio.gather(
+            batcher.submit(1, deadline_after(1000)),
+            batcher.submit(2, time.monotonic() + 0.005),
+            batcher.submit(3),
+            return_exceptions=True,
+        )
+
+    first, second, third = run(scenario())
+    assert (first, third) == (10, 30)
+    assert isinstance(second, DeadlineExceeded)
+    assert calls == [[1, 3]]
+    assert batcher.stats()["expired"] == 1
+
+
+def test_executor_drops_jobs_whose_deadline_passed_in_the_queue():
+    executor = InferenceExecutor(kind="thread", max_workers=1)
+    release = threading.Event()
+    ran = []
+
+    async def scenario():
+        blocker = asyncio.ensure_future(executor.run(release.wait))
+        queued = asyncio.ensure_future(executor.run(ran.append, "queued", deadline=time.monotonic() + 0.02))
+        await asyncio.sleep(0.05)
+        release.set()
+        await blocker
+        with pytest.raises(DeadlineExceeded):
+            await queued
+        with pytest.raises(DeadlineExceeded):
+            await executor.run(ran.append, "late", deadline=time.monotonic() - 1)
+
+    try:
+        run(scenario())
+    finally:
+        executor.shutdown()
+    assert ran == []
+
+
+def test_disconnect_cancels_pending_work():
+    disconnected = asyncio.Event()
+    cancelled = []
+
+    class FakeRequest:
+        def __init__(self, event):
+            self.event = event
+
+        async def receive(self):
+            await self.event.wait()
+            return {"type": "http.disconnect"}
+
+    async def work():
+        try:
+            await asyncio.sleep(10)
+        except asyncio.CancelledError:
+            cancelled.append(True)
+            raise
+
+    async def scenario():
+        asyncio.get_running_loop().call_later(0.01, disconnected.set)
+        with pytest.raises(ClientDisconnect):
+            await cancel_on_disconnect(FakeRequest(disconnected), work())
+        assert await cancel_on_disconnect(FakeRequest(asyncio.Event()), asyncio.sleep(0, "done")) == "done"
+
+    run(scenario())
+    assert cancelled == [True]
@@ -0,0 +1,95 @@
+import asyncio
+import logging
+import threading
+
+import pytest
+
+from app import services
+from app.executor import InferenceExecutor, ExecutorSaturated
+
+
+def test_thread_executor_runs_off_the_event_loop():
+    executor = InferenceExecutor(kind="thread", max_workers=2)
+
+    async def scenario():
+        return threading.get_ident(), await executor.run(threading.get_ident)
+
+    try:
+        loop_thread, worker_thread = asyncio.run(scenario())
+    finally:
+        executor.shutdown()
+
+    assert loop_thread != worker_thread
+    assert executor.stats()["completed"] == 1
+
+
+def test_saturated_executor_rejects_jobs():
+    executor = InferenceExecutor(kind="thread", max_workers=1, max_pending=1)
+    release = threading.Event()
+
+    async def scenario():
+        first = asyncio.ensure_future(executor.run(release.wait))
+        await asyncio.sleep(0)
+        with pytest.raises(ExecutorSaturated):
+            await executor.run(release.wait)
+        release.set()
+        return await first
+
+    try:
+        assert asyncio.run(scenario()) is True
+    finally:
+        executor.shutdown()
+
+    assert executor.stats()["rejected"] == 1
+    assert executor.stats()["pending"] == 0
+
+
+def test_cancelled_caller_leaves_running_job_counted():
+    executor = InferenceExecutor(kind="thread", max_workers=1, max_pending=1)
+    started, release = threading.Event(), threading.Event()
+
+    def job():
+        started.set()
+        return release.wait()
+
+    async def scenario():
+        waiting = asyncio.ensure_future(executor.run(job))
+        await asyncio.get_running_loop().run_in_executor(None, started.wait)
+        waiting.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await waiting
+        # The job still occupies the pool, so the executor stays saturated
+        assert executor.stats()["pending"] == 1
+        with pytest.raises(ExecutorSaturated):
+            await executor.run(job)
+        release.set()
+
+    try:
+        asyncio.run(scenario())
+    finally:
+        executor.shutdown()
+
+    assert executor.stats()["pending"] == 0
+    assert executor.stats()["completed"] == 1
+
+
+def test_unknown_executor_kind():
+    with pytest.raises(ValueError):
+        InferenceExecutor(kind="fiber")
+
+
+def test_process_executor_preloads_model_per_worker():
+    executor = InferenceExecutor(kind="process", max_workers=1, initializer=services.init_worker)
+    logger = logging.getLogger("loan_predictor")
+    applications = services.synthetic_applications(8, seed=11)
+
+    async def scenario():
+        return await executor.run(services.score_applications, applications, logger)
+
+    try:
+        results = asyncio.run(scenario())
+    finally:
+        executor.shutdown()
+
+    services.load_resources(logger)
+    assert results == services.score_applications(applications, logger)
@@ -0,0 +1,90 @@
+import asyncio
+
+import pytest
+
+from app import idempotency as idempotency_module
+from app.idempotency import IdempotencyConflict, IdempotencyStore
+
+
+RESPONSE = {"prediction": 0, "confidence": 0.8, "status": "Rejected"}
+
+
+def test_completed_key_is_replayed():
+    store = IdempotencyStore()
+
+    async def scenario():
+        assert await store.begin("k", "body") is None
+        store.complete("k", RESPONSE)
+        return await store.begin("k", "body")
+
+    assert asyncio.run(scenario()) == RESPONSE
+    assert store.stats()["replays"] == 1
+
+
+def test_key_reused_with_another_body_conflicts():
+    store = IdempotencyStore()
+
+    async def scenario():
+        await store.begin("k", "body")
+        store.complete("k", RESPONSE)
+        await store.begin("k", "other body")
+
+    with pytest.raises(IdempotencyConflict):
+        asyncio.run(scenario())
+    assert store.stats()["conflicts"] == 1
+
+
+def test_abandoned_key_can_be_claimed_again():
+    store = IdempotencyStore()
+
+    async def scenario():
+        await store.begin("k", "body")
+        store.abandon("k")
+        return await store.begin("k", "body")
+
+    assert asyncio.run(scenario()) is None
+    assert store.stats()["claims"] == 2
+
+
+def test_concurrent_retry_waits_for_the_first_attempt():
+    store = IdempotencyStore()
+
+    async def scenario():
+        assert await store.begin("k", "body") is None
+        retry = asyncio.ensure_future(store.begin("k", "body"))
+        await asyncio.sleep(0)
+        assert not retry.done()
+        store.complete("k", RESPONSE)
+        return await retry
+
+    assert asyncio.run(scenario()) == RESPONSE
+
+
+def test_completed_keys_expire(monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr(idempotency_module.time, "monotonic", lambda: now[0])
+    store = IdempotencyStore(ttl_s=60)
+
+    async def scenario():
+        await store.begin("k", "body")
+        store.complete("k", RESPONSE)
+        now[0] += 61
+        return await store.begin("k", "body")
+
+    assert asyncio.run(scenario()) is None
+
+
+def test_store_is_bounded():
+    store = IdempotencyStore(max_entries=2)
+
+    async def scenario():
+        await store.begin("a", "body")
+        waiter = asyncio.ensure_future(store.begin("a", "body"))
+        await asyncio.sleep(0)
+        await store.begin("b", "body")
+        await store.begin("c", "body")  # evicts the in-flight "a"; its waiter claims it
+        return await waiter
+
+    assert asyncio.run(scenario()) is None
+    assert store.stats()["evictions"] >= 1
+    assert store.stats()["size"] <= 2
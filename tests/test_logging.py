@@ -0,0 +1,74 @@
+import io
+import json
+import logging
+
+import pytest
+
+from app.logging_config import configure_logging, request_id_ctx
+
+
+@pytest.fixture
+def make_logger(request):
+    loggers = []
+
+    def make(**options):
+        logger = logging.getLogger(f"test.logging.{request.node.name}.{len(loggers)}")
+        logger.propagate = False
+        stream = io.StringIO()
+        listener = configure_logging(logger, stream=stream, **options)
+        loggers.append(logger)
+        return logger, stream, listener
+
+    yield make
+    for logger in loggers:
+        logger.handlers.clear()
+
+
+def test_json_lines_carry_request_id_and_extra_fields(make_logger):
+    logger, stream, listener = make_logger(fmt="json")
+    token = request_id_ctx.set("req-1")
+    try:
+        logger.info("Scored %d rows", 3, extra={"batch": 7})
+    finally:
+        request_id_ctx.reset(token)
+    listener.stop()
+
+    entry = json.loads(stream.getvalue())
+    assert entry["message"] == "Scored 3 rows"
+    assert entry["request_id"] == "req-1" and entry["batch"] == 7
+    assert entry["level"] == "INFO" and entry["logger"] == logger.name
+
+
+def test_sampling_keeps_an_exact_share_per_level(make_logger):
+    logger, stream, _ = make_logger(use_queue=False, sampling={logging.INFO: 0.25})
+
+    for i in range(100):
+        logger.info("info %d", i)
+    logger.warning("kept")
+
+    lines = stream.getvalue().splitlines()
+    assert sum("info" in line for line in lines) == 25
+    assert lines[-1].endswith("kept")
+
+
+def test_mutable_arguments_are_formatted_at_the_call(make_logger):
+    logger, stream, listener = make_logger()
+    state = {"rows": 1}
+
+    logger.info("state %s, count %d", state, 1)
+    state["rows"] = 2
+    listener.stop()
+
+    assert "state {'rows': 1}, count 1" in stream.getvalue()
+
+
+def test_disabled_levels_never_format(make_logger):
+    logger, stream, listener = make_logger(level="INFO")
+
+    class Expensive:
+        def __str__(self):
+            raise AssertionError("formatted a disabled debug message")
+
+    logger.debug("frame %s", Expensive())
+    listener.stop()
+    assert stream.getvalue() == ""
@@ -0,0 +1,66 @@
+import threading
+
+import pytest
+
+from app.metrics import Registry, _Metric
+
+
+def sample(text: str, name: str) -> float:
+    for line in text.splitlines():
+        if line.startswith(name + " "):
+            return float(line.rsplit(" ", 1)[1])
+    raise AssertionError(f"{name} not in output")
+
+
+def test_histogram_sums_shards_from_every_thread():
+    registry = Registry()
+    histogram = registry.histogram("stage_seconds", "Stage latency.", ["stage"], buckets=(0.01, 0.1))
+    child = histogram.labels("predict")
+
+    def record():
+        for _ in range(1000):
+            child.observe(0.05)
+
+    threads = [threading.Thread(target=record) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    child.observe(0.005)
+    child.observe(3.0)
+
+    text = registry.render()
+    assert sample(text, 'stage_seconds_bucket{stage="predict",le="0.01"}') == 1
+    assert sample(text, 'stage_seconds_bucket{stage="predict",le="0.1"}') == 8001
+    assert sample(text, 'stage_seconds_bucket{stage="predict",le="+Inf"}') == 8002
+    assert sample(text, 'stage_seconds_count{stage="predict"}') == 8002
+    assert abs(sample(text, 'stage_seconds_sum{stage="predict"}') - 403.005) < 1e-6
+
+
+def test_render_counters_and_stats_gauges():
+    registry = Registry()
+    counter = registry.counter("errors_total", "Errors.", ["error"])
+    counter.labels("busy").inc()
+    counter.labels("busy").inc(2)
+    counter.labels('odd "name"').inc()
+    registry.gauges("queue", lambda: {"depth": 3, "running": True, "histogram": {"1": 2}, "kind": "thread"})
+    registry.gauges("cache", lambda: None)
+
+    text = registry.render()
+    assert "# TYPE errors_total counter" in text
+    assert sample(text, 'errors_total{error="busy"}') == 3
+    assert sample(text, 'errors_total{error="odd \\"name\\""}') == 1
+    assert sample(text, "queue_depth") == 3
+    assert sample(text, "queue_running") == 1
+    assert "queue_histogram" not in text and "queue_kind" not in text and "cache_" not in text
+
+
+def test_metric_subclass_must_implement_children_and_samples():
+    class Gauge(_Metric):
+        kind = "gauge"
+
+        def _samples(self):
+            return []
+
+    with pytest.raises(TypeError, match="_new_child"):
+        Gauge("g", "no children")
@@ -0,0 +1,78 @@
+import logging
+
+from fastapi import FastAPI, HTTPException, Request
+from fastapi.responses import StreamingResponse
+from fastapi.testclient import TestClient
+
+from app.logging_config import request_id_ctx
+from app.middleware import RequestIDGenerator, RequestIDMiddleware
+
+
+class Records(logging.Handler):
+    def __init__(self):
+        super().__init__()
+        self.records = []
+
+    def emit(self, record):
+        self.records.append(record)
+
+
+def make_client():
+    logger = logging.getLogger("test.middleware")
+    logger.propagate = False
+    logger.setLevel(logging.INFO)
+    logger.handlers = [handler := Records()]
+
+    app = FastAPI()
+    app.add_middleware(RequestIDMiddleware, logger=logger, max_error_body=16)
+
+    @app.get("/ok")
+    def ok(request: Request):
+        return {"ctx": request_id_ctx.get(), "state": request.state.request_id}
+
+    @app.get("/bad")
+    def bad():
+        raise HTTPException(status_code=400, detail="no good")
+
+    @app.get("/stream-error")
+    def stream_error():
+        return StreamingResponse(iter([b"first chunk, ", b"second chunk"]), status_code=500)
+
+    return TestClient(app), handler.records
+
+
+def test_generates_ids_and_sets_context():
+    client, records = make_client()
+
+    first, second = client.get("/ok"), client.get("/ok")
+
+    rid = first.headers["X-Request-ID"]
+    assert first.json() == {"ctx": rid, "state": rid}
+    assert second.headers["X-Request-ID"] != rid
+    assert [r.levelno for r in records] == [logging.INFO, logging.INFO]
+    assert records[0].request_id == rid and records[0].getMessage().endswith('"GET /ok HTTP/1.1" 200')
+
+
+def test_honours_valid_incoming_request_id():
+    client, _ = make_client()
+
+    assert client.get("/ok", headers={"X-Request-ID": "upstream-42"}).json()["ctx"] == "upstream-42"
+    assert client.get("/ok", headers={"X-Request-ID": "bad id\r\n"}).json()["ctx"] != "bad id\r\n"
+
+
+def test_logs_error_bodies_of_plain_and_streaming_responses():
+    client, records = make_client()
+
+    assert client.get("/bad").status_code == 400
+    assert client.get("/stream-error").status_code == 500
+
+    assert [r.levelno for r in records] == [logging.ERROR, logging.ERROR]
+    assert records[0].getMessage().endswith('400 - {"detail":"no go')
+    assert records[1].getMessage().endswith("500 - first chunk, sec")
+
+
+def test_generator_is_unique_and_cheap():
+    new_id = RequestIDGenerator()
+    ids = {new_id() for _ in range(1000)}
+    assert len(ids) == 1000
+    assert RequestIDGenerator()() != new_id()
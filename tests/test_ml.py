@@ -2,7 +2,9 @@ import pytest
 import pandas as pd
 import numpy as np
 from unittest.mock import patch, MagicMock, mock_open
-from app.schemas import validate_payload
+from pydantic import ValidationError
+from app.schemas import LoanApplication, prediction_record, validate_payload
+from app.encoder import FeatureEncoder, extract_affine
 from app import services
 
 @pytest.fixture
@@ -104,6 +106,18 @@ def test_zero_values_allowed(valid_payload, mock_logger, field):
     assert is_valid is True
     assert errors is None
 
+def test_validated_application_is_frozen_and_not_revalidated(valid_payload, mock_logger):
+    application = LoanApplication(**valid_payload)
+    with pytest.raises(ValidationError):
+        application.person_age = -1
+
+    with patch.object(LoanApplication, "__init__", side_effect=AssertionError("re-validated")):
+        is_valid, errors = validate_payload(application, mock_logger)
+    assert (is_valid, errors) == (True, None)
+
+    record = prediction_record(application, loan_status="Approved", confidence=0.9)
+    assert record == {**application.model_dump(), "loan_status": "Approved", "confidence": 0.9}
+
 # ---------- Services Tests ----------
 def test_load_resources_success(mock_logger):
     mock_model = MagicMock()
@@ -172,4 +186,191 @@ def test_predict_model_not_loaded(mock_logger):
     df = pd.DataFrame([[1]*3])
     
     with pytest.raises(RuntimeError):
-        services.predict(df, mock_logger)
\ No newline at end of file
+        services.predict(df, mock_logger)
+
+# ---------- Feature Encoder Tests ----------
+@pytest.fixture
+def loaded_resources(mock_logger):
+    services.load_resources(mock_logger)
+    return services
+
+@pytest.mark.parametrize("home_ownership", ["RENT", "OWN", "MORTGAGE", "OTHER"])
+@pytest.mark.parametrize("loan_intent", ["PERSONAL", "EDUCATION", "MEDICAL", "VENTURE", "HOMEIMPROVEMENT"])
+@pytest.mark.parametrize("education", ["High School", "Associate", "Bachelor", "Master", "Doctorate"])
+def test_encode_input_matches_preprocess_input(loaded_resources, valid_payload, mock_logger,
+                                               home_ownership, loan_intent, education):
+    valid_payload.update(
+        person_home_ownership=home_ownership,
+        loan_intent=loan_intent,
+        person_education=education,
+    )
+    for gender in ("male", "female"):
+        for defaults in ("Yes", "No"):
+            valid_payload.update(person_gender=gender, previous_loan_defaults_on_file=defaults)
+            expected = services.preprocess_input(valid_payload, mock_logger).to_numpy(dtype=np.float64)
+            row = services.encode_input(LoanApplication(**valid_payload), mock_logger)
+
+            assert row.shape == expected.shape
+            np.testing.assert_array_equal(row, expected)
+
+def test_encode_batch_matches_single_rows(loaded_resources, valid_payload, mock_logger):
+    applications = [
+        LoanApplication(**{**valid_payload, "person_age": age, "loan_intent": intent})
+        for age, intent in [(21, "EDUCATION"), (45, "VENTURE"), (63, "PERSONAL")]
+    ]
+
+    batch = services.encoder.encode_batch(applications)
+
+    assert batch.shape == (3, services.encoder.width)
+    for i, application in enumerate(applications):
+        np.testing.assert_array_equal(batch[i], services.encode_input(application, mock_logger)[0])
+
+def test_encode_columns_matches_encode_batch(loaded_resources):
+    applications = services.synthetic_applications(200)
+    frame = pd.DataFrame([application.model_dump() for application in applications])
+
+    for encoder in (services.encoder, services.scaled_encoder):
+        np.testing.assert_array_equal(encoder.encode_columns(frame), encoder.encode_batch(applications))
+
+def test_build_bundle_leaves_active_resources_alone(loaded_resources, valid_payload, mock_logger):
+    active = services.current_bundle()
+
+    bundle = services.build_bundle(mock_logger)
+    assert services.current_bundle() is active
+    assert bundle.model is not active.model
+
+    services.warm_up(bundle, mock_logger, n_rows=8)
+    services.activate_bundle(bundle)
+    assert services.current_bundle() is bundle
+    assert services.model is bundle.model and services.scaled_encoder is bundle.scaled_encoder
+
+    application = LoanApplication(**valid_payload)
+    np.testing.assert_array_equal(
+        services.prepare_input(application, mock_logger, active),
+        services.prepare_input(application, mock_logger, bundle),
+    )
+
+def test_build_bundle_reloads_files_that_changed_while_loading(loaded_resources, mock_logger, monkeypatch):
+    # Fingerprints before and after each attempt: the files change during the first one
+    fingerprints = iter(["a", "b", "b", "b"])
+    monkeypatch.setattr(services, "fingerprint_files", lambda paths: next(fingerprints))
+
+    bundle = services.build_bundle(mock_logger)
+    assert bundle.resource_fingerprint == "b"
+
+    monkeypatch.setattr(services, "fingerprint_files", lambda paths, n=iter(range(100)): str(next(n)))
+    with pytest.raises(RuntimeError, match="kept changing"):
+        services.build_bundle(mock_logger, attempts=2)
+
+def test_encoder_float32_rows(loaded_resources, valid_payload):
+    encoder = FeatureEncoder(
+        services.features, services.gender_map, services.default_map, services.education_order,
+        services.home_ownership_options, services.loan_intent_options, dtype=np.float32,
+    )
+
+    row = encoder.encode(LoanApplication(**valid_payload))
+
+    assert row.dtype == np.float32
+    assert row[0, services.features.index("person_income")] == 50000
+
+
+# ---------- Folded Scaler Tests ----------
+def test_prepare_input_matches_scaler_transform(loaded_resources, mock_logger):
+    assert services.scaled_encoder is not None
+
+    for application in services.synthetic_applications(200, seed=7):
+        df = services.preprocess_input(application.model_dump(), mock_logger)
+        expected = services.scaler.transform(df)
+        row = services.prepare_input(application, mock_logger)
+
+        np.testing.assert_allclose(row, expected, rtol=1e-12, atol=1e-12)
+
+def test_prepare_input_falls_back_to_scaler(loaded_resources, valid_payload, mock_logger):
+    application = LoanApplication(**valid_payload)
+    folded = services.prepare_input(application, mock_logger)
+
+    services.scaled_encoder = None
+    fallback = services.prepare_input(application, mock_logger)
+
+    np.testing.assert_allclose(folded, fallback, rtol=1e-12, atol=1e-12)
+
+def test_verify_scaled_encoder(loaded_resources, mock_logger):
+    assert services.verify_scaled_encoder(mock_logger) is True
+
+    services.scaled_encoder.numeric[0] = services.scaled_encoder.numeric[0][:2] + (0.0, 1.0)
+    assert services.verify_scaled_encoder(mock_logger) is False
+    mock_logger.error.assert_called()
+
+def test_extract_affine_standard_scaler():
+    from sklearn.preprocessing import MinMaxScaler, StandardScaler
+
+    X = np.array([[1.0, 10.0], [3.0, 30.0], [5.0, 20.0]])
+    scaler = StandardScaler().fit(X)
+    center, scale = extract_affine(scaler, 2)
+
+    np.testing.assert_allclose((X - center) / scale, scaler.transform(X))
+    with pytest.raises(TypeError):
+        extract_affine(MinMaxScaler().fit(X), 2)
+
+
+# ---------- Native Booster Tests ----------
+@pytest.mark.parametrize("n_rows", [1, 5, 200])
+def test_booster_predictor_matches_predict_proba(loaded_resources, n_rows):
+    X = services.scaled_encoder.encode_batch(services.synthetic_applications(n_rows, seed=n_rows))
+
+    np.testing.assert_allclose(
+        services.predictor.predict_proba(X), services.model.predict_proba(X), rtol=1e-6, atol=1e-7
+    )
+
+def test_predict_batch(loaded_resources, mock_logger):
+    applications = services.synthetic_applications(50, seed=3)
+    X = services.scaled_encoder.encode_batch(applications)
+
+    classes, confidence = services.predict_batch(X, mock_logger)
+
+    assert classes.shape == confidence.shape == (50,)
+    for i in (0, 17, 49):
+        single = services.predict(X[i:i + 1], mock_logger, prescaled=True)
+        assert single["prediction"] == classes[i]
+        assert abs(single["confidence"] - confidence[i]) < 1e-6
+
+
+# ---------- Batch Validation Tests ----------
+def test_validate_batch_splits_errors_by_row(valid_payload):
+    from app.schemas import validate_batch
+
+    bad = {**valid_payload, "credit_score": -1}
+    applications, indices, errors = validate_batch([valid_payload, bad, valid_payload, "nope"])
+
+    assert indices == [0, 2]
+    assert all(isinstance(a, LoanApplication) for a in applications)
+    assert set(errors) == {1, 3}
+    assert errors[1][0]["loc"] == ("credit_score",)
+
+def test_score_rows_matches_single_predictions(loaded_resources, mock_logger):
+    from app.bulk import score_rows
+
+    payloads = [a.model_dump() for a in services.synthetic_applications(20, seed=5)]
+    payloads[4] = {"person_age": 30}
+
+    results, records = score_rows(payloads, mock_logger, offset=100)
+
+    assert len(results) == 20 and len(records) == 19
+    assert results[4]["status"] == "Error" and results[4]["index"] == 104
+    for i in (0, 10, 19):
+        expected = services.predict(services.prepare_input(LoanApplication(**payloads[i]), mock_logger), mock_logger, prescaled=True)
+        assert results[i]["prediction"] == expected["prediction"]
+        assert results[i]["index"] == 100 + i
+
+def test_iter_ndjson_lines_bounds_line_length():
+    import asyncio
+    from app.bulk import iter_ndjson_lines
+
+    async def chunks():
+        for chunk in (b'{"a": 1}\n{"b"', b': 2}\n', b"x" * 50, b"x" * 50, b'\n\n{"c": 3}'):
+            yield chunk
+
+    async def collect():
+        return [line async for line in iter_ndjson_lines(chunks(), max_line_bytes=64)]
+
+    assert asyncio.run(collect()) == [b'{"a": 1}', b'{"b": 2}', None, b'{"c": 3}']
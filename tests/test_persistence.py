@@ -0,0 +1,121 @@
+import threading
+import time
+
+import pytest
+
+from app.persistence import PredictionWriter, PersistenceQueueFull
+
+
+class RecordingFlush:
+    def __init__(self, fail_times: int = 0):
+        self.batches = []
+        self.fail_times = fail_times
+        self.lock = threading.Lock()
+
+    def __call__(self, records):
+        with self.lock:
+            if self.fail_times:
+                self.fail_times -= 1
+                raise RuntimeError("database is down")
+            self.batches.append(list(records))
+        return len(records)
+
+
+def wait_for(condition, timeout=5.0):
+    deadline = time.monotonic() + timeout
+    while not condition():
+        if time.monotonic() > deadline:
+            raise AssertionError("condition not met in time")
+        time.sleep(0.005)
+
+
+def test_flushes_when_batch_is_full():
+    flush = RecordingFlush()
+    writer = PredictionWriter(flush, batch_size=3, flush_interval_ms=10_000)
+
+    for i in range(6):
+        writer.submit({"n": i})
+
+    wait_for(lambda: writer.stats()["flushed"] == 6)
+    assert [len(b) for b in flush.batches] == [3, 3]
+    writer.close()
+
+
+def test_flushes_after_interval():
+    flush = RecordingFlush()
+    writer = PredictionWriter(flush, batch_size=100, flush_interval_ms=20)
+
+    writer.submit({"n": 1})
+    writer.submit({"n": 2})
+
+    wait_for(lambda: writer.stats()["flushes"] == 1)
+    assert flush.batches == [[{"n": 1}, {"n": 2}]]
+    assert writer.stats()["last_flush_lag_s"] >= 0.0
+    writer.close()
+
+
+def test_close_drains_queue_and_rejects_new_records():
+    flush = RecordingFlush()
+    writer = PredictionWriter(flush, batch_size=1000, flush_interval_ms=60_000)
+
+    for i in range(250):
+        writer.submit({"n": i})
+    writer.close(timeout=5)
+
+    assert sum(len(b) for b in flush.batches) == 250
+    with pytest.raises(PersistenceQueueFull):
+        writer.submit({"n": 999})
+
+
+def test_full_queue_rejects_records():
+    gate = threading.Event()
+
+    def slow_flush(records):
+        gate.wait()
+        return len(records)
+
+    writer = PredictionWriter(slow_flush, max_queue_size=2, batch_size=1, flush_interval_ms=0)
+    writer.submit({"n": 0})
+    wait_for(lambda: writer.stats()["queue_depth"] == 0)  # picked up, flush blocked
+    writer.submit({"n": 1})
+    writer.submit({"n": 2})
+
+    with pytest.raises(PersistenceQueueFull):
+        writer.submit({"n": 3})
+    assert writer.stats()["rejected"] == 1
+    assert writer.stats()["oldest_queued_age_s"] > 0
+
+    gate.set()
+    writer.close()
+    assert writer.stats()["flushed"] == 3
+
+
+def test_failed_flush_is_retried():
+    flush = RecordingFlush(fail_times=2)
+    writer = PredictionWriter(flush, batch_size=1, flush_interval_ms=0, max_retries=3, retry_backoff_ms=1)
+
+    writer.submit({"n": 1})
+    writer.close()
+
+    assert flush.batches == [[{"n": 1}]]
+    assert writer.stats()["failed"] == 0
+
+
+def test_async_flush_runs_on_writer_loop():
+    batches = []
+    closed = []
+
+    async def flush(records):
+        batches.append(list(records))
+        return len(records)
+
+    async def on_close():
+        closed.append(True)
+
+    writer = PredictionWriter(flush, batch_size=2, flush_interval_ms=10, on_close=on_close)
+    for i in range(3):
+        writer.submit({"n": i})
+    writer.close()
+
+    assert sum(len(b) for b in batches) == 3
+    assert closed == [True]
@@ -0,0 +1,99 @@
+import logging
+
+import pytest
+
+from app.registry import ModelBundle, ModelRegistry
+
+
+def make_bundle(fingerprint: str) -> ModelBundle:
+    return ModelBundle(
+        model=object(), scaler=None, features=[], gender_map={}, default_map={}, education_order={},
+        home_ownership_options=[], loan_intent_options=[], encoder=None, scaled_encoder=None,
+        predictor=None, resource_fingerprint=fingerprint, loaded_at=0.0,
+    )
+
+
+class FakeResources:
+    def __init__(self):
+        self.on_disk = "v1"
+        self.active = make_bundle("v1")
+        self.broken = set()
+        self.warmed = []
+        self.swapped = []
+
+    def load(self) -> ModelBundle:
+        if self.on_disk in self.broken:
+            raise ValueError(f"corrupt {self.on_disk}")
+        return make_bundle(self.on_disk)
+
+    def registry(self, **kwargs) -> ModelRegistry:
+        def activate(bundle):
+            self.active = bundle
+
+        return ModelRegistry(
+            load=self.load,
+            activate=activate,
+            current=lambda: self.active,
+            fingerprint=lambda: self.on_disk,
+            warm_up=self.warmed.append,
+            on_swap=[self.swapped.append],
+            poll_interval_s=0,
+            logger=logging.getLogger("test"),
+            **kwargs,
+        )
+
+
+def test_reload_warms_up_before_swapping():
+    resources = FakeResources()
+    registry = resources.registry()
+    resources.on_disk = "v2"
+
+    bundle = registry.reload()
+
+    assert resources.active is bundle
+    assert resources.warmed == [bundle] and resources.swapped == [bundle]
+    assert registry.stats()["reloads"] == 1
+
+
+def test_failed_reload_keeps_the_active_bundle():
+    resources = FakeResources()
+    registry = resources.registry()
+    previous = resources.active
+    resources.on_disk = "v2"
+    resources.broken.add("v2")
+
+    with pytest.raises(ValueError):
+        registry.reload()
+
+    assert resources.active is previous
+    assert registry.stats()["failures"] == 1
+    assert "corrupt v2" in registry.stats()["last_error"]
+
+
+def test_check_waits_for_files_to_settle():
+    resources = FakeResources()
+    registry = resources.registry()
+
+    assert registry.check() is False  # nothing changed
+    resources.on_disk = "v2"
+    assert registry.check() is False  # changed, not yet settled
+    assert resources.active.resource_fingerprint == "v1"
+    assert registry.check() is True
+    assert resources.active.resource_fingerprint == "v2"
+
+
+def test_check_does_not_retry_a_broken_fingerprint():
+    resources = FakeResources()
+    registry = resources.registry()
+    resources.on_disk = "v2"
+    resources.broken.add("v2")
+
+    registry.check()
+    assert registry.check() is False
+    assert registry.check() is False
+    assert registry.stats()["failures"] == 1
+
+    resources.on_disk = "v3"
+    registry.check()
+    assert registry.check() is True
+    assert resources.active.resource_fingerprint == "v3"
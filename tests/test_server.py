@@ -0,0 +1,80 @@
+import json
+import os
+import signal
+import socket
+import subprocess
+import sys
+import time
+import urllib.request
+
+import pytest
+
+from app.memory import memory_usage
+
+
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+@pytest.mark.skipif(not os.path.exists("/proc/self/smaps_rollup"), reason="needs Linux /proc")
+def test_memory_usage_splits_shared_and_private_pages():
+    usage = memory_usage()
+
+    assert usage["rss_mb"] > 0
+    assert usage["shared_mb"] + usage["private_mb"] == pytest.approx(usage["rss_mb"], abs=0.5)
+
+
+@pytest.mark.skipif(not hasattr(os, "fork"), reason="needs fork")
+def test_prefork_workers_share_the_socket_and_stop_on_sigterm(tmp_path):
+    port = free_port()
+    env = {**os.environ, "DATABASE_URL": f"sqlite:///{tmp_path / 'prefork.db'}", "MODEL_WATCH_INTERVAL_S": "0"}
+    subprocess.run([sys.executable, "-m", "app.server", "migrate"], env=env, check=True, capture_output=True)
+    server = subprocess.Popen(
+        [sys.executable, "-m", "app.server", "--workers", "2", "--port", str(port), "--log-level", "warning"],
+        env=env,
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.DEVNULL,
+    )
+    try:
+        pids = set()
+        deadline = time.monotonic() + 60
+        while len(pids) < 2 and time.monotonic() < deadline:
+            try:
+                with urllib.request.urlopen(f"http://127.0.0.1:{port}/stats", timeout=2) as response:
+                    pids.add(json.load(response)["process"]["pid"])
+            except OSError:
+                time.sleep(0.1)
+        assert len(pids) == 2 and server.pid not in pids
+
+        server.send_signal(signal.SIGTERM)
+        assert server.wait(timeout=30) == 0
+    finally:
+        server.kill()
+        server.wait()
+
+
+@pytest.mark.skipif(not hasattr(os, "fork"), reason="needs fork")
+def test_prefork_master_gives_up_on_crash_looping_workers(tmp_path):
+    env = {
+        **os.environ,
+        "DATABASE_URL": f"sqlite:///{tmp_path / 'prefork.db'}",
+        # app.main fails to import, so every worker exits at once
+        "INFERENCE_EXECUTOR": "bogus",
+        "WORKER_MAX_FAST_EXITS": "3",
+        "WORKER_RESTART_BACKOFF_S": "0.05",
+    }
+    started = time.monotonic()
+    server = subprocess.run(
+        [sys.executable, "-m", "app.server", "--migrate", "--workers", "1", "--port", str(free_port())],
+        env=env,
+        capture_output=True,
+        text=True,
+        timeout=60,
+    )
+
+    assert server.returncode == 1
+    assert "starting a new one in 0.1s" in server.stderr
+    assert "3 workers in a row exited right after start" in server.stderr
+    assert time.monotonic() - started < 30
@@ -0,0 +1,42 @@
+import os
+
+import pytest
+
+from app.startup import StartupState
+from benchmarks.bench_startup import HEAVY_MODULES, measure
+
+# Generous budgets for shared CI machines; a regression to loading the model
+# or connecting to the database at import time blows through them
+IMPORT_BUDGET_S = float(os.getenv("STARTUP_IMPORT_BUDGET_S", 2.0))
+FIRST_PREDICTION_BUDGET_S = float(os.getenv("STARTUP_FIRST_PREDICTION_BUDGET_S", 6.0))
+
+
+@pytest.fixture(scope="module")
+def startup():
+    return measure(runs=1)
+
+
+def test_import_defers_heavy_modules(startup):
+    assert {"sqlalchemy", "uvicorn"} <= set(HEAVY_MODULES)
+    assert startup["heavy_modules_on_import"] == []
+    assert startup["import_s"] < IMPORT_BUDGET_S
+
+
+def test_time_to_first_prediction(startup):
+    assert startup["import_s"] < startup["ready_s"] <= startup["first_prediction_s"]
+    assert startup["first_prediction_s"] < FIRST_PREDICTION_BUDGET_S
+
+
+def test_failed_stage_keeps_the_service_unready():
+    state = StartupState()
+    state.stage("database", lambda: None)
+
+    def refuse():
+        raise ConnectionError("refused")
+
+    with pytest.raises(ConnectionError):
+        state.stage("db_pool", refuse)
+
+    assert not state.ready
+    assert state.stats()["error"] == "db_pool: refused"
+    assert state.stats()["stages_s"].keys() == {"database", "db_pool"}
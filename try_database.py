@@ -1,4 +1,5 @@
-from app.crud import init_db, create_db, drop_db, save_prediction
+from app.crud import init_db, create_db, drop_db, bulk_save_predictions
+from app.schemas import LoanApplication, prediction_record
 from database import base
 
 try:
@@ -6,9 +7,7 @@ try:
     # drop_db()
     create_db()
 
-    db = base.SessionLocal()
-    user = save_prediction(
-        db,
+    application = LoanApplication(
         person_age= 35.0,
         person_gender= "male",
         person_education="Bachelor",
@@ -22,10 +21,10 @@ try:
         cb_person_cred_hist_length=4.0,
         credit_score=720,
         previous_loan_defaults_on_file= "No",
-        prediction=1,
-        confidence=0.2
     )
-    
-    print(f"result : {user}")
+    with base.SessionLocal() as db:
+        saved = bulk_save_predictions(db, [prediction_record(application, loan_status="Approved", confidence=0.2)])
+
+    print(f"result : saved {saved} prediction(s)")
 except Exception as e:
-    print(f"err : ${e}")
\ No newline at end of file
+    print(f"err : ${e}")